@@ -0,0 +1 @@
+"""Standalone benchmarks; run from dashgui/ with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,91 @@
+"""Background load and repaint cost, before and after the pre-scaled asset pipeline.
+
+Load: decoding the 1800x1200 PNG and scaling it to the display on every window
+(before), loading the pre-scaled JPEG (after, first window), and a
+QPixmapCache hit (after, every later window). Repaint: a window-level
+``background-image`` stylesheet, which every child widget inherits and paints
+again, against one ``BackgroundWidget`` under the same children.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_assets [--size 800x480] [--repaints 200]
+"""
+import argparse
+import os
+import time
+
+from PySide6.QtGui import QImage, QPixmapCache
+from PySide6.QtWidgets import QApplication, QGridLayout, QLabel, QPushButton, QWidget
+
+from ui.assets import RESOURCE_DIR, BACKGROUNDS, AssetManager, BackgroundWidget, cover, scaled_background_path
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def populate(widget):
+    # Roughly the relay page: a grid of labels and buttons
+    layout = QGridLayout(widget)
+    for i in range(8):
+        layout.addWidget(QLabel(f"L{i+1}: Off"), i, 0)
+        layout.addWidget(QPushButton(f"Relay {i+1}"), i, 1)
+    return widget
+
+
+def repaint_time(app, widget, repaints):
+    widget.show()
+    app.processEvents()
+    start = time.perf_counter()
+    for _ in range(repaints):
+        widget.repaint()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="800x480", metavar="WxH")
+    parser.add_argument("--background", default="main", choices=sorted(BACKGROUNDS))
+    parser.add_argument("--repaints", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    app = QApplication.instance() or QApplication([])
+    original = os.path.join(RESOURCE_DIR, BACKGROUNDS[args.background])
+    prescaled = scaled_background_path(args.background, width, height)
+    if not os.path.exists(prescaled):
+        raise SystemExit(f"{prescaled} missing; run: python -m ui.assets --size {args.size}")
+
+    decode_scale = best_of(lambda: cover(QImage(original), width, height), args.repeat)
+    load_prescaled = best_of(lambda: QImage(prescaled), args.repeat)
+    QPixmapCache.clear()
+    manager = AssetManager()
+    manager.background(args.background, width, height)
+    cache_hit = best_of(lambda: manager.background(args.background, width, height), args.repeat)
+    print(f"load, decode + scale original:   {decode_scale * 1e3:8.2f} ms")
+    print(f"load, pre-scaled file:           {load_prescaled * 1e3:8.2f} ms "
+          f"({decode_scale / load_prescaled:.1f}x)")
+    print(f"load, pixmap cache hit:          {cache_hit * 1e3:8.3f} ms")
+
+    old = populate(QWidget())
+    old.setStyleSheet(f"background-image: url({original}); background-repeat: no-repeat; "
+                      "background-position: center;")
+    new = populate(BackgroundWidget(args.background))
+    for widget in (old, new):
+        widget.resize(width, height)
+    before = repaint_time(app, old, args.repaints)
+    after = repaint_time(app, new, args.repaints)
+    scale = 1000 / args.repaints
+    print(f"repaint, window stylesheet:      {before * scale:8.2f} ms per repaint")
+    print(f"repaint, BackgroundWidget:       {after * scale:8.2f} ms per repaint ({before / after:.1f}x)")
+    for widget in (old, new):
+        widget.close()
+
+
+if __name__ == "__main__":
+    main()
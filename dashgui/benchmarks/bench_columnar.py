@@ -0,0 +1,83 @@
+"""Load time and size of a dataset as CSV vs. columnar NPY vs. Parquet.
+
+    python -m benchmarks.bench_columnar [--rows 1000000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from relay_control import FEATURES, OUTPUTS
+from relay_control import columnar
+from relay_control.dataset_gen import generate, write_csv
+
+
+def size_on_disk(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def load_csv(path):
+    import pandas as pd
+    frame = pd.read_csv(path)
+    return frame[FEATURES].to_numpy(np.float32), frame[OUTPUTS].to_numpy(np.uint8)
+
+
+def load_columnar(path):
+    dataset = columnar.open_columnar(path)
+    return dataset.inputs(), dataset.labels()
+
+
+def load_parquet(path):
+    blocks = list(columnar.iter_parquet_chunks(path))
+    return np.vstack([inputs for inputs, _ in blocks]), np.vstack([labels for _, labels in blocks])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="relay-columnar-")
+    try:
+        csv_path = os.path.join(workdir, "data.csv")
+        npy_path = os.path.join(workdir, "data.cols")
+        parquet_path = os.path.join(workdir, "data.parquet")
+        with open(csv_path, "w") as handle:
+            write_csv(handle, args.rows, 250_000, 42, "mixed")
+        with columnar.ColumnarWriter(npy_path, args.rows) as writer:
+            for inputs, labels in generate(args.rows, 250_000, 42, "mixed"):
+                writer.write(inputs, labels)
+        formats = [("csv", csv_path, load_csv), ("npy", npy_path, load_columnar)]
+        try:
+            columnar.write_parquet(parquet_path, generate(args.rows, 250_000, 42, "mixed"))
+            formats.append(("parquet", parquet_path, load_parquet))
+        except ImportError:
+            print("pyarrow not installed; skipping Parquet")
+
+        reference = None
+        for name, path, loader in formats:
+            seconds, (inputs, labels) = timed(lambda: loader(path))
+            if reference is None:
+                reference = labels
+            same = np.array_equal(labels, reference)
+            print(f"{name:<8} {size_on_disk(path) / 2**20:8.1f} MiB  full load {seconds * 1e3:8.1f} ms"
+                  f"  ({args.rows / seconds:,.0f} rows/s, labels match CSV: {same})")
+        seconds, _ = timed(lambda: columnar.open_columnar(npy_path).labels(args.rows // 2, args.rows // 2 + 1000))
+        print(f"npy      random 1000-row slice via mmap {seconds * 1e3:.2f} ms")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Per-prediction latency of the stock joblib model vs. CompiledModel.
+
+    python -m benchmarks.bench_compiled_model [--repeat 500]
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from relay_control import DATASET_PATH, FEATURES, MODEL_PATH
+from relay_control.compiled_model import CompiledModel
+
+
+def time_per_call(fn, rows, repeat):
+    # Cycle through real rows so neither path benefits from a single hot input
+    samples = [[list(rows[i % len(rows)])] for i in range(repeat)]
+    start = time.perf_counter()
+    for sample in samples:
+        fn(sample)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    import joblib
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        start = time.perf_counter()
+        model = joblib.load(MODEL_PATH)
+        load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    compiled = CompiledModel.from_estimator(model)
+    compile_time = time.perf_counter() - start
+
+    rows = pd.read_csv(DATASET_PATH)[FEATURES].to_numpy()
+    identical = np.array_equal(model.predict(rows), compiled.predict(rows))
+
+    stock = time_per_call(model.predict, rows, args.repeat)
+    fast = time_per_call(compiled.predict, rows, args.repeat)
+
+    print(f"joblib.load:            {load_time * 1e3:9.1f} ms")
+    print(f"compile:                {compile_time * 1e3:9.1f} ms")
+    print(f"labels identical:       {identical} ({len(rows)} rows)")
+    print(f"stock predict (1 row):  {stock * 1e6:9.1f} us")
+    print(f"compiled predict:       {fast * 1e6:9.1f} us")
+    print(f"speedup:                {stock / fast:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
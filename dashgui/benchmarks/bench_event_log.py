@@ -0,0 +1,95 @@
+"""Event log append cost per fsync policy, and time-range queries against a CSV scan.
+
+Appends --records events (as the relay actuator thread would) under each
+fsync policy, then times a query for one minute of a --hours long log:
+``EventLogReader.query`` on the memory-mapped segments against reading the
+same records from a CSV with pandas and filtering on the time column, which is
+what a text log would need.
+
+    python -m benchmarks.bench_event_log [--records 100000] [--hours 24]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from relay_control import FEATURES
+from relay_control.event_log import EVENT_DTYPE, FSYNC_POLICIES, EventLog, EventLogReader
+
+
+def append_rate(directory, policy, records, inputs):
+    log = EventLog(directory, fsync=policy)
+    start = time.perf_counter()
+    for i in range(records):
+        log.append(time.time(), inputs[i % len(inputs)], i & 0xFF, i & 0xFF, "model")
+    log.close()
+    return records / (time.perf_counter() - start), log.stats()
+
+
+def write_history(directory, hours, rate_hz, inputs):
+    # A long log written straight in EVENT_DTYPE blocks, rate_hz records per second
+    count = int(hours * 3600 * rate_hz)
+    records = np.zeros(count, dtype=EVENT_DTYPE)
+    records["time"] = 1.7e9 + np.arange(count) / rate_hz
+    records["inputs"] = inputs[np.arange(count) % len(inputs)]
+    log = EventLog(directory, fsync="none", buffer_records=65536)
+    for start in range(0, count, len(log.buffer)):
+        block = records[start:start + len(log.buffer)]
+        log.buffer[:len(block)] = block
+        log.buffered = len(block)
+        log.flush()
+    log.close()
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000, help="appends per fsync policy")
+    parser.add_argument("--hours", type=float, default=24.0, help="history length for the query test")
+    parser.add_argument("--rate", type=float, default=10.0, help="logged commands per second in the history")
+    args = parser.parse_args()
+
+    from relay_control.streaming import CsvReplaySource
+    inputs = CsvReplaySource().rows
+
+    with tempfile.TemporaryDirectory() as root:
+        for policy in FSYNC_POLICIES:
+            records = args.records if policy != "always" else min(args.records, 2000)
+            rate, stats = append_rate(os.path.join(root, policy), policy, records, inputs)
+            print(f"append, fsync={policy:6}  {rate:12,.0f} records/s  "
+                  f"({stats['writes']} writes, {stats['syncs']} syncs)")
+
+        directory = os.path.join(root, "history")
+        records = write_history(directory, args.hours, args.rate, inputs)
+        csv_path = os.path.join(root, "history.csv")
+        import pandas as pd
+        frame = pd.DataFrame(records["inputs"], columns=FEATURES)
+        frame.insert(0, "time", records["time"])
+        frame["predicted"], frame["applied"], frame["source"] = records["predicted"], records["applied"], 0
+        frame.to_csv(csv_path, index=False)
+
+        middle = records["time"][len(records) // 2]
+        window = (middle, middle + 60.0)
+
+        start = time.perf_counter()
+        reader = EventLogReader(directory)
+        found = reader.query(*window)
+        mapped = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text = pd.read_csv(csv_path)
+        scanned = text[(text["time"] >= window[0]) & (text["time"] < window[1])]
+        parsed = time.perf_counter() - start
+
+        assert len(found) == len(scanned)
+        size = sum(os.path.getsize(path) for path, _ in reader.segments)
+        print(f"history: {len(records):,} records, {len(reader.segments)} segments, {size / 2**20:.1f} MiB "
+              f"(CSV {os.path.getsize(csv_path) / 2**20:.1f} MiB)")
+        print(f"query 1 min, open + mmap + search: {mapped * 1e3:9.2f} ms ({len(found)} records)")
+        print(f"query 1 min, CSV read + filter:     {parsed * 1e3:9.2f} ms ({parsed / mapped:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
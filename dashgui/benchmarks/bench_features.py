@@ -0,0 +1,57 @@
+"""Windowed feature cost per sample: running sums against recomputing each window.
+
+"naive" keeps the last --window samples and recomputes every statistic from
+them for each new sample (O(window)); "update" is ``WindowedFeatures.update``
+(O(1)); "transform" scores the same samples as one block the way training does.
+
+    python -m benchmarks.bench_features [--samples 5000] [--window 32 --window 256]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from relay_control.features import WindowedFeatures
+from relay_control.streaming import CsvReplaySource
+
+
+def naive(rows, window):
+    out = []
+    for i in range(len(rows)):
+        w = rows[max(0, i - window + 1):i + 1].astype(np.float64)
+        means = w.mean(axis=0)
+        rms = np.sqrt((w * w).mean(axis=0))
+        roc = (w[-1] - w[0]) / (len(w) - 1) if len(w) > 1 else np.zeros(6)
+        power = (w[:, :3] * w[:, 3:]).mean(axis=0)
+        imbalance = [np.abs(m - m.mean()).max() / abs(m.mean()) for m in (means[:3], means[3:])]
+        out.append(np.concatenate([w[-1], means, rms, roc, power, [power.sum()], imbalance]))
+    return np.array(out, dtype=np.float32)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--window", type=int, action="append")
+    args = parser.parse_args()
+
+    rows = CsvReplaySource().rows[:args.samples]
+    for window in args.window or [32, 256]:
+        old, expected = timed(lambda: naive(rows, window))
+        features = WindowedFeatures(window)
+        new, streamed = timed(lambda: np.array([features.update(row) for row in rows]))
+        batch, block = timed(lambda: WindowedFeatures(window).transform(rows))
+        assert np.array_equal(streamed, block)
+        assert np.allclose(streamed, expected, rtol=1e-4, atol=1e-3)
+        scale = 1e6 / len(rows)
+        print(f"window {window:4}: naive {old * scale:8.1f} us/sample, update {new * scale:6.1f} us/sample "
+              f"({old / new:.1f}x), transform {batch * scale:6.2f} us/sample")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Feeder scaling: one predict call per feeder against one call for the whole tick.
+
+For 1, 16 and 128 feeders, times the scoring half of a tick three ways:
+"per feeder" calls ``predict`` on each feeder's row, "stacked" scores the
+(feeders, 6) matrix in one call (what ``FeederGroup`` does), and "pool" hands
+the same matrix to a ``SharedModelPool`` of --workers processes. The pool only
+pays off when there are spare cores; on a single core it adds IPC to the work.
+Then runs full ``FeederGroup`` ticks (read, score, propose to each feeder's
+scheduler and actuator) on simulated banks.
+
+    python -m benchmarks.bench_feeders [--feeders 1 --feeders 16 --feeders 128] [--workers 2]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from relay_control import ARTIFACT_PATH
+from relay_control.feeders import FeederGroup, SharedModelPool, make_feeders, synthetic_config
+from relay_control.model_artifact import load_artifact
+from relay_control.streaming import CsvReplaySource
+
+
+def per_tick(fn, seconds=1.0):
+    # Mean seconds per call of fn, over about `seconds`
+    fn()
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feeders", type=int, action="append")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=1.0, help="timing budget per case")
+    args = parser.parse_args()
+
+    model = load_artifact(ARTIFACT_PATH)
+    rows = CsvReplaySource().rows
+    print(f"{os.cpu_count()} CPUs, pool of {args.workers} workers")
+    for count in args.feeders or [1, 16, 128]:
+        X = rows[np.arange(count) * 7919 % len(rows)]
+        expected = model.predict(X)
+        assert all(np.array_equal(model.predict(X[i:i + 1])[0], expected[i]) for i in range(count))
+        single = per_tick(lambda: [model.predict(X[i:i + 1]) for i in range(count)], args.seconds)
+        stacked = per_tick(lambda: model.predict(X), args.seconds)
+        pool = SharedModelPool(model, args.workers, count)
+        try:
+            assert np.array_equal(pool.predict(X), expected)
+            pool.inputs[:count] = X
+            pooled = per_tick(lambda: pool.predict(rows=count), args.seconds)
+        finally:
+            pool.close()
+
+        feeders = make_feeders(synthetic_config(count))
+        for feeder in feeders:
+            feeder.start()
+        group = FeederGroup(feeders, model, rate_hz=0)
+        ticked = per_tick(group.tick, args.seconds)
+        group.close()
+        print(f"{count:4} feeders: per feeder {single * 1e3:8.3f} ms, stacked {stacked * 1e3:7.3f} ms "
+              f"({single / stacked:5.1f}x), pool {pooled * 1e3:7.3f} ms ({single / pooled:5.1f}x); "
+              f"full tick {ticked * 1e3:7.3f} ms = {count / ticked:10,.0f} samples/s")
+
+
+if __name__ == "__main__":
+    main()
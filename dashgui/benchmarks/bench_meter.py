@@ -0,0 +1,104 @@
+"""Meter frame parsing throughput: per-frame struct decoding vs the chunked NumPy parser.
+
+"before" walks the byte stream one frame at a time the straightforward way
+(find the sync bytes, ``struct.unpack_from``, a table CRC in Python, one small
+array per sample); "after" feeds the same bytes to ``FrameParser`` in
+serial-read-sized chunks. Both store into a ``SampleRing``. Add --pty to also
+time the whole path from a ``FakeMeter`` through a pseudo-terminal.
+
+    python -m benchmarks.bench_meter [--frames 100000] [--chunk 4096] [--pty]
+"""
+import argparse
+import struct
+import time
+
+import numpy as np
+
+from relay_control.meter import STREAM_FRAME, STREAM_SYNC, FakeMeter, FrameParser, MeterSource, SampleRing, crc16
+from relay_control.streaming import CsvReplaySource
+
+FRAME = struct.Struct("<2sH6fH")
+
+
+def encode(rows, frames, noise_every):
+    meter = FakeMeter(rows)
+    chunks = []
+    for i in range(frames):
+        if noise_every and i % noise_every == noise_every - 1:
+            chunks.append(b"\x00\xa5\x13\x37")
+        chunks.append(bytes(meter.frame(i)))
+    meter.close()
+    return b"".join(chunks)
+
+
+def legacy_parse(data, ring):
+    position = 0
+    while True:
+        position = data.find(STREAM_SYNC, position)
+        if position < 0 or position + FRAME.size > len(data):
+            return
+        sync, seq, *values, crc = FRAME.unpack_from(data, position)
+        if crc16(data[position:position + FRAME.size - 2]) != crc:
+            position += 1
+            continue
+        ring.extend(np.array([values], dtype=np.float32))
+        position += FRAME.size
+
+
+def chunked_parse(data, ring, chunk):
+    parser = FrameParser(STREAM_FRAME, ring)
+    for start in range(0, len(data), chunk):
+        parser.feed(data[start:start + chunk])
+        parser.parse()
+    return parser
+
+
+def pty_rate(rows, seconds):
+    meter = FakeMeter(rows, rate_hz=0).start()  # As fast as the pty takes them
+    source = MeterSource(meter.port)
+    read = 0
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < seconds:
+            source.read()
+            read += 1
+    finally:
+        elapsed = time.perf_counter() - start
+        source.close()
+        meter.close()
+    return source.ring.written / elapsed, read / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes per read")
+    parser.add_argument("--noise-every", type=int, default=1000, help="inject garbage every n frames (0 = none)")
+    parser.add_argument("--pty", action="store_true")
+    args = parser.parse_args()
+
+    rows = CsvReplaySource().rows
+    data = encode(rows, args.frames, args.noise_every)
+
+    old_ring = SampleRing()
+    start = time.perf_counter()
+    legacy_parse(data, old_ring)
+    old = time.perf_counter() - start
+
+    new_ring = SampleRing()
+    start = time.perf_counter()
+    chunked = chunked_parse(data, new_ring, args.chunk)
+    new = time.perf_counter() - start
+
+    assert old_ring.written == new_ring.written == args.frames
+    assert np.array_equal(old_ring.data, new_ring.data)
+    print(f"before (struct per frame):  {args.frames / old:12,.0f} frames/s")
+    print(f"after  (chunked NumPy):     {args.frames / new:12,.0f} frames/s ({old / new:.1f}x)")
+    print(", ".join(f"{key}={value}" for key, value in chunked.stats().items()))
+    if args.pty:
+        frames, reads = pty_rate(rows, 2.0)
+        print(f"pty, FakeMeter -> MeterSource: {frames:,.0f} frames/s parsed, {reads:,.0f} reads/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Cold-start cost of loading the model from joblib vs. the NumPy artifact.
+
+Each path runs in a fresh interpreter so import time and peak RSS are real:
+
+    python -m benchmarks.bench_model_startup [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Child script: time import + load + first prediction, then report peak RSS
+CHILD = r"""
+import json, resource, sys, time, warnings
+start = time.perf_counter()
+warnings.simplefilter("ignore")
+if sys.argv[1] == "joblib":
+    import joblib
+    model = joblib.load(sys.argv[2])
+    model.predict([[0.0] * 6])
+else:
+    from relay_control.model_artifact import load_artifact
+    model = load_artifact(sys.argv[2])
+    model.predict([[0.0] * 6])
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "sklearn_imported": "sklearn" in sys.modules,
+    "xgboost_imported": "xgboost" in sys.modules,
+}))
+"""
+
+
+def run(kind, path, cwd):
+    output = subprocess.run([sys.executable, "-c", CHILD, kind, path], cwd=cwd,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    from relay_control import ARTIFACT_PATH, MODEL_PATH
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    for kind, path in [("joblib", MODEL_PATH), ("artifact", ARTIFACT_PATH)]:
+        results = [run(kind, path, cwd) for _ in range(args.runs)]
+        best = min(result["seconds"] for result in results)
+        rss = max(result["max_rss_kb"] for result in results) / 1024
+        heavy = results[0]["sklearn_imported"] or results[0]["xgboost_imported"]
+        print(f"{kind:<9} import+load+predict {best * 1e3:8.1f} ms (best of {args.runs}), "
+              f"peak RSS {rss:7.1f} MiB, sklearn/xgboost imported: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Hit rate and per-call latency of CachedPredictor on replayed CSV samples.
+
+Two replays of the bundled CSV, one sample per call as the GUI loop makes them:
+"csv" cycles through the rows in order, so each distinct row is a miss only on
+the first pass; "steady" holds each row for --hold samples with meter-sized
+noise on top, which is what a feeder in steady state looks like. The last
+line counts samples whose cached labels differ from the model's, which is why
+the cache is opt-in (``RELAY_PREDICTION_CACHE=1``).
+
+    python -m benchmarks.bench_prediction_cache [--samples 20000] [--hold 50] [--max-entries N]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from relay_control import DATASET_PATH, FEATURES
+from relay_control.model_loader import ModelLoader
+from relay_control.prediction_cache import DEFAULT_MAX_ENTRIES, CachedPredictor
+
+# Sensor noise per reading: a few mA, a few tens of mV
+NOISE = np.array([0.003] * 3 + [0.03] * 3)
+
+
+def replay(model, samples):
+    start = time.perf_counter()
+    predictions = [model.predict(sample.reshape(1, -1)) for sample in samples]
+    return (time.perf_counter() - start) / len(samples), np.vstack(predictions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--hold", type=int, default=50, help="samples per operating point in the steady replay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    loader = ModelLoader()
+    loader.start()
+    model = loader.wait()
+    rows = pd.read_csv(DATASET_PATH, usecols=FEATURES)[FEATURES].to_numpy()
+    rng = np.random.default_rng(args.seed)
+    steady = np.repeat(rows, args.hold, axis=0)[:args.samples]
+    replays = {
+        "csv": rows[np.arange(args.samples) % len(rows)],
+        "steady": steady + rng.normal(0, NOISE, steady.shape),
+    }
+
+    for name, samples in replays.items():
+        cached = CachedPredictor(model, max_entries=args.max_entries)
+        uncached_time, expected = replay(model, samples)
+        cached_time, predictions = replay(cached, samples)
+        stats = cached.stats()
+        print(f"{name} replay ({len(samples)} samples)")
+        print(f"  model predict:        {uncached_time * 1e6:9.1f} us")
+        print(f"  cached predict:       {cached_time * 1e6:9.1f} us ({uncached_time / cached_time:.1f}x)")
+        print(f"  hit rate:             {stats['hit_rate']:9.3f} "
+              f"({stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions)")
+        print(f"  labels changed by quantisation: {int((predictions != expected).any(axis=1).sum())} samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""UI-thread time per 1000 prediction updates in testuipyqt.py, before and after the view model.
+
+"before" repaints every update the old way (setText plus a fresh setStyleSheet
+string on each of the 8 output labels); "after" feeds the same updates into
+the view model and repaints at its frame cap, as if they arrived at --rate per
+second. Both include the Qt paint work done by processEvents.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_ui_updates [--updates 1000] [--rate 100]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from relay_control import DATASET_PATH, OUTPUTS
+from relay_control.view_model import FRAME_RATE_HZ
+
+
+def legacy_show_predictions(window, predictions):
+    # RelayControlApp.show_predictions before the view model
+    for i, prediction in enumerate(predictions):
+        window.output_labels[i].setText(f"L{i+1}: {'On' if prediction == 1 else 'Off'}")
+        window.output_labels[i].setStyleSheet("color: green;" if prediction == 1 else "color: black;")
+
+
+def before(app, window, updates):
+    start = time.perf_counter()
+    for predictions in updates:
+        legacy_show_predictions(window, predictions)
+        app.processEvents()
+    return time.perf_counter() - start
+
+
+def after(app, window, updates, rate):
+    frames_per_update = FRAME_RATE_HZ / rate
+    due = 0.0
+    start = time.perf_counter()
+    for predictions in updates:
+        window.show_predictions(predictions)
+        due += frames_per_update
+        if due >= 1.0:
+            due -= 1.0
+            window.render_frame()
+            app.processEvents()
+    window.render_frame()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=100.0, help="updates per second being shown")
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication
+    from relay_control.testuipyqt import RelayControlApp
+
+    labels = pd.read_csv(DATASET_PATH, usecols=OUTPUTS)[OUTPUTS].to_numpy()
+    updates = [labels[i % len(labels)] for i in range(args.updates)]
+
+    app = QApplication.instance() or QApplication([])
+    windows = [RelayControlApp(), RelayControlApp()]
+    for window in windows:
+        window.frame_timer.stop()  # Frames are driven by hand below
+        window.show()
+    app.processEvents()
+
+    old = before(app, windows[0], updates)
+    new = after(app, windows[1], updates, args.rate)
+    scale = 1000 / args.updates
+    print(f"before (repaint per update):    {old * scale * 1e3:8.1f} ms per 1000 updates")
+    print(f"after  ({FRAME_RATE_HZ} Hz view model):      {new * scale * 1e3:8.1f} ms per 1000 updates "
+          f"({windows[1].view_model.frames} frames)")
+    print(f"speedup:                        {old / new:8.1f}x")
+    for window in windows:
+        window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""End-to-end benchmark suite: startup, model load, inference, actuation and UI updates.
+
+Every case runs headless in a fresh interpreter: Qt on the offscreen platform,
+relays on gpiozero's mock pin factory, and no event log, meter, feeders or
+daemon. That gives cold imports and keeps PySide6 (main.py) and PyQt5
+(testuipyqt.py) apart. Each case runs --runs times; the median of each metric
+is kept, along with its spread across the runs ((max - min) / median). All
+metrics are seconds, and lower is better.
+
+=============  ========================================================
+cold_start     launch to the first painted MainWindow frame, and to model ready
+model_load     joblib.load of the model, and the NumPy artifact the runtime uses
+predict        single-row latency (p50/p99) and a 1024-row batch, runtime model
+actuation      RelayBank.apply on mock pins; MainWindow.check_relay_acks
+               (the "update_relays" stage) for a changed mask
+ui_update      UI-thread time per prediction update in RelayControlApp
+=============  ========================================================
+
+Results are written as JSON. With a baseline (a JSON written by an earlier
+run), a metric slower than the baseline by more than its tolerance is reported
+as a regression and the exit status is 1. Tolerances come from ``TOLERANCES``
+(p99 tails and cold imports swing more than steady-state loops), widened to the
+spread the baseline itself measured; --tolerance sets one value for all.
+
+The baseline is only meaningful on the host that recorded it: the committed
+``baseline.json`` was recorded on the 1-CPU development host named in its
+``machine`` entry. On any other machine, record a baseline there first (on an
+unchanged tree), then compare. Re-record the committed baseline in the same
+commit as any change to a measured path::
+
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+    python -m benchmarks.suite -o results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)  # dashgui/, the directory the cases run from
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_RUNS = 5
+# Allowed slowdown as a fraction of the baseline; the first (prefix, suffix) match wins
+TOLERANCES = [("", "_p99", 1.0), ("cold_start.", "", 0.5), ("model_load.", "", 0.5), ("", "", 0.3)]
+MACHINE_KEYS = ["python", "platform", "cpus"]  # Host details that have to match the baseline's
+HEADLESS_ENV = {"QT_QPA_PLATFORM": "offscreen", "GPIOZERO_PIN_FACTORY": "mock", "RELAY_BACKEND": "gpiozero"}
+UNSET_ENV = ["RELAY_DAEMON_SOCKET", "RELAY_FEEDERS", "RELAY_EVENT_LOG", "RELAY_METER"]
+
+
+def percentiles(samples):
+    return np.quantile(np.asarray(samples), [0.5, 0.99])
+
+
+def wait_for_model(app, window, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while window.model is None and window.controller.load_error is None:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Model did not load")
+        app.processEvents()
+        time.sleep(0.001)
+    if window.controller.load_error is not None:
+        raise RuntimeError(window.controller.load_phase)
+
+
+def cold_start(args):
+    from PySide6.QtWidgets import QApplication
+    from main import MainWindow
+
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.processEvents()  # Lays out and paints the first frame
+    first_frame = time.time() - args.launched
+    wait_for_model(app, window)
+    model_ready = time.time() - args.launched
+    window.close_application()
+    return {"first_frame": first_frame, "model_ready": model_ready}
+
+
+def model_load(args):
+    import warnings
+    from relay_control import ARTIFACT_PATH, MODEL_PATH
+    from relay_control.model_artifact import load_artifact
+
+    warnings.simplefilter("ignore")
+    start = time.perf_counter()
+    import joblib
+    import sklearn.multioutput  # noqa: F401  Pulled in by the pickle; timed as import, not load
+    import xgboost  # noqa: F401
+    imported = time.perf_counter()
+    joblib.load(MODEL_PATH)
+    loaded = time.perf_counter()
+    load_artifact(ARTIFACT_PATH)
+    return {"joblib_import": imported - start, "joblib_load": loaded - imported,
+            "artifact_load": time.perf_counter() - loaded}
+
+
+def predict(args):
+    from relay_control import ARTIFACT_PATH
+    from relay_control.model_artifact import load_artifact
+    from relay_control.streaming import CsvReplaySource
+
+    model = load_artifact(ARTIFACT_PATH)
+    rows = CsvReplaySource().rows
+    samples = []
+    for i in range(args.repeat):
+        row = rows[i % len(rows)][None]
+        start = time.perf_counter()
+        model.predict(row)
+        samples.append(time.perf_counter() - start)
+    single = percentiles(samples[10:])  # Skip the first calls' cold caches
+    batch = rows[np.arange(1024) % len(rows)]
+    batches = []
+    for _ in range(max(args.repeat // 100, 5)):
+        start = time.perf_counter()
+        model.predict(batch)
+        batches.append(time.perf_counter() - start)
+    return {"single_p50": single[0], "single_p99": single[1], "batch_1024": statistics.median(batches)}
+
+
+def actuation(args):
+    from PySide6.QtWidgets import QApplication
+    from main import MainWindow
+    from relay_control.relay_bank import RelayBank, make_pins
+
+    masks = np.random.default_rng(0).integers(0, 256, args.repeat).tolist()
+    bank = RelayBank(make_pins("gpiozero", [2, 3, 4, 14, 15, 18, 23, 24]))
+    applies = []
+    for mask in masks:
+        start = time.perf_counter()
+        bank.apply(mask)
+        applies.append(time.perf_counter() - start)
+    bank.all_off()
+
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    wait_for_model(app, window)
+    window.ack_timer.stop()  # Acks are polled by hand below
+    controller = window.controller
+    updates = []
+    for mask in masks[:200]:
+        if mask == controller.bank.mask:
+            continue
+        controller.set_mask(mask)
+        while controller.bank.mask != mask:  # Committed by the actuator thread
+            time.sleep(0.0002)
+        start = time.perf_counter()
+        window.check_relay_acks()
+        updates.append(time.perf_counter() - start)
+    window.close_application()
+    apply_p = percentiles(applies)
+    update_p = percentiles(updates)
+    return {"relay_apply_p50": apply_p[0], "relay_apply_p99": apply_p[1],
+            "update_relays_p50": update_p[0], "update_relays_p99": update_p[1]}
+
+
+def ui_update(args):
+    import pandas as pd
+    from PyQt5.QtWidgets import QApplication
+    from relay_control import DATASET_PATH, OUTPUTS
+    from relay_control.testuipyqt import RelayControlApp
+
+    labels = pd.read_csv(DATASET_PATH, usecols=OUTPUTS)[OUTPUTS].to_numpy()
+    app = QApplication([])
+    window = RelayControlApp()
+    window.show()
+    wait_for_model(app, window)  # The background load would otherwise share the CPU with the loop
+    window.frame_timer.stop()  # One frame per update below: the worst case the frame cap allows
+    samples = []
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        window.show_predictions(labels[i % len(labels)])
+        window.render_frame()
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    window.close()
+    p50, p99 = percentiles(samples)
+    return {"update_p50": p50, "update_p99": p99}
+
+
+CASES = {"cold_start": cold_start, "model_load": model_load, "predict": predict,
+         "actuation": actuation, "ui_update": ui_update}
+
+
+def run_case(name, repeat):
+    # One run of a case in a fresh headless interpreter; returns {metric: seconds}
+    env = dict(os.environ, **HEADLESS_ENV)
+    for key in UNSET_ENV:
+        env.pop(key, None)
+    command = [sys.executable, "-m", "benchmarks.suite", "--case", name, "--repeat", str(repeat),
+               "--launched", repr(time.time())]
+    result = subprocess.run(command, cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{result.stderr.strip()}")
+    # The windows print their startup report; the case's JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_suite(cases, runs=DEFAULT_RUNS, repeat=1000):
+    metrics, spread = {}, {}
+    for name in cases:
+        results = [run_case(name, repeat) for _ in range(runs)]
+        for metric in results[0]:
+            values = [result[metric] for result in results]
+            median = statistics.median(values)
+            metrics[f"{name}.{metric}"] = median
+            spread[f"{name}.{metric}"] = (max(values) - min(values)) / median if median else 0.0
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.machine(), "cpus": os.cpu_count()},
+        "runs": runs,
+        "repeat": repeat,
+        "metrics": metrics,
+        "spread": spread,
+    }
+
+
+def metric_tolerance(metric, baseline, tolerance=None):
+    # Allowed slowdown for one metric, never tighter than the baseline's own run-to-run spread
+    if tolerance is None:
+        tolerance = next(allowed for prefix, suffix, allowed in TOLERANCES
+                         if metric.startswith(prefix) and metric.endswith(suffix))
+    return max(tolerance, baseline.get("spread", {}).get(metric, 0.0))
+
+
+def machine_mismatch(results, baseline):
+    # Host details that differ from the baseline's, as "key: baseline -> here" strings
+    old, new = baseline.get("machine", {}), results["machine"]
+    return [f"{key}: {old.get(key)} -> {new[key]}" for key in MACHINE_KEYS if old.get(key) != new[key]]
+
+
+def compare(results, baseline, tolerance=None):
+    # (metric, baseline, current, ratio, allowed, regressed) for every metric in both
+    rows = []
+    for metric, value in results["metrics"].items():
+        old = baseline["metrics"].get(metric)
+        if old is None:
+            continue
+        ratio = value / old if old else float("inf")
+        allowed = metric_tolerance(metric, baseline, tolerance)
+        rows.append((metric, old, value, ratio, allowed, ratio > 1 + allowed))
+    return rows
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.1f} us"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite")
+    parser.add_argument("--case", action="append", choices=list(CASES), help="case to run (default: all)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="fresh interpreters per case")
+    parser.add_argument("--repeat", type=int, default=1000, help="iterations per measured loop")
+    parser.add_argument("-o", "--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help=f"compare against this results JSON (default: {DEFAULT_BASELINE} "
+                                           "if it exists)")
+    parser.add_argument("--tolerance", type=float,
+                        help="allowed slowdown for every metric (default: per metric, see TOLERANCES)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as the new baseline")
+    parser.add_argument("--launched", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.launched is not None:
+        # Child: run one case and report it as the last line of stdout
+        print(json.dumps(CASES[args.case[0]](args)))
+        return
+
+    results = run_suite(args.case or list(CASES), args.runs, args.repeat)
+    text = json.dumps(results, indent=2) + "\n"
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as handle:
+                handle.write(text)
+
+    baseline_path = args.baseline or (DEFAULT_BASELINE if os.path.exists(DEFAULT_BASELINE) else None)
+    if baseline_path is None or args.save_baseline and os.path.abspath(baseline_path) == os.path.abspath(
+            args.save_baseline):
+        for metric, value in results["metrics"].items():
+            print(f"{metric:<32} {format_seconds(value)}")
+        return
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    mismatch = machine_mismatch(results, baseline)
+    if mismatch:
+        print(f"warning: {baseline_path} was recorded on another host ({'; '.join(mismatch)}); "
+              "record a baseline on this one with --save-baseline")
+    rows = compare(results, baseline, args.tolerance)
+    print(f"{'metric':<32} {'baseline':>11} {'current':>11}  change  allowed")
+    for metric, old, value, ratio, allowed, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<32} {format_seconds(old)} {format_seconds(value)}  {(ratio - 1) * 100:+6.1f}%"
+              f"  {allowed * 100:+5.0f}%{flag}")
+    regressions = [row[0] for row in rows if row[5]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {baseline_path}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
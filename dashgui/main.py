@@ -1,26 +1,49 @@
 import sys
 import os
+import time
+START_TIME = time.perf_counter()  # Reference point for the startup timing report
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QStackedWidget, QLabel, QFrame, QPushButton, QCheckBox, QLineEdit, QGridLayout
 )
 from PySide6.QtGui import QFont
-from PySide6.QtCore import Qt
-import joblib  # To load the deep learning model
-import numpy as np
+from PySide6.QtCore import Qt, QTimer
+from relay_control.controller import RelayController
+from relay_control.feeders import FeederController, feeder_config
+from relay_control.model_loader import StartupTimer
+from relay_control.relay_bank import relay_backend
+from relay_control.scheduler import format_stats
+from ui.assets import BackgroundWidget
+from ui.splash_screen_ui import Ui_SplashScreen
+
+UI_REFRESH_MS = 33  # Coalesce streamed predictions into ~30 UI updates per second
+LOAD_POLL_MS = 50  # How often the splash screen checks model load progress
+STATS_REFRESH_MS = 500  # Stats page refresh while it is showing
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_timer=None, backend=None):
         super().__init__()
+        self.startup_timer = startup_timer if startup_timer is not None else StartupTimer()
+        # Model runtime, relay bank and input pipeline; this window only draws them.
+        # Relays print their writes here; mainpi.py drives the Pi's GPIO pins instead
+        if os.environ.get("RELAY_DAEMON_SOCKET"):
+            # Thin client of a running relay_control.daemon, which owns the model and relays
+            from relay_control.client import RemoteController
+            self.controller = RemoteController(os.environ["RELAY_DAEMON_SOCKET"], self.startup_timer)
+        elif os.environ.get("RELAY_FEEDERS"):
+            # Many relay banks scored together; the Relay page shows one feeder at a time
+            self.controller = FeederController(feeder_config(), startup_timer=self.startup_timer)
+        else:
+            model_path = os.path.join("relay_control", "multi_output_model.joblib")
+            self.controller = RelayController(backend or relay_backend("logging"), model_path,
+                                              startup_timer=self.startup_timer)
+        self.metrics = self.controller.metrics
         self.setWindowTitle("Main Window")
         self.setWindowState(Qt.WindowFullScreen)
 
-        # Set up background
-        self.set_background_image()
-
-        # Main layout
+        # Main layout, on a widget that paints the pre-scaled background once
         self.main_layout = QHBoxLayout()
-        self.central_widget = QWidget(self)
+        self.central_widget = BackgroundWidget("main", self)
         self.setCentralWidget(self.central_widget)
         self.central_widget.setLayout(self.main_layout)
 
@@ -34,13 +57,33 @@ class MainWindow(QMainWindow):
         self.main_layout.addWidget(self.sidebar_frame)
         self.main_layout.addWidget(self.stacked_widget)
 
+        # Per-stage timings; RELAY_METRICS=0 swaps in a no-op recorder
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(STATS_REFRESH_MS)
+        self.stats_timer.timeout.connect(self.refresh_stats)
+
+        # Streaming prediction loop, run by the controller while Start is active
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setInterval(UI_REFRESH_MS)
+        self.stream_timer.timeout.connect(self.refresh_stream)
+
+        # Relay writes happen on the controller's actuator thread; acks are polled here
+        self.ack_timer = QTimer(self)
+        self.ack_timer.setInterval(UI_REFRESH_MS)
+        self.ack_timer.timeout.connect(self.check_relay_acks)
+
+        # The model is loaded on a background thread once the window is up
+        self.model = None
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(LOAD_POLL_MS)
+        self.load_timer.timeout.connect(self.check_model_load)
+
         # Create pages
         self.create_pages()
         self.setup_sidebar()
-
-    def set_background_image(self):
-        # Set a background image
-        self.setStyleSheet("background-image: url(resources/bcg/1.png); background-repeat: no-repeat; background-position: center;")
+        self.stacked_widget.currentChanged.connect(self.on_page_changed)
+        self.startup_timer.mark("Window constructed")
+        QTimer.singleShot(0, self.start_model_load)
 
     def create_pages(self):
         # Home Page
@@ -55,16 +98,28 @@ class MainWindow(QMainWindow):
         self.page_relay = QWidget()
         relay_layout = QVBoxLayout(self.page_relay)
 
-        # Load the deep learning model
-        model_path = os.path.join("relay_control", "multi_output_model.joblib")
-        self.model = joblib.load(model_path)
-
         # Relay page title
         relay_title = QLabel("Relay Control & Prediction")
         relay_title.setFont(QFont("Segoe UI", 16, QFont.Bold))
         relay_title.setAlignment(Qt.AlignCenter)
         relay_layout.addWidget(relay_title)
 
+        # Feeder pager, when the controller drives more than one bank
+        self.feeder_label = None
+        if isinstance(self.controller, FeederController):
+            feeder_layout = QHBoxLayout()
+            previous_button = QPushButton("< Prev")
+            previous_button.clicked.connect(lambda: self.select_feeder(-1))
+            next_button = QPushButton("Next >")
+            next_button.clicked.connect(lambda: self.select_feeder(1))
+            self.feeder_label = QLabel()
+            self.feeder_label.setAlignment(Qt.AlignCenter)
+            feeder_layout.addWidget(previous_button)
+            feeder_layout.addWidget(self.feeder_label, 1)
+            feeder_layout.addWidget(next_button)
+            relay_layout.addLayout(feeder_layout)
+            self.select_feeder(0)
+
         # Input fields for Ir, Iv, Ib, Va, Vb, Vc
         input_grid = QGridLayout()
         self.input_fields = {}
@@ -80,16 +135,19 @@ class MainWindow(QMainWindow):
 
         # Buttons for starting and predicting
         button_layout = QHBoxLayout()
-        start_button = QPushButton("Start")
-        start_button.clicked.connect(self.start_process)
-        predict_button = QPushButton("Predict")
-        predict_button.clicked.connect(self.run_prediction)
-        button_layout.addWidget(start_button)
-        button_layout.addWidget(predict_button)
+        self.start_button = QPushButton("Start")
+        self.start_button.clicked.connect(self.start_process)
+        self.predict_button = QPushButton("Predict")
+        self.predict_button.clicked.connect(self.run_prediction)
+        # Gated until the background model load finishes
+        self.start_button.setEnabled(False)
+        self.predict_button.setEnabled(False)
+        button_layout.addWidget(self.start_button)
+        button_layout.addWidget(self.predict_button)
         relay_layout.addLayout(button_layout)
 
         # Prediction result label
-        self.prediction_result = QLabel("Prediction Result: No prediction yet")
+        self.prediction_result = QLabel("Loading model...")
         self.prediction_result.setAlignment(Qt.AlignCenter)
         relay_layout.addWidget(self.prediction_result)
 
@@ -107,10 +165,34 @@ class MainWindow(QMainWindow):
         # Adding Relay Page to stacked widget
         self.stacked_widget.addWidget(self.page_relay)
 
+        # Stats Page with live per-stage latencies
+        self.page_stats = QWidget()
+        stats_layout = QVBoxLayout(self.page_stats)
+        stats_title = QLabel("Pipeline Timing")
+        stats_title.setFont(QFont("Segoe UI", 16, QFont.Bold))
+        stats_title.setAlignment(Qt.AlignCenter)
+        stats_layout.addWidget(stats_title)
+        self.stats_label = QLabel()
+        self.stats_label.setFont(QFont("Monospace", 11))
+        self.stats_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        stats_layout.addWidget(self.stats_label)
+        stats_layout.addStretch()
+
+        stats_button_layout = QHBoxLayout()
+        for text, handler in [("Dump JSON", self.dump_stats_json),
+                              ("Dump Prometheus", self.dump_stats_prometheus),
+                              ("Reset", self.reset_stats)]:
+            button = QPushButton(text)
+            button.clicked.connect(handler)
+            stats_button_layout.addWidget(button)
+        stats_layout.addLayout(stats_button_layout)
+        self.stacked_widget.addWidget(self.page_stats)
+
     def setup_sidebar(self):
         # Sidebar buttons
         home_button = QPushButton("Home")
         relay_button = QPushButton("Relay")
+        stats_button = QPushButton("Stats")
         exit_button = QPushButton("Exit")
 
         button_style = """
@@ -130,59 +212,175 @@ class MainWindow(QMainWindow):
                 background-color: #c0c0c0;
             }
         """
-        for button in [home_button, relay_button, exit_button]:
+        for button in [home_button, relay_button, stats_button, exit_button]:
             button.setStyleSheet(button_style)
 
         home_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_home))
         relay_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_relay))
+        stats_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_stats))
         exit_button.clicked.connect(self.close_application)
 
         self.sidebar_layout.addWidget(home_button)
         self.sidebar_layout.addWidget(relay_button)
+        self.sidebar_layout.addWidget(stats_button)
         self.sidebar_layout.addWidget(exit_button)
 
+    def start_model_load(self):
+        # Runs from the event loop, i.e. after the window has been shown
+        self.startup_timer.mark("Window shown")
+        self.splash = QMainWindow(self, Qt.SplashScreen | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+        self.splash_ui = Ui_SplashScreen()
+        self.splash_ui.setupUi(self.splash)
+        self.splash_ui.label_title.setText("Relay Control")
+        self.splash.show()
+
+        # Load the model and compile it into flat arrays for fast scoring
+        self.controller.start()
+        self.load_timer.start()
+        self.ack_timer.start()
+
+    def check_model_load(self):
+        self.splash_ui.label_description.setText(self.controller.load_phase + "...")
+        self.splash_ui.progressBar.setValue(self.controller.load_progress)
+        if not self.controller.poll_model():
+            return
+        self.load_timer.stop()
+        self.splash.close()
+        if self.controller.load_error is not None:
+            self.prediction_result.setText(self.controller.load_phase)
+            return
+        self.model = self.controller.model
+        self.start_button.setEnabled(True)
+        self.predict_button.setEnabled(True)
+        self.prediction_result.setText("Prediction Result: No prediction yet")
+        self.startup_timer.mark("Predict enabled")
+        print(self.startup_timer.report())
+
     def close_application(self):
+        self.stop_process()
+        self.ack_timer.stop()
+        self.controller.shutdown()  # Waits for the actuator, then drives every relay off
         self.close()
 
     def start_process(self):
-        # Placeholder for any initialization code
+        # Toggle the continuous sampling loop; acquisition, inference and relay writes run on worker threads
+        if self.controller.streaming:
+            self.stop_process()
+            self.prediction_result.setText("Process stopped.")
+            return
+        self.controller.start_stream()
+        self.stream_timer.start()
+        self.start_button.setText("Stop")
         self.prediction_result.setText("Process started...")
 
+    def stop_process(self):
+        self.controller.stop_stream()
+        self.stream_timer.stop()
+        self.start_button.setText("Start")
+
+    def refresh_stream(self):
+        # Show only the newest streamed prediction; intermediate ones are coalesced away
+        if self.controller.stream_error is not None:
+            self.stop_process()
+            self.prediction_result.setText(f"Error during streaming: {self.controller.stream_error}")
+            return
+        latest = self.controller.poll_stream()
+        if latest is None:
+            if not self.controller.streaming:
+                self.stop_process()
+            return
+        start = self.metrics.clock()
+        sample, prediction = latest
+        for field, value in zip(self.input_fields.values(), sample):
+            field.setText(f"{value:.2f}")
+        self.prediction_result.setText(f"Prediction Result: {prediction}")
+        self.metrics.record("ui_refresh", start)
+
     def run_prediction(self):
         # Collect inputs and make prediction
         try:
-            input_data = [float(self.input_fields[key].text().strip()) for key in self.input_fields]
-            prediction = self.model.predict([input_data])[0]  # Assuming single prediction output per input set
+            prediction = self.controller.predict({key: field.text() for key, field in self.input_fields.items()})
 
             # Update relays based on prediction result
             self.prediction_result.setText(f"Prediction Result: {prediction}")
-            self.update_relays(prediction)
+            self.controller.apply_prediction(prediction)
         except ValueError:
             self.prediction_result.setText("Invalid input. Please enter numerical values for all inputs.")
         except Exception as e:
             self.prediction_result.setText(f"Error during prediction: {e}")
 
     def toggle_relay(self, index, state):
-        # Manual relay toggle
-        if state == Qt.Checked:
-            print(f"Relay {index + 1} turned ON")
+        # Manual relay toggle; queued for the actuator thread, which skips no-op pin writes
+        self.controller.set_relay(index, Qt.CheckState(state) == Qt.Checked)
+
+    def check_relay_acks(self):
+        # Mirror the newest committed bank state on the checkboxes
+        start = self.metrics.clock()
+        mask = self.controller.poll_relays()
+        if self.controller.relay_error is not None:
+            self.ack_timer.stop()
+            self.prediction_result.setText(f"Relay error: {self.controller.relay_error}")
+            return
+        if mask is None:
+            return
+        for i, relay_button in enumerate(self.relay_buttons):
+            relay_state = bool((mask >> i) & 1)
+            if relay_button.isChecked() != relay_state:
+                # Block stateChanged so toggle_relay doesn't queue the same state again
+                relay_button.blockSignals(True)
+                relay_button.setChecked(relay_state)
+                relay_button.blockSignals(False)
+            text = f"Relay {i + 1} {'ON' if relay_state else 'OFF'}"
+            if relay_button.text() != text:
+                relay_button.setText(text)
+        self.metrics.record("update_relays", start)
+
+    def select_feeder(self, step):
+        # Page the Relay view to another feeder; check_relay_acks then redraws its relays
+        controller = self.controller
+        controller.select(controller.selected + step)
+        self.feeder_label.setText(f"Feeder {controller.selected + 1}/{len(controller.feeders)}: "
+                                  f"{controller.feeder_name()}")
+
+    def on_page_changed(self, index):
+        # Only redraw the stats while they are on screen
+        if self.stacked_widget.widget(index) is self.page_stats:
+            self.refresh_stats()
+            self.stats_timer.start()
         else:
-            print(f"Relay {index + 1} turned OFF")
+            self.stats_timer.stop()
 
-    def update_relays(self, prediction):
-        # Update relays based on prediction result
-        if isinstance(prediction, (int, float)):  # If single prediction value
-            prediction = [int(prediction)] * len(self.relay_buttons)  # Set all relays to this value
-        elif isinstance(prediction, (list, np.ndarray)):
-            prediction = list(map(int, prediction))  # Ensure list of integers
+    def refresh_stats(self):
+        # model_swap/model_reload rows appear once a retrained model has been hot-swapped in
+        header = f"Model version: {self.controller.model_version or 'not loaded'}"
+        scheduler = self.controller.scheduler
+        if scheduler is not None and not scheduler.passthrough:
+            header += "\n" + format_stats(scheduler.stats())
+        self.stats_label.setText(header + "\n\n" + self.metrics.format_table())
 
-        for i, relay_button in enumerate(self.relay_buttons):
-            relay_state = bool(prediction[i] if i < len(prediction) else 0)
-            relay_button.setChecked(relay_state)
-            relay_button.setText(f"Relay {i + 1} {'ON' if relay_state else 'OFF'}")
+    def dump_stats_json(self):
+        self.write_stats("relay_metrics.json", self.metrics.to_json())
 
-if __name__ == "__main__":
+    def dump_stats_prometheus(self):
+        self.write_stats("relay_metrics.prom", self.metrics.to_prometheus())
+
+    def write_stats(self, path, text):
+        with open(path, "w") as handle:
+            handle.write(text)
+        self.stats_label.setText(self.metrics.format_table() + f"\n\nSaved {os.path.abspath(path)}")
+
+    def reset_stats(self):
+        self.metrics.reset()
+        self.refresh_stats()
+
+
+def run(backend=None, start_time=START_TIME):
+    startup_timer = StartupTimer(start_time)
+    startup_timer.mark("Imports")
     app = QApplication(sys.argv)
-    main_window = MainWindow()
+    main_window = MainWindow(startup_timer, backend)
     main_window.show()
     sys.exit(app.exec())
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,16 @@
+"""Headless relay-control runtime shared by the GUIs.
+
+Submodules are imported on demand so that pulling in one piece (for example
+the compiled model) does not drag in Qt, gpiozero, sklearn or xgboost.
+"""
+import os
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(PACKAGE_DIR, "multi_output_model.joblib")
+# NumPy-only export of MODEL_PATH, see relay_control.model_artifact
+ARTIFACT_PATH = os.path.join(PACKAGE_DIR, "multi_output_model.artifact")
+DATASET_PATH = os.path.join(PACKAGE_DIR, "high_quality_synthetic_data.csv")
+
+# Column order the model was trained on and the relay outputs it predicts
+FEATURES = ["IR", "IY", "IB", "VR", "VY", "VB"]
+OUTPUTS = ["L1", "L2", "L3", "L4", "L5", "L6", "L7", "L8"]
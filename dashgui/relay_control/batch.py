@@ -0,0 +1,174 @@
+"""Headless batch inference for replaying datasets and captured logs.
+
+``predict_batch`` scores a 2-D block in one call. ``predict_stream`` takes any
+iterable of rows or blocks, re-chunks it into fixed-size NumPy blocks and yields
+``(inputs, predictions)`` pairs, so a multi-GB capture can be replayed with only
+one chunk in memory at a time::
+
+    python -m relay_control.batch capture.csv -o predictions.csv --batch-size 65536
+
+Inputs may also be a columnar dataset directory or ``.parquet`` file (see
+``relay_control.columnar``), which skips CSV parsing entirely.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from relay_control import FEATURES, MODEL_PATH, OUTPUTS
+
+DEFAULT_BATCH_SIZE = 65536
+
+_models = {}
+
+
+def load_model(path=MODEL_PATH, engine="compiled"):
+    # Load each model file once and reuse it for every batch call. "compiled" needs
+    # only NumPy; "xgboost" keeps the stock joblib model, whose multithreaded
+    # predictor wins on very large batches when sklearn/xgboost are installed
+    key = (path, engine)
+    if key not in _models:
+        if engine == "compiled":
+            from relay_control.compiled_model import CompiledModel
+            _models[key] = CompiledModel.from_joblib(path)
+        elif engine == "xgboost":
+            import joblib
+            _models[key] = joblib.load(path)
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+    return _models[key]
+
+
+class Throughput:
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.seconds = 0.0  # Time spent inside model.predict only
+        self.wall_seconds = 0.0  # End to end, including reading and writing
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        text = f"{self.rows} rows in {self.batches} batches, {self.rows_per_second:,.0f} rows/s (model)"
+        if self.wall_seconds:
+            text += f", {self.rows / self.wall_seconds:,.0f} rows/s (end to end)"
+        return text
+
+
+def predict_batch(array, model=None, throughput=None):
+    # Score a (n_rows, 6) block of IR/IY/IB/VR/VY/VB; returns (n_rows, 8) L1-L8 labels
+    model = model if model is not None else load_model()
+    block = np.asarray(array, dtype=np.float32)
+    if block.ndim == 1:
+        block = block.reshape(1, -1)
+    start = time.perf_counter()
+    predictions = model.predict(block)
+    if throughput is not None:
+        throughput.seconds += time.perf_counter() - start
+        throughput.rows += len(block)
+        throughput.batches += 1
+    return predictions
+
+
+def predict_stream(iterable, batch_size=DEFAULT_BATCH_SIZE, model=None, throughput=None):
+    # Re-chunk rows/blocks from iterable into batch_size blocks and score each one
+    model = model if model is not None else load_model()
+    n_features = len(FEATURES)
+    buffer = None
+    filled = 0
+    for item in iterable:
+        block = np.asarray(item, dtype=np.float32)
+        if block.ndim == 1:
+            block = block.reshape(1, -1)
+        offset = 0
+        # Whole batches straight from the incoming block need no copy
+        while filled == 0 and len(block) - offset >= batch_size:
+            chunk = block[offset:offset + batch_size]
+            yield chunk, predict_batch(chunk, model, throughput)
+            offset += batch_size
+        while offset < len(block):
+            if buffer is None:
+                buffer = np.empty((batch_size, n_features), dtype=np.float32)
+            take = min(batch_size - filled, len(block) - offset)
+            buffer[filled:filled + take] = block[offset:offset + take]
+            filled += take
+            offset += take
+            if filled == batch_size:
+                yield buffer, predict_batch(buffer, model, throughput)
+                # The caller may still hold the yielded block, so start a fresh buffer
+                buffer = None
+                filled = 0
+    if filled:
+        yield buffer[:filled], predict_batch(buffer[:filled], model, throughput)
+
+
+def iter_csv(path, chunksize=DEFAULT_BATCH_SIZE):
+    # Yield float32 feature blocks from a CSV without loading the whole file
+    import pandas as pd
+    reader = pd.read_csv(path, usecols=FEATURES, dtype=np.float32, chunksize=chunksize)
+    for frame in reader:
+        yield frame[FEATURES].to_numpy()
+
+
+def iter_inputs(path, chunksize=DEFAULT_BATCH_SIZE):
+    # Feature blocks from a columnar directory, Parquet file or CSV
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        from relay_control.columnar import iter_dataset
+        for inputs, _ in iter_dataset(path, chunksize):
+            yield inputs
+    else:
+        yield from iter_csv(path, chunksize)
+
+
+def replay(path, output=None, batch_size=DEFAULT_BATCH_SIZE, model=None,
+           predictions_only=False):
+    # Replay a dataset through the model, optionally writing inputs + L1-L8 to output as CSV
+    throughput = Throughput()
+    columns = OUTPUTS if predictions_only else FEATURES + OUTPUTS
+    handle = open(output, "w", newline="") if output else None
+    start = time.perf_counter()
+    try:
+        if handle:
+            handle.write(",".join(columns) + "\n")
+        for inputs, predictions in predict_stream(iter_inputs(path, batch_size), batch_size,
+                                                  model, throughput):
+            if handle:
+                _write_rows(handle, inputs, predictions, predictions_only)
+    finally:
+        if handle:
+            handle.close()
+    throughput.wall_seconds = time.perf_counter() - start
+    return throughput
+
+
+def _write_rows(handle, inputs, predictions, predictions_only):
+    labels = predictions.astype(np.uint8)
+    if predictions_only:
+        np.savetxt(handle, labels, fmt="%d", delimiter=",")
+    else:
+        fmt = ["%.9g"] * inputs.shape[1] + ["%d"] * labels.shape[1]
+        np.savetxt(handle, np.hstack([inputs.astype(np.float64), labels]), fmt=fmt, delimiter=",")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a dataset through the relay model")
+    parser.add_argument("input", help="CSV with IR,IY,IB,VR,VY,VB columns, columnar directory or .parquet")
+    parser.add_argument("-o", "--output", help="write inputs and L1-L8 predictions here")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--predictions-only", action="store_true",
+                        help="write only the L1-L8 columns")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--engine", choices=["compiled", "xgboost"], default="compiled")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model, args.engine)
+    throughput = replay(args.input, args.output, args.batch_size, model, args.predictions_only)
+    print(throughput, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
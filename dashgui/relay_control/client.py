@@ -0,0 +1,225 @@
+"""Client side of the ``relay_control.daemon`` socket API.
+
+``RelayClient`` is a small blocking client: ``request(op, **fields)`` sends one
+request and returns the reply, buffering any subscription events that arrive
+in between; ``poll_events()`` collects events without blocking, so a Qt timer
+can drain it. ``RemoteController`` wraps it in the ``RelayController``
+interface, which lets the GUI run as a thin client of a daemon
+(``RELAY_DAEMON_SOCKET=/path/to.sock python main.py``). From a shell::
+
+    python -m relay_control.client status
+    python -m relay_control.client set_inputs 6 6 6 230 230 230
+    python -m relay_control.client set_mask 0b101
+    python -m relay_control.client watch
+"""
+import argparse
+import collections
+import json
+import socket
+
+import numpy as np
+
+from relay_control.controller import parse_inputs
+from relay_control.daemon import MAX_PREDICT_ROWS, default_socket_path
+from relay_control.instrumentation import make_metrics
+from relay_control.model_loader import StartupTimer
+
+
+class RelayClient:
+    def __init__(self, path=None, timeout=5.0):
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(self.path)
+        self.events = collections.deque()
+        self._buffer = b""
+        self._next_id = 0
+
+    def request(self, op, **fields):
+        # Send one request and wait for its reply; raises ValueError if the daemon reports an error
+        self._next_id += 1
+        self.sock.sendall(json.dumps(dict(fields, op=op, id=self._next_id)).encode() + b"\n")
+        while True:
+            message = self._read_message()
+            if "event" in message:
+                self.events.append(message)
+            elif message.get("id") == self._next_id:
+                break
+        if not message["ok"]:
+            raise ValueError(message["error"])
+        return message
+
+    def subscribe(self):
+        return self.request("subscribe")
+
+    def poll_events(self):
+        # Events received so far, without blocking
+        self.sock.setblocking(False)
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("Relay daemon closed the connection")
+                self._buffer += chunk
+        except BlockingIOError:
+            pass
+        finally:
+            self.sock.settimeout(self.timeout)
+        while b"\n" in self._buffer:
+            line, self._buffer = self._buffer.split(b"\n", 1)
+            self.events.append(json.loads(line))
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def _read_message(self):
+        while b"\n" not in self._buffer:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("Relay daemon closed the connection")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def close(self):
+        self.sock.close()
+
+
+class RemoteModel:
+    # model.predict over the socket, for code that expects a local model
+    def __init__(self, client):
+        self.client = client
+
+    def predict(self, X):
+        rows = np.asarray(X, dtype=np.float64).reshape(-1, 6).tolist()
+        predictions = []
+        for start in range(0, len(rows), MAX_PREDICT_ROWS):
+            predictions += self.client.request("predict", rows=rows[start:start + MAX_PREDICT_ROWS])["predictions"]
+        return np.array(predictions, dtype=np.int64)
+
+
+class RemoteController:
+    # Same interface as RelayController, served by a running daemon
+
+    def __init__(self, path=None, startup_timer=None):
+        self.client = RelayClient(path)
+        self.timer = startup_timer if startup_timer is not None else StartupTimer()
+        self.metrics = make_metrics()  # UI-side stages only; the daemon keeps its own
+        self.model = None
+        self.model_version = None
+        self.scheduler = None  # The daemon applies its own switching policy
+        self.last_inputs = None  # Inputs of the newest predict(), sent on by apply_prediction
+        self.load_phase = "Connecting to relay daemon"
+        self.load_progress = 0
+        self.load_error = None
+        self.relay_error = None
+        self.stream_error = None
+        self.streaming = False
+        self._prediction = None
+        self._mask = None
+
+    @property
+    def backend(self):
+        return "daemon"
+
+    def start(self):
+        self.client.subscribe()
+
+    def _status(self, status):
+        self.load_phase = status["phase"]
+        self.load_progress = status["progress"]
+        self.streaming = status["streaming"]
+        self.model_version = status.get("model_version")
+        if status["error"] is not None:
+            self.load_error = RuntimeError(status["error"])
+        if status["loaded"] and self.model is None:
+            self.model = RemoteModel(self.client)
+
+    def _drain(self):
+        for event in self.client.poll_events():
+            kind = event.get("event")
+            if kind == "status":
+                self._status(event)
+            elif kind == "relays":
+                self._mask = event["mask"]
+            elif kind == "prediction" and event["source"] == "stream":
+                self._prediction = (event["inputs"], event["prediction"])
+
+    def poll_model(self):
+        if self.model is None and self.load_error is None:
+            self._status(self.client.request("status"))
+        return self.model is not None or self.load_error is not None
+
+    def predict(self, values):
+        # Score only; apply_prediction hands the same inputs to the daemon to act on
+        inputs = parse_inputs(values)
+        prediction = self.client.request("predict", rows=[inputs])["predictions"][0]
+        self.last_inputs = inputs
+        return prediction
+
+    def apply_prediction(self, prediction, inputs=None):
+        # The daemon scores the inputs again and runs them through its own
+        # apply_prediction: switching policy, event log and last_inputs
+        inputs = self.last_inputs if inputs is None else inputs
+        if inputs is None:
+            raise ValueError("apply_prediction needs the inputs behind the prediction")
+        return self.client.request("set_inputs", inputs=inputs)["sequence"]
+
+    def set_mask(self, mask):
+        return self.client.request("set_mask", mask=mask)["sequence"]
+
+    def set_relay(self, index, state):
+        return self.client.request("set_relay", index=index, state=bool(state))["sequence"]
+
+    def poll_relays(self):
+        self._drain()
+        mask, self._mask = self._mask, None
+        return mask
+
+    def start_stream(self):
+        self.streaming = self.client.request("start_stream")["streaming"]
+
+    def stop_stream(self):
+        self.streaming = self.client.request("stop_stream")["streaming"]
+
+    def poll_stream(self):
+        self._drain()
+        latest, self._prediction = self._prediction, None
+        return latest
+
+    def shutdown(self):
+        # The daemon keeps running (and keeps the relays where they are)
+        self.client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Talk to a running relay daemon")
+    parser.add_argument("op", choices=["status", "set_inputs", "get_prediction", "set_mask", "set_relay",
+                                       "get_mask", "start_stream", "stop_stream", "stats", "watch"])
+    parser.add_argument("values", nargs="*", help="set_inputs: IR IY IB VR VY VB; set_mask: MASK; "
+                                                   "set_relay: INDEX 0|1")
+    parser.add_argument("--socket", default=None)
+    args = parser.parse_args(argv)
+
+    client = RelayClient(args.socket)
+    if args.op == "watch":
+        client.subscribe()
+        client.sock.settimeout(None)
+        while True:
+            print(json.dumps(client._read_message()), flush=True)
+    fields = {}
+    if args.op == "set_inputs":
+        fields["inputs"] = parse_inputs(args.values)
+    elif args.op == "set_mask":
+        fields["mask"] = int(args.values[0], 0)
+    elif args.op == "set_relay":
+        fields["index"], fields["state"] = int(args.values[0]), args.values[1] not in ("0", "off", "false")
+    reply = client.request(args.op, **fields)
+    reply.pop("id", None)
+    reply.pop("ok", None)
+    print(json.dumps(reply, indent=2))
+
+
+if __name__ == "__main__":
+    main()
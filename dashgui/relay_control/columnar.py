@@ -0,0 +1,222 @@
+"""Typed columnar storage for training and replay data.
+
+A columnar dataset is a directory with one ``.npy`` file per input column
+(IR..VB as float32), a ``labels.npy`` uint8 column where bit i holds L(i+1),
+and a small ``header.json``. Every column is memory-mapped on open, so reading
+a slice touches only those bytes and nothing is parsed. Parquet (via the
+optional pyarrow dependency) uses the same schema for exchange with other
+tools::
+
+    python -m relay_control.columnar convert high_quality_synthetic_data.csv data.cols
+    python -m relay_control.columnar info data.cols
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from relay_control import FEATURES, OUTPUTS
+
+FORMAT_VERSION = 1
+HEADER_NAME = "header.json"
+LABELS_NAME = "labels"
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def pack_labels(labels):
+    # (n, 8) 0/1 -> (n,) uint8 with bit i = L(i+1)
+    return np.packbits(np.asarray(labels, dtype=np.uint8), axis=1, bitorder="little")[:, 0]
+
+
+def unpack_labels(mask, count=len(OUTPUTS)):
+    return np.unpackbits(np.asarray(mask, dtype=np.uint8)[:, None], axis=1, bitorder="little")[:, :count]
+
+
+class ColumnarWriter:
+    # Fills preallocated memory-mapped columns; the row count must be known up front
+
+    def __init__(self, path, rows, features=FEATURES):
+        self.path = path
+        self.rows = rows
+        self.features = list(features)
+        self.position = 0
+        os.makedirs(path, exist_ok=True)
+        open_memmap = np.lib.format.open_memmap
+        self.columns = [open_memmap(os.path.join(path, f"{name}.npy"), mode="w+",
+                                    dtype=np.float32, shape=(rows,))
+                        for name in self.features]
+        self.labels = open_memmap(os.path.join(path, f"{LABELS_NAME}.npy"), mode="w+",
+                                  dtype=np.uint8, shape=(rows,))
+
+    def write(self, inputs, labels):
+        # inputs: (n, len(features)); labels: (n, 8) 0/1 or (n,) packed mask
+        inputs = np.asarray(inputs)
+        labels = np.asarray(labels)
+        end = self.position + len(inputs)
+        if end > self.rows:
+            raise ValueError(f"Writing past the {self.rows} rows reserved in {self.path}")
+        for i, column in enumerate(self.columns):
+            column[self.position:end] = inputs[:, i]
+        self.labels[self.position:end] = labels if labels.ndim == 1 else pack_labels(labels)
+        self.position = end
+
+    def close(self):
+        if self.position != self.rows:
+            raise ValueError(f"Only {self.position} of {self.rows} rows were written to {self.path}")
+        for column in self.columns + [self.labels]:
+            column.flush()
+        header = {
+            "format_version": FORMAT_VERSION,
+            "rows": self.rows,
+            "features": self.features,
+            "outputs": OUTPUTS,
+            "labels": "uint8 bitmask, bit i = outputs[i]",
+        }
+        with open(os.path.join(self.path, HEADER_NAME), "w") as handle:
+            json.dump(header, handle, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+
+
+class ColumnarDataset:
+    def __init__(self, path):
+        with open(os.path.join(path, HEADER_NAME)) as handle:
+            header = json.load(handle)
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar dataset version: {header.get('format_version')}")
+        self.path = path
+        self.rows = header["rows"]
+        self.features = header["features"]
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                        for name in self.features}
+        self.label_mask = np.load(os.path.join(path, f"{LABELS_NAME}.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self.rows
+
+    def inputs(self, start=0, stop=None):
+        # Row-major float32 block of the feature columns (this slice is copied)
+        return np.column_stack([self.columns[name][start:stop] for name in self.features])
+
+    def labels(self, start=0, stop=None):
+        return unpack_labels(self.label_mask[start:stop])
+
+    def iter_chunks(self, chunksize=DEFAULT_CHUNK_SIZE):
+        for start in range(0, self.rows, chunksize):
+            yield self.inputs(start, start + chunksize), self.labels(start, start + chunksize)
+
+
+def open_columnar(path):
+    return ColumnarDataset(path)
+
+
+def count_csv_rows(path):
+    # Data rows in a CSV with a header line, counted without parsing
+    with open(path, "rb") as handle:
+        lines = sum(block.count(b"\n") for block in iter(lambda: handle.read(1 << 20), b""))
+        if handle.tell() == 0:
+            return 0  # Empty file: no header, no rows
+        handle.seek(-1, os.SEEK_END)
+        if handle.read(1) != b"\n":
+            lines += 1
+    return lines - 1
+
+
+def iter_csv_chunks(path, chunksize=DEFAULT_CHUNK_SIZE):
+    # Yield (inputs float32, labels uint8) blocks from a dataset CSV
+    import pandas as pd
+    dtypes = dict({name: np.float32 for name in FEATURES}, **{name: np.uint8 for name in OUTPUTS})
+    for frame in pd.read_csv(path, usecols=FEATURES + OUTPUTS, dtype=dtypes, chunksize=chunksize):
+        yield frame[FEATURES].to_numpy(), frame[OUTPUTS].to_numpy()
+
+
+def convert_csv(csv_path, out_path, chunksize=DEFAULT_CHUNK_SIZE):
+    with ColumnarWriter(out_path, count_csv_rows(csv_path)) as writer:
+        for inputs, labels in iter_csv_chunks(csv_path, chunksize):
+            writer.write(inputs, labels)
+    return writer.rows
+
+
+def write_parquet(path, chunks):
+    # Stream (inputs, labels) chunks into a Parquet file, one row group per chunk
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+    schema = pa.schema([(name, pa.float32()) for name in FEATURES] + [(LABELS_NAME, pa.uint8())])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for inputs, labels in chunks:
+            inputs = np.asarray(inputs, dtype=np.float32)
+            labels = np.asarray(labels)
+            mask = labels if labels.ndim == 1 else pack_labels(labels)
+            arrays = [pa.array(inputs[:, i]) for i in range(len(FEATURES))] + [pa.array(mask)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(inputs)
+    return rows
+
+
+def iter_parquet_chunks(path, chunksize=DEFAULT_CHUNK_SIZE):
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        inputs = np.column_stack([batch.column(name).to_numpy() for name in FEATURES])
+        yield inputs, unpack_labels(batch.column(LABELS_NAME).to_numpy())
+
+
+def dataset_rows(path):
+    # Row count of a columnar directory, Parquet file or CSV without loading it
+    if os.path.isdir(path):
+        return open_columnar(path).rows
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    return count_csv_rows(path)
+
+
+def iter_dataset(path, chunksize=DEFAULT_CHUNK_SIZE):
+    # (inputs, labels) chunks from a columnar directory, Parquet file or CSV
+    if os.path.isdir(path):
+        return open_columnar(path).iter_chunks(chunksize)
+    if path.endswith(".parquet"):
+        return iter_parquet_chunks(path, chunksize)
+    return iter_csv_chunks(path, chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert or inspect columnar relay datasets")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert = subparsers.add_parser("convert", help="CSV -> columnar directory or .parquet")
+    convert.add_argument("csv")
+    convert.add_argument("output")
+    convert.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    info = subparsers.add_parser("info", help="print row count and label balance")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        if args.output.endswith(".parquet"):
+            rows = write_parquet(args.output, iter_csv_chunks(args.csv, args.chunk_size))
+        else:
+            rows = convert_csv(args.csv, args.output, args.chunk_size)
+        print(f"Converted {rows} rows to {args.output}")
+        return
+
+    rows = 0
+    positives = np.zeros(len(OUTPUTS), dtype=np.int64)
+    for _, labels in iter_dataset(args.path):
+        rows += len(labels)
+        positives += labels.sum(axis=0, dtype=np.int64)
+    print(f"{rows} rows")
+    for name, count in zip(OUTPUTS, positives):
+        print(f"  {name}: {count / max(rows, 1):.3f} on")
+
+
+if __name__ == "__main__":
+    main()
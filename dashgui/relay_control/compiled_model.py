@@ -0,0 +1,203 @@
+"""Flat, NumPy-backed version of the MultiOutputClassifier/XGBoost relay model.
+
+The stock model scores a sample by dispatching to 8 separate XGBoost boosters,
+each of which builds a DMatrix first. ``CompiledModel`` pulls every tree out of
+those boosters once at load time and stores them as a handful of flat arrays,
+so all 8 relay outputs are scored together in one vectorized pass. The split
+tests, float32 accumulation order and sigmoid follow XGBoost's CPU predictor so
+the labels match ``model.predict`` exactly.
+"""
+import json
+
+import numpy as np
+
+_ROWS_PER_PASS = 256
+
+
+class CompiledModel:
+    def __init__(self, feature, threshold, left, default_left, value,
+                 roots, base_margin, classes, max_depth, feature_names=None):
+        # Node arrays are shared by every tree. A split node's children sit next to
+        # each other (right == left + 1); leaves point back at themselves, have a NaN
+        # threshold (x >= NaN is false even for x = inf) and default left, so every
+        # step keeps them in place
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        is_leaf = self.left == np.arange(len(self.left))
+        if not np.isnan(self.threshold[is_leaf]).all():
+            # Exported before leaves held NaN: an inf input would step off the leaf
+            self.threshold = np.where(is_leaf, np.float32(np.nan), self.threshold)
+            self.default_left = self.default_left | is_leaf
+        self.value = np.asarray(value, dtype=np.float32)
+        # roots[output, round] is the index of that tree's root node
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.base_margin = np.asarray(base_margin, dtype=np.float32)
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_outputs, self.n_rounds = self.roots.shape
+        self._flat_roots = self.roots.ravel()
+
+    @classmethod
+    def from_joblib(cls, path):
+        import joblib  # Only needed when compiling from the pickled model
+        return cls.from_estimator(joblib.load(path))
+
+    @classmethod
+    def from_estimator(cls, model):
+        # Accept either the MultiOutputClassifier or a single XGBClassifier
+        estimators = getattr(model, "estimators_", None) or [model]
+
+        feature, threshold, left, default_left, value = [], [], [], [], []
+        per_output_roots, base_margin, classes = [], [], []
+        max_depth = 0
+        feature_names = None
+
+        for estimator in estimators:
+            booster = estimator.get_booster()
+            if feature_names is None:
+                feature_names = booster.feature_names
+            dump = json.loads(booster.save_raw("json"))
+            learner = dump["learner"]
+            if learner["objective"]["name"] != "binary:logistic":
+                raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+
+            trees = learner["gradient_booster"]["model"]["trees"]
+            best_iteration = getattr(estimator, "best_iteration", None)
+            if best_iteration is not None:
+                trees = trees[:best_iteration + 1]
+
+            roots = []
+            for tree in trees:
+                if any(tree["split_type"]):
+                    raise ValueError("Categorical splits are not supported")
+                roots.append(_append_tree(tree, feature, threshold, left, default_left, value))
+                max_depth = max(max_depth, _tree_depth(tree["left_children"], tree["right_children"]))
+            per_output_roots.append(roots)
+
+            # base_score is stored as a probability; XGBoost starts from its logit
+            base_score = np.float32(learner["learner_model_param"]["base_score"].strip("[]"))
+            base_margin.append(-np.log(np.float32(1.0) / base_score - np.float32(1.0)))
+            classes.append(np.asarray(getattr(estimator, "classes_", [0, 1])))
+
+        # Pad outputs with fewer rounds using a shared zero leaf; adding 0.0 is exact
+        n_rounds = max(len(roots) for roots in per_output_roots)
+        if any(len(roots) < n_rounds for roots in per_output_roots):
+            zero_leaf = len(feature)
+            feature.append(0)
+            threshold.append(np.nan)
+            left.append(zero_leaf)
+            default_left.append(True)
+            value.append(0.0)
+            per_output_roots = [roots + [zero_leaf] * (n_rounds - len(roots))
+                                for roots in per_output_roots]
+
+        return cls(feature, threshold, left, default_left, value,
+                   per_output_roots, base_margin, np.stack(classes), max_depth,
+                   feature_names)
+
+    def _as_matrix(self, X):
+        with np.errstate(over="ignore"):  # Values past float32 range become +-inf, as in XGBoost
+            X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X
+
+    def leaf_values(self, X):
+        # Leaf weight reached in every tree: (n_samples, n_outputs, n_rounds)
+        X = self._as_matrix(X)
+        has_missing = np.isnan(X).any()
+        leaves = np.empty((X.shape[0], self.n_outputs, self.n_rounds), dtype=np.float32)
+        for start in range(0, X.shape[0], _ROWS_PER_PASS):
+            leaves[start:start + _ROWS_PER_PASS] = self._walk(X[start:start + _ROWS_PER_PASS], has_missing)
+        return leaves
+
+    def predict_margin(self, X):
+        X = self._as_matrix(X)
+        has_missing = np.isnan(X).any()
+        margin = np.empty((X.shape[0], self.n_outputs), dtype=np.float32)
+        # Work through the rows in slices so the (rows x trees) index stays in cache
+        # and memory stays flat however large the batch is
+        for start in range(0, X.shape[0], _ROWS_PER_PASS):
+            leaves = self._walk(X[start:start + _ROWS_PER_PASS], has_missing)
+            # Start from the base margin, then cumsum adds tree by tree in float32, the
+            # same order XGBoost accumulates in (np.sum would sum pairwise and drift)
+            leaves[:, :, 0] += self.base_margin
+            np.cumsum(leaves, axis=2, out=leaves)
+            margin[start:start + len(leaves)] = leaves[:, :, -1]
+        return margin
+
+    def _walk(self, block, has_missing):
+        # Walk every tree for every row of block at once
+        flat = block.ravel()
+        row_offsets = (np.arange(len(block)) * block.shape[1])[:, None]
+        idx = np.broadcast_to(self._flat_roots, (len(block), self._flat_roots.size)).copy()
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[idx]]
+            go_right = x >= self.threshold[idx]
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.default_left[idx], go_right)
+            idx = self.left[idx] + go_right
+        return self.value[idx].reshape(len(block), self.n_outputs, self.n_rounds)
+
+    def predict_proba(self, X):
+        # Probability of the positive class for each output, (n_samples, n_outputs)
+        margin = self.predict_margin(X)
+        return np.float32(1.0) / (np.float32(1.0) + np.exp(-margin))
+
+    def predict(self, X):
+        positive = (self.predict_proba(X) > 0.5).astype(np.intp)
+        return self.classes[np.arange(self.n_outputs), positive]
+
+
+def _append_tree(tree, feature, threshold, left, default_left, value):
+    # Lay the tree out breadth first so that each split's children are adjacent;
+    # returns the global index of its root
+    lefts, rights = tree["left_children"], tree["right_children"]
+    root = len(feature)
+    slots = {0: root}
+    order = [0]
+    _grow(len(feature) + 1, feature, threshold, left, default_left, value)
+    next_free = root + 1
+    for node in order:
+        slot = slots[node]
+        if lefts[node] == -1:
+            # Leaf: split_conditions holds the (already scaled) leaf weight
+            left[slot] = slot
+            threshold[slot] = np.nan
+            value[slot] = tree["split_conditions"][node]
+            continue
+        feature[slot] = tree["split_indices"][node]
+        threshold[slot] = tree["split_conditions"][node]
+        default_left[slot] = bool(tree["default_left"][node])
+        left[slot] = next_free
+        slots[lefts[node]] = next_free
+        slots[rights[node]] = next_free + 1
+        order.extend([lefts[node], rights[node]])
+        next_free += 2
+        _grow(next_free, feature, threshold, left, default_left, value)
+    return root
+
+
+def _grow(size, feature, threshold, left, default_left, value):
+    while len(feature) < size:
+        feature.append(0)
+        threshold.append(0.0)
+        left.append(0)
+        default_left.append(True)
+        value.append(0.0)
+
+
+def _tree_depth(left_children, right_children):
+    depth = 0
+    stack = [(0, 0)]
+    while stack:
+        node, level = stack.pop()
+        if left_children[node] == -1:
+            depth = max(depth, level)
+        else:
+            stack.append((left_children[node], level + 1))
+            stack.append((right_children[node], level + 1))
+    return depth
@@ -0,0 +1,223 @@
+"""Controller core shared by ``main.py``, ``mainpi.py`` and ``testuipyqt.py``.
+
+``RelayController`` owns everything that is not drawing: the background model
+load and the predictor built from it (rules/shadow mode, prediction cache), the
+relay bank with its actuator thread and the switching policy in front of it
+(see ``relay_control.scheduler``), a watcher that hot-swaps a retrained model
+(see ``relay_control.hot_reload``), and the input pipeline (parsing typed
+inputs and the streaming sample -> predict -> relay loop, fed by a serial or
+Modbus meter when ``RELAY_METER`` is set, see ``relay_control.meter``). The
+front ends create one controller and poll it from Qt timers::
+
+    controller = RelayController(relay_backend("gpiozero"))
+    controller.start()
+    ...
+    if controller.poll_model(): ...       # from the load timer
+    sample, prediction = controller.poll_stream() or (None, None)
+    mask = controller.poll_relays()       # newest committed relay mask, or None
+
+The relay backend is one of ``RELAY_BACKENDS`` (``RELAY_BACKEND`` at startup).
+Importing this module never imports Qt, and gpiozero is only imported when the
+gpiozero backend is chosen.
+"""
+from relay_control import ARTIFACT_PATH, FEATURES, MODEL_PATH
+from relay_control.event_log import open_event_log
+from relay_control.hot_reload import ModelReloader, SwappableModel, model_reload
+from relay_control.instrumentation import make_metrics
+from relay_control.meter import meter_source_factory
+from relay_control.model_loader import ModelLoader
+from relay_control.prediction_cache import cache_predictions
+from relay_control.relay_bank import RelayBank, make_pins, mask_from_states
+from relay_control.relay_worker import RelayWorker
+from relay_control.rules import make_predictor, prediction_mode
+from relay_control.scheduler import switch_scheduler
+from relay_control.streaming import CsvReplaySource, StreamingPredictor
+
+STREAM_RATE_HZ = 100  # Samples per second read by the streaming loop
+
+# Input labels used by the desktop/Pi windows, in FEATURES order
+INPUT_LABELS = dict(zip(["Ir", "Iv", "Ib", "Va", "Vb", "Vc"], FEATURES))
+
+
+def parse_inputs(values):
+    # Six numbers in FEATURES order from a sequence, or a mapping keyed by
+    # FEATURES or INPUT_LABELS (e.g. QLineEdit texts); raises ValueError
+    if hasattr(values, "items"):
+        values = {INPUT_LABELS.get(key, key): value for key, value in values.items()}
+        missing = [name for name in FEATURES if name not in values]
+        if missing:
+            raise ValueError(f"Missing inputs: {', '.join(missing)}")
+        values = [values[name] for name in FEATURES]
+    values = [float(str(value).strip()) for value in values]
+    if len(values) != len(FEATURES):
+        raise ValueError(f"Expected {len(FEATURES)} inputs, got {len(values)}")
+    return values
+
+
+def relay_states(prediction, count=8):
+    # Model output (label row, single 0/1 value or mask) -> list of 0/1 per relay
+    if isinstance(prediction, int):
+        return [(prediction >> i) & 1 for i in range(count)]
+    try:
+        states = [int(value) for value in prediction]
+    except TypeError:
+        return [int(prediction)] * count  # One value for every relay
+    return (states + [0] * count)[:count]
+
+
+class RelayController:
+    def __init__(self, backend="simulated", model_path=MODEL_PATH, artifact=ARTIFACT_PATH,
+                 startup_timer=None, metrics=None, source_factory=None,
+                 rate_hz=STREAM_RATE_HZ, event_log=None):
+        self.backend = backend
+        self.metrics = make_metrics() if metrics is None else metrics
+        self._build_relays(event_log)
+        self.last_inputs = None  # Newest scored inputs, logged alongside manual commands
+        self.last_predicted = 0  # Mask of the newest prediction
+        self.loader = ModelLoader(model_path, startup_timer, artifact)
+        self.model = None
+        self.reloader = None
+        # RELAY_METER=/dev/tty... reads a real meter; the CSV replay stands in for one otherwise
+        self.source_factory = source_factory or meter_source_factory(CsvReplaySource)
+        self.rate_hz = rate_hz
+        self.stream = None
+        self._stream_sequence = 0
+
+    def _build_relays(self, event_log):
+        self.bank = RelayBank(make_pins(self.backend), metrics=self.metrics)
+        # RELAY_EVENT_LOG=dir records every relay command for later analysis
+        self.event_log = open_event_log() if event_log is None else event_log
+        self.relays = RelayWorker(self.bank, metrics=self.metrics, log=self.event_log)
+        # Every command passes the switching policy (RELAY_MIN_ON, RELAY_CONFIRM, ...); manual ones bypass it
+        self.scheduler = switch_scheduler(self.relays.apply, self.bank.size)
+
+    def start(self):
+        # Begin the background model load and the relay actuator and scheduler threads
+        self.relays.start()
+        self.scheduler.start()
+        self.loader.start()
+
+    # Model runtime
+
+    @property
+    def timer(self):
+        return self.loader.timer
+
+    @property
+    def load_phase(self):
+        return self.loader.phase
+
+    @property
+    def load_progress(self):
+        return self.loader.progress
+
+    @property
+    def load_error(self):
+        return self.loader.error
+
+    def poll_model(self):
+        # True once loading has finished (check load_error); builds the predictor on first success
+        if not self.loader.done:
+            return False
+        if self.model is None and self.loader.error is None:
+            # The stream and UI score through the proxy, so a reloaded model replaces it in place
+            self.model = SwappableModel(self._build_predictor(self.loader.model), self.loader.version)
+            if model_reload():
+                self.reloader = ModelReloader(self.model, self._build_predictor, self.loader.path,
+                                              self.loader.artifact, metrics=self.metrics)
+                self.reloader.start()
+        return True
+
+    def _build_predictor(self, model):
+        # RELAY_PREDICTION_MODE=rules|shadow swaps in the threshold-rule fast path
+        return cache_predictions(make_predictor(prediction_mode(), model), self.loader.path, self.loader.artifact)
+
+    @property
+    def model_version(self):
+        return self.model.version if self.model is not None else None
+
+    def predict(self, values):
+        # Parse one set of typed inputs and score it; returns the L1-L8 label row
+        start = self.metrics.clock()
+        inputs = parse_inputs(values)
+        self.metrics.record("read_inputs", start)
+        start = self.metrics.clock()
+        prediction = self.model.predict([inputs])[0]
+        self.metrics.record("predict", start)
+        self.last_inputs = inputs
+        return prediction
+
+    # Relays
+
+    def apply_prediction(self, prediction, inputs=None):
+        # Queue the relay states for a prediction of inputs (default: the last
+        # predict() call); returns the command sequence number
+        states = relay_states(prediction, self.bank.size)
+        self.last_predicted = mask_from_states(states)
+        if inputs is not None:
+            self.last_inputs = inputs
+        return self.scheduler.propose(states, (self.last_inputs, self.last_predicted, "model"))
+
+    def set_mask(self, mask):
+        # Queue a full bank state as an 8-bit mask (bit i = relay i+1)
+        if not 0 <= mask < 1 << self.bank.size:
+            raise ValueError(f"Relay mask must be between 0 and {(1 << self.bank.size) - 1}, got {mask}")
+        return self.scheduler.override(mask, (self.last_inputs, self.last_predicted, "manual"))
+
+    def set_relay(self, index, state):
+        if not 0 <= index < self.bank.size:
+            raise ValueError(f"Relay index must be between 0 and {self.bank.size - 1}, got {index}")
+        return self.scheduler.set_relay(index, state, (self.last_inputs, self.last_predicted, "manual"))
+
+    def poll_relays(self):
+        # Newest committed relay mask since the last poll, or None
+        acks = self.relays.take_acks()
+        return acks[-1][1] if acks else None
+
+    @property
+    def relay_error(self):
+        return self.relays.error
+
+    # Streaming input pipeline
+
+    @property
+    def streaming(self):
+        return self.stream is not None and self.stream.running
+
+    @property
+    def stream_error(self):
+        return self.stream.error if self.stream is not None else None
+
+    def start_stream(self):
+        # Predictions drive the relays straight from the inference thread
+        self.stream = StreamingPredictor(self.model, self.source_factory(), rate_hz=self.rate_hz,
+                                         on_prediction=self._on_stream_prediction, metrics=self.metrics)
+        self._stream_sequence = 0
+        self.stream.start()
+
+    def _on_stream_prediction(self, sample, prediction):
+        self.apply_prediction(prediction, sample)
+
+    def stop_stream(self):
+        if self.stream is not None:
+            self.stream.stop()
+
+    def poll_stream(self):
+        # (sample, prediction) of the newest streamed result not yet seen, or None
+        if self.stream is None:
+            return None
+        latest = self.stream.latest()
+        if latest is None or latest[0] == self._stream_sequence:
+            return None
+        self._stream_sequence, sample, prediction = latest
+        return sample, prediction
+
+    def shutdown(self):
+        # Stop streaming, then drive every relay off once the actuator has finished
+        if self.reloader is not None:
+            self.reloader.stop()
+        self.stop_stream()
+        self.scheduler.stop()
+        self.relays.shutdown()
+        if self.event_log is not None:
+            self.event_log.close()
@@ -0,0 +1,287 @@
+"""Headless relay service: the prediction/relay loop without Qt.
+
+The daemon runs one ``RelayController`` and serves it to any number of local
+clients over a Unix-domain socket. The protocol is newline-delimited JSON: each
+request is an object with an ``op`` (and an optional ``id`` that is echoed
+back); each reply has ``ok`` plus the op's fields, or ``error``. After a
+``subscribe`` the connection also receives ``{"event": ...}`` lines whenever the
+relay mask or the newest prediction changes.
+
+=============  ===========================================  ===========================
+op             request fields                               reply fields
+=============  ===========================================  ===========================
+status         -                                            phase, progress, loaded, ...
+set_inputs     inputs (6 values, or a FEATURES mapping)     prediction, sequence
+predict        rows (up to MAX_PREDICT_ROWS 6-value rows)   predictions
+get_prediction -                                            inputs, prediction, source
+set_mask       mask (int, bit i = relay i+1)                sequence
+set_relay      index (0-7), state                           sequence
+get_mask       -                                            mask, states
+start_stream   -                                            streaming
+stop_stream    -                                            streaming
+stats          -                                            metrics, relays, stream
+subscribe      -                                            (then event lines)
+=============  ===========================================  ===========================
+
+``set_inputs`` scores the inputs and drives the relays, like the GUI's Predict
+button. ``predict`` only scores: it runs on a worker thread so a large batch
+does not hold up other clients or the stream, and a windowed model scores the
+rows as a stream of their own instead of pushing them through its live window.
+Run it with::
+
+    python -m relay_control.daemon --backend gpiozero --stream
+    python -m relay_control.client get_mask
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import tempfile
+
+import numpy as np
+
+from relay_control import FEATURES
+from relay_control.controller import RelayController
+from relay_control.features import stateless_predict
+from relay_control.relay_bank import RELAY_BACKENDS, relay_backend, states_from_mask
+
+POLL_INTERVAL = 0.02  # Seconds between checks for new predictions and relay acks
+MAX_PREDICT_ROWS = 4096  # Rows per predict request
+REQUEST_LIMIT = 1 << 20  # Longest request line in bytes; fits MAX_PREDICT_ROWS rows of JSON floats
+SUBSCRIBER_QUEUE = 256  # Events buffered per slow client before the oldest are dropped
+
+
+def default_socket_path():
+    # RELAY_DAEMON_SOCKET, else a per-user runtime directory
+    return os.environ.get("RELAY_DAEMON_SOCKET") or os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "relay-control.sock")
+
+
+def clear_stale_socket(path):
+    # Remove a socket left over from a previous run; raises ValueError if a
+    # daemon is still answering on it, or if path is not a socket
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)  # Nobody listening: the previous daemon died without cleaning up
+        return
+    finally:
+        probe.close()
+    raise ValueError(f"A relay daemon is already serving {path}")
+
+
+def _plain(value):
+    # NumPy labels/samples -> JSON-friendly lists of ints/floats
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class RelayService:
+    def __init__(self, controller, path=None):
+        self.controller = controller
+        self.path = path or default_socket_path()
+        self.subscribers = set()
+        self.last = {"inputs": None, "prediction": None, "source": None}
+        self.mask = controller.bank.mask
+        self.server = None
+        self.clients = 0
+
+    async def serve(self, stream=False):
+        clear_stale_socket(self.path)
+        self.controller.start()
+        self.server = await asyncio.start_unix_server(self._handle, path=self.path, limit=REQUEST_LIMIT)
+        poller = asyncio.create_task(self._poll(stream))
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            poller.cancel()
+            self.controller.shutdown()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    async def _poll(self, stream):
+        # Publish model readiness and swaps, streamed predictions and committed relay masks
+        controller = self.controller
+        loaded = False
+        version = None
+        while True:
+            if not loaded and controller.poll_model():
+                loaded = True
+                version = controller.model_version
+                self._publish({"event": "status", **self.status()})
+                if stream and controller.load_error is None:
+                    controller.start_stream()
+            elif loaded and controller.model_version != version:
+                version = controller.model_version  # A retrained model was hot-swapped in
+                self._publish({"event": "status", **self.status()})
+            latest = controller.poll_stream()
+            if latest is not None:
+                self._record(latest[0], latest[1], "stream")
+            mask = controller.poll_relays()
+            if mask is not None and mask != self.mask:
+                self.mask = mask
+                self._publish({"event": "relays", "mask": mask})
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _record(self, inputs, prediction, source):
+        self.last = {"inputs": _plain(inputs), "prediction": _plain(prediction), "source": source}
+        self._publish({"event": "prediction", **self.last})
+
+    def _publish(self, event):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()  # Slow client: keep the newest events
+            queue.put_nowait(event)
+
+    def status(self):
+        controller = self.controller
+        return {
+            "phase": controller.load_phase,
+            "progress": controller.load_progress,
+            "loaded": controller.model is not None,
+            "model_version": controller.model_version,
+            "error": str(controller.load_error) if controller.load_error is not None else None,
+            "backend": controller.backend,
+            "streaming": controller.streaming,
+            "mask": self.mask,
+            "clients": self.clients,
+        }
+
+    async def _handle(self, reader, writer):
+        self.clients += 1
+        events = None
+        sender = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = {"ok": True, **(await self.dispatch(request))}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                if reply["ok"] and request.get("op") == "subscribe" and events is None:
+                    events = asyncio.Queue(SUBSCRIBER_QUEUE)
+                    self.subscribers.add(events)
+                    sender = asyncio.create_task(self._send_events(events, writer))
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            pass  # A request line longer than REQUEST_LIMIT; drop the client
+        except asyncio.CancelledError:
+            pass  # Shutting down with the client still connected
+        finally:
+            self.clients -= 1
+            if events is not None:
+                self.subscribers.discard(events)
+                sender.cancel()
+            writer.close()
+
+    async def _send_events(self, events, writer):
+        try:
+            while True:
+                event = await events.get()
+                writer.write(json.dumps(event).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        controller = self.controller
+        if op == "status" or op == "subscribe":
+            return self.status()
+        if op in ("set_inputs", "predict", "start_stream") and controller.model is None:
+            raise ValueError(f"Model not loaded yet ({controller.load_phase})")
+        if op == "set_inputs":
+            prediction = controller.predict(request["inputs"])
+            sequence = controller.apply_prediction(prediction)
+            self._record(_plain(request["inputs"]), prediction, "inputs")
+            return {"prediction": _plain(prediction), "sequence": sequence}
+        if op == "predict":
+            rows = np.asarray(request["rows"], dtype=np.float64)
+            if rows.ndim != 2 or rows.shape[1] != len(FEATURES):
+                raise ValueError(f"rows must be N x {len(FEATURES)}")
+            if len(rows) > MAX_PREDICT_ROWS:
+                raise ValueError(f"At most {MAX_PREDICT_ROWS} rows per predict request")
+            loop = asyncio.get_running_loop()
+            predictions = await loop.run_in_executor(None, stateless_predict, controller.model, rows)
+            return {"predictions": _plain(predictions)}
+        if op == "get_prediction":
+            return dict(self.last)
+        if op == "set_mask":
+            return {"sequence": controller.set_mask(int(request["mask"]))}
+        if op == "set_relay":
+            return {"sequence": controller.set_relay(int(request["index"]), bool(request["state"]))}
+        if op == "get_mask":
+            mask = controller.bank.mask
+            return {"mask": mask, "states": states_from_mask(mask, controller.bank.size)}
+        if op == "start_stream":
+            if not controller.streaming:
+                controller.start_stream()
+            return {"streaming": True}
+        if op == "stop_stream":
+            controller.stop_stream()
+            return {"streaming": False}
+        if op == "stats":
+            return {
+                "metrics": controller.metrics.summary(),
+                "relays": controller.relays.stats(),
+                "stream": controller.stream.stats() if controller.stream is not None else None,
+            }
+        raise ValueError(f"Unknown op: {op}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the relay prediction loop headless behind a Unix socket")
+    parser.add_argument("--socket", default=None, help="socket path (default: RELAY_DAEMON_SOCKET or "
+                                                       "$XDG_RUNTIME_DIR/relay-control.sock)")
+    parser.add_argument("--backend", choices=RELAY_BACKENDS, default=relay_backend("simulated"))
+    parser.add_argument("--stream", action="store_true", help="start the CSV replay loop once the model loads")
+    args = parser.parse_args(argv)
+
+    service = RelayService(RelayController(args.backend), args.socket)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, service.close)
+        print(f"Serving relay control on {service.path} ({args.backend} relays)", flush=True)
+        try:
+            await service.serve(args.stream)
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        clear_stale_socket(service.path)  # serve() checks too; this fails before the model starts loading
+    except ValueError as e:
+        raise SystemExit(str(e))
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
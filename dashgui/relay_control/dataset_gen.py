@@ -1,47 +1,198 @@
+"""Chunked synthetic dataset generator for the relay model.
+
+Rows are produced in fixed-size chunks, so memory stays bounded however many
+rows are requested. Chunk ``k`` always draws from its own RNG stream derived
+from ``(seed, k)``, so the output is identical whether it is generated by one
+process or split across many::
+
+    python dataset_gen.py --rows 100000000 --profile mixed --workers 4 -o big.csv
+    python dataset_gen.py --rows 100000000 --format npy -o big.cols
+
+Each phase gets its own current and voltage signal. Scenario profiles layer
+phase imbalance, voltage sags, load surges and single-phase faults on top of
+the baseline ranges. The L1-L8 labels apply the original threshold rules to
+the three-phase mean current and voltage and the mean per-phase power (for
+balanced phases this is exactly the old single-phase rule).
+"""
+import argparse
+import os
+import sys
+
 import numpy as np
-import pandas as pd
-
-# Set random seed for reproducibility
-np.random.seed(42)
-
-# Generate synthetic data with more realistic ranges and noise
-current_values = np.random.uniform(0, 10, 500) + np.random.normal(0, 0.1, 500)  # Adding noise to currents
-voltage_values = np.random.uniform(220, 230, 500) + np.random.normal(0, 0.5, 500)  # Adding noise to voltages
-
-# Double the data points for balanced classes
-currents = np.concatenate((current_values, current_values))
-voltages = np.concatenate((voltage_values, voltage_values))
-
-# Create additional features (e.g., power)
-power_values = currents * voltages  # Simulating power as V * I
-
-data = {
-    'IR': currents,
-    'IY': currents,
-    'IB': currents,
-    'VR': voltages,
-    'VY': voltages,
-    'VB': voltages,
-    'Power': power_values
+
+# Make the relay_control package importable when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from relay_control import FEATURES, OUTPUTS
+from relay_control.rules import POWER_RULES, RulesEngine
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+DEFAULT_OUTPUT = "high_quality_synthetic_data_v2.csv"
+
+_rules = RulesEngine(POWER_RULES)
+
+# Scenario knobs; probabilities are per row
+BASELINE = {
+    "current_range": (0.0, 10.0),
+    "current_noise": 0.1,
+    "voltage_range": (220.0, 230.0),
+    "voltage_noise": 0.5,
+    "current_imbalance": 0.0,  # std of each phase's fractional deviation from the row's load
+    "voltage_imbalance": 0.0,  # std of each phase's deviation from the row's voltage (V)
+    "sag_probability": 0.0,
+    "sag_depth": (0.05, 0.2),  # fraction of voltage lost on all phases
+    "surge_probability": 0.0,
+    "surge_factor": (1.5, 3.0),  # multiplier on all phase currents
+    "fault_probability": 0.0,
+    "fault_current_factor": (3.0, 8.0),  # on the faulted phase
+    "fault_voltage_factor": (0.3, 0.8),  # on the faulted phase
+}
+
+PROFILES = {
+    # Independent per-phase noise only, same ranges as the original dataset
+    "balanced": dict(BASELINE, current_imbalance=0.02, voltage_imbalance=0.3),
+    "imbalance": dict(BASELINE, current_imbalance=0.25, voltage_imbalance=3.0),
+    "sags": dict(BASELINE, current_imbalance=0.02, voltage_imbalance=0.3, sag_probability=0.2),
+    "surges": dict(BASELINE, current_imbalance=0.02, voltage_imbalance=0.3, surge_probability=0.2),
+    "faults": dict(BASELINE, current_imbalance=0.05, voltage_imbalance=0.5, fault_probability=0.1),
+    "mixed": dict(BASELINE, current_imbalance=0.1, voltage_imbalance=1.0, sag_probability=0.05,
+                  surge_probability=0.05, fault_probability=0.02),
 }
 
-# More complex relay logic with different conditions
-data['L1'] = ((currents > 5) & (voltages > 226) & (power_values > 1200)).astype(int)
-data['L2'] = ((currents <= 5) & (voltages <= 224) & (power_values <= 1100)).astype(int)
-data['L3'] = ((currents > 5) | (voltages > 225) | (power_values > 1150)).astype(int)
-data['L4'] = ((currents <= 5) & (voltages > 225) & (power_values < 1000)).astype(int)
-data['L5'] = ((currents > 5) & (voltages <= 225) & (power_values > 1250)).astype(int)
-data['L6'] = ((currents <= 5) | (voltages <= 225) | (power_values < 1050)).astype(int)
-data['L7'] = ((currents > 6) & (voltages > 227) & (power_values > 1300)).astype(int)
-data['L8'] = ((currents <= 4) & (voltages <= 223) & (power_values < 950)).astype(int)
 
-# Convert to DataFrame
-df = pd.DataFrame(data)
+def relay_labels(current, voltage, power):
+    # The L1-L8 threshold rules (relay_control.rules.POWER_RULES); returns an (n, 8) uint8 array
+    return _rules.evaluate_quantities(np.column_stack([current, voltage, power])).astype(np.uint8)
+
+
+def chunk_rng(seed, chunk_index):
+    # Independent, reproducible stream per chunk regardless of which process draws it
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+
+def generate_chunk(rng, rows, profile, load=None, voltage=None):
+    # Returns (inputs (rows, 6) float64 in FEATURES order, labels (rows, 8) uint8).
+    # load/voltage: per-row level to use instead of a uniform draw (e.g. a daily curve)
+    p = profile
+    load = rng.uniform(*p["current_range"], rows) if load is None else np.asarray(load, dtype=np.float64)
+    voltage = rng.uniform(*p["voltage_range"], rows) if voltage is None else np.asarray(voltage, dtype=np.float64)
+
+    currents = load[:, None] * (1 + rng.normal(0, p["current_imbalance"], (rows, 3)))
+    currents += rng.normal(0, p["current_noise"], (rows, 3))
+    voltages = voltage[:, None] + rng.normal(0, p["voltage_imbalance"], (rows, 3))
+    voltages += rng.normal(0, p["voltage_noise"], (rows, 3))
+
+    if p["sag_probability"]:
+        sag = rng.random(rows) < p["sag_probability"]
+        voltages[sag] *= 1 - rng.uniform(*p["sag_depth"], sag.sum())[:, None]
+    if p["surge_probability"]:
+        surge = rng.random(rows) < p["surge_probability"]
+        currents[surge] *= rng.uniform(*p["surge_factor"], surge.sum())[:, None]
+    if p["fault_probability"]:
+        fault_rows = np.flatnonzero(rng.random(rows) < p["fault_probability"])
+        phase = rng.integers(0, 3, fault_rows.size)
+        currents[fault_rows, phase] *= rng.uniform(*p["fault_current_factor"], fault_rows.size)
+        voltages[fault_rows, phase] *= rng.uniform(*p["fault_voltage_factor"], fault_rows.size)
+
+    current = currents.mean(axis=1)
+    voltage = voltages.mean(axis=1)
+    power = (currents * voltages).mean(axis=1)
+    return np.hstack([currents, voltages]), relay_labels(current, voltage, power)
+
+
+def chunk_sizes(rows, chunk_size):
+    full, rest = divmod(rows, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def generate(rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=42, profile="balanced"):
+    # Yield (inputs, labels) chunk by chunk
+    params = PROFILES[profile] if isinstance(profile, str) else profile
+    for index, size in enumerate(chunk_sizes(rows, chunk_size)):
+        yield generate_chunk(chunk_rng(seed, index), size, params)
+
+
+def format_csv(inputs, labels):
+    # Render a chunk as CSV text (no header)
+    import pandas as pd
+    frame = pd.DataFrame(inputs, columns=FEATURES)
+    for i, name in enumerate(OUTPUTS):
+        frame[name] = labels[:, i]
+    return frame.to_csv(header=False, index=False, float_format="%.6f", lineterminator="\n")
+
+
+def _chunk_jobs(rows, chunk_size, seed, profile):
+    return [(seed, index, size, profile) for index, size in enumerate(chunk_sizes(rows, chunk_size))]
+
+
+def _array_chunk(job):
+    # Worker entry point: build one chunk
+    seed, index, size, profile = job
+    return generate_chunk(chunk_rng(seed, index), size, PROFILES[profile])
+
+
+def _csv_chunk(job):
+    return format_csv(*_array_chunk(job))
+
+
+def _run_jobs(function, jobs, workers):
+    # Yield function(job) in job order, optionally spread over worker processes
+    if workers <= 1:
+        for job in jobs:
+            yield function(job)
+        return
+    from multiprocessing import Pool
+    with Pool(workers) as pool:
+        # Submit a bounded window of chunks at a time so results never pile up
+        window = workers * 2
+        for start in range(0, len(jobs), window):
+            yield from pool.imap(function, jobs[start:start + window])
+
+
+def write_csv(handle, rows, chunk_size, seed, profile, workers=1):
+    handle.write(",".join(FEATURES + OUTPUTS) + "\n")
+    for text in _run_jobs(_csv_chunk, _chunk_jobs(rows, chunk_size, seed, profile), workers):
+        handle.write(text)
+
+
+def write_npy(path, rows, chunk_size, seed, profile, workers=1):
+    from relay_control.columnar import ColumnarWriter
+    with ColumnarWriter(path, rows) as writer:
+        for inputs, labels in _run_jobs(_array_chunk, _chunk_jobs(rows, chunk_size, seed, profile), workers):
+            writer.write(inputs, labels)
+
+
+def write_parquet(path, rows, chunk_size, seed, profile, workers=1):
+    from relay_control import columnar
+    columnar.write_parquet(path, _run_jobs(_array_chunk, _chunk_jobs(rows, chunk_size, seed, profile), workers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic relay training data")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="output file (directory for npy), or - for CSV on stdout")
+    parser.add_argument("--format", choices=["csv", "npy", "parquet"], default="csv",
+                        help="npy writes a memory-mappable columnar directory")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="balanced")
+    parser.add_argument("--workers", type=int, default=1, help="generator processes")
+    args = parser.parse_args(argv)
 
-# Shuffle the data for better randomness
-df = df.sample(frac=1).reset_index(drop=True)
+    options = (args.rows, args.chunk_size, args.seed, args.profile, args.workers)
+    if args.output == "-":
+        write_csv(sys.stdout, *options)
+        return
+    if args.format == "npy":
+        write_npy(args.output, *options)
+    elif args.format == "parquet":
+        write_parquet(args.output, *options)
+    else:
+        with open(args.output, "w", newline="") as handle:
+            write_csv(handle, *options)
+    print(f"Generated {args.rows} rows ({args.profile} profile) and saved as '{os.path.abspath(args.output)}'",
+          file=sys.stderr)
 
-# Save to CSV
-df.to_csv('high_quality_synthetic_data_v2.csv', index=False)
 
-print("Improved high-quality dataset created and saved as 'high_quality_synthetic_data_v2.csv'")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Append-only binary log of predictions and relay transitions.
+
+Every relay command is written as one fixed-size little-endian record::
+
+    time <f8 (Unix seconds) | inputs <f4 x6 (FEATURES) | predicted u1 | applied u1 | source u1 | pad
+
+``predicted`` is the L1-L8 mask the model asked for most recently (bit i =
+L(i+1)), ``applied`` the relay mask committed to the pins for that command and
+``source`` an index into ``SOURCES``. Manual commands carry the newest inputs
+the controller has seen (NaN if none yet).
+
+Records go into a preallocated NumPy buffer and reach the file in one write
+when it fills or ``flush_interval`` seconds have passed. A directory holds
+numbered segments (``events-000001.bin``...), each starting with a 16-byte
+header; the writer starts a new one past ``max_bytes``. ``fsync`` chooses the
+durability: ``none`` leaves it to the OS, ``flush`` syncs after every buffered
+write, ``always`` writes and syncs every record. ``EventLogReader``
+memory-maps the segments and answers time-range queries with a binary search,
+and exports to the dataset CSV schema for retraining. Logging is on when
+``RELAY_EVENT_LOG`` names a directory::
+
+    RELAY_EVENT_LOG=/var/log/relay RELAY_EVENT_LOG_FSYNC=flush python main.py
+    python -m relay_control.event_log info /var/log/relay
+    python -m relay_control.event_log query /var/log/relay --start 2026-10-18T09:00 --stop 2026-10-18T09:05
+    python -m relay_control.event_log export /var/log/relay retrain.csv
+"""
+import argparse
+import datetime
+import glob
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from relay_control import FEATURES, OUTPUTS
+from relay_control.columnar import unpack_labels
+
+SOURCES = ["model", "manual"]
+FSYNC_POLICIES = ["none", "flush", "always"]
+EVENT_DTYPE = np.dtype([("time", "<f8"), ("inputs", "<f4", (len(FEATURES),)), ("predicted", "u1"),
+                        ("applied", "u1"), ("source", "u1"), ("pad", "u1")])
+MAGIC = b"RLYEVT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<6sHHxxxxxx")  # magic, version, record size; 16 bytes
+SEGMENT_PATTERN = "events-*.bin"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_BUFFER_RECORDS = 1024
+DEFAULT_FLUSH_INTERVAL = 1.0  # Seconds a record may sit in the buffer
+
+
+def segment_path(directory, number):
+    return os.path.join(directory, f"events-{number:06d}.bin")
+
+
+def segment_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+class EventLog:
+    # Thread-safe; the relay actuator thread appends, the UI thread may flush/close
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, fsync="flush",
+                 buffer_records=DEFAULT_BUFFER_RECORDS, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync} (expected one of {FSYNC_POLICIES})")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.buffer = np.zeros(1 if fsync == "always" else buffer_records, dtype=EVENT_DTYPE)
+        self.buffered = 0
+        self._oldest = None  # Monotonic time the first buffered record was added
+        self._lock = threading.Lock()
+        existing = segment_paths(directory)
+        # Never append to an old segment: a crash may have left a torn record at its end
+        self._number = int(os.path.basename(existing[-1])[7:13]) if existing else 0
+        self._handle = None
+        self._size = 0
+
+        self.records = 0
+        self.writes = 0
+        self.syncs = 0
+        self.rotations = 0
+
+    def _open_segment(self):
+        self._number += 1
+        self._handle = open(segment_path(self.directory, self._number), "xb")
+        self._handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, EVENT_DTYPE.itemsize))
+        self._size = HEADER.size
+
+    def append(self, timestamp, inputs, predicted, applied, source):
+        # inputs: 6 values or None; source: a SOURCES name
+        with self._lock:
+            record = self.buffer[self.buffered]
+            record["time"] = timestamp
+            record["inputs"] = np.nan if inputs is None else inputs
+            record["predicted"] = predicted
+            record["applied"] = applied
+            record["source"] = SOURCES.index(source)
+            self.buffered += 1
+            self.records += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if (self.buffered == len(self.buffer)
+                    or time.monotonic() - self._oldest >= self.flush_interval):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffered:
+            return
+        if self._handle is None or self._size >= self.max_bytes:
+            if self._handle is not None:
+                self._handle.close()
+                self.rotations += 1
+            self._open_segment()
+        data = self.buffer[:self.buffered]
+        self._handle.write(data.data)
+        self._handle.flush()
+        self._size += data.nbytes
+        self.writes += 1
+        if self.fsync != "none":
+            os.fsync(self._handle.fileno())
+            self.syncs += 1
+        self.buffered = 0
+        self._oldest = None
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def stats(self):
+        return {"records": self.records, "buffered": self.buffered, "writes": self.writes,
+                "syncs": self.syncs, "rotations": self.rotations, "segment": self._number}
+
+
+def open_event_log(name=None):
+    # EventLog in RELAY_EVENT_LOG, or its subdirectory name (fsync policy from
+    # RELAY_EVENT_LOG_FSYNC), or None
+    directory = os.environ.get("RELAY_EVENT_LOG")
+    if not directory:
+        return None
+    if name is not None:
+        directory = os.path.join(directory, name)
+    return EventLog(directory, fsync=os.environ.get("RELAY_EVENT_LOG_FSYNC", "flush"))
+
+
+class EventLogReader:
+    def __init__(self, directory):
+        self.directory = directory
+        self.segments = []  # (path, memory-mapped records)
+        for path in segment_paths(directory):
+            records = self._map(path)
+            if records is not None:
+                self.segments.append((path, records))
+
+    @staticmethod
+    def _map(path):
+        size = os.path.getsize(path)
+        if size < HEADER.size:
+            return None
+        with open(path, "rb") as handle:
+            magic, version, record_size = HEADER.unpack(handle.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != EVENT_DTYPE.itemsize:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} relay event log segment")
+        count = (size - HEADER.size) // EVENT_DTYPE.itemsize  # Ignore a torn trailing record
+        if count == 0:
+            return None
+        return np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+
+    def __len__(self):
+        return sum(len(records) for _, records in self.segments)
+
+    def query(self, start=None, stop=None):
+        # Records with start <= time < stop (Unix seconds), as one array in log order.
+        # Assumes the wall clock did not step backwards while logging.
+        start = -np.inf if start is None else start
+        stop = np.inf if stop is None else stop
+        parts = []
+        for _, records in self.segments:
+            if records["time"][-1] < start or records["time"][0] >= stop:
+                continue
+            times = records["time"]
+            first, last = np.searchsorted(times, [start, stop])
+            parts.append(records[first:last])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=EVENT_DTYPE)
+
+    def export_csv(self, path, start=None, stop=None, labels="applied"):
+        # Dataset CSV (FEATURES + OUTPUTS) of the records with inputs; labels="applied" or "predicted"
+        import pandas as pd
+        records = self.query(start, stop)
+        records = records[np.isfinite(records["inputs"]).all(axis=1)]
+        frame = pd.DataFrame(records["inputs"].astype(np.float64), columns=FEATURES)
+        frame[OUTPUTS] = unpack_labels(records[labels])
+        frame.to_csv(path, index=False)
+        return len(frame)
+
+
+def parse_time(text):
+    # Unix seconds or an ISO 8601 date/time (local time unless it has an offset)
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, query or export a relay event log")
+    parser.add_argument("command", choices=["info", "query", "export"])
+    parser.add_argument("directory")
+    parser.add_argument("output", nargs="?", help="export: CSV path")
+    parser.add_argument("--start", help="Unix seconds or ISO 8601")
+    parser.add_argument("--stop", help="Unix seconds or ISO 8601")
+    parser.add_argument("--labels", choices=["applied", "predicted"], default="applied")
+    args = parser.parse_args(argv)
+
+    reader = EventLogReader(args.directory)
+    start, stop = parse_time(args.start), parse_time(args.stop)
+    if args.command == "info":
+        print(f"{len(reader)} records in {len(reader.segments)} segments")
+        for path, records in reader.segments:
+            first, last = (datetime.datetime.fromtimestamp(records["time"][i]).isoformat() for i in (0, -1))
+            print(f"  {os.path.basename(path)}: {len(records)} records, {first} .. {last}")
+    elif args.command == "query":
+        for record in reader.query(start, stop):
+            when = datetime.datetime.fromtimestamp(record["time"]).isoformat(timespec="milliseconds")
+            inputs = " ".join(f"{value:.2f}" for value in record["inputs"])
+            print(f"{when} {SOURCES[record['source']]:6} inputs=[{inputs}] "
+                  f"predicted={record['predicted']:08b} applied={record['applied']:08b}")
+    else:
+        if args.output is None:
+            parser.error("export needs an output CSV path")
+        rows = reader.export_csv(args.output, start, stop, args.labels)
+        print(f"Exported {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
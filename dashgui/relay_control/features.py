@@ -0,0 +1,223 @@
+"""Sliding-window features over the last ``window`` samples, updated in O(1).
+
+For each sample the stage keeps 15 tracked quantities in a ring buffer:
+the six readings, their squares, and the per-phase instantaneous power I*V.
+It also keeps a running sum of each, which is updated by adding the new
+sample and subtracting the one that leaves the window. From these it reports
+``WINDOW_FEATURES``:
+
+* mean, RMS and rate of change (per sample, oldest to newest in the window)
+  of IR..VB
+* mean power per phase (PR, PY, PB) and their total
+* current and voltage imbalance: the largest deviation of a phase's mean from
+  the three-phase mean, as a fraction of it
+
+``update(sample)`` serves the streaming runtime one sample at a time.
+``transform(rows)`` serves training, whole chunks at a time, and carries on
+from the same state. It accumulates the same differences with ``np.cumsum``
+and derives the features with the same floating-point operations, so a sample
+gets bit-identical features whichever way it arrives. ``WindowedModel`` uses
+the one that suits each call, so training and runtime share this module.
+
+A model trained on these features lists them as feature names with the window
+size as a suffix (``IR_rms_w32``). ``ModelLoader`` uses that to wrap such a
+model in ``WindowedModel``, which still takes raw IR..VB rows::
+
+    python -m relay_control.train data.cols --window 32 -o windowed.joblib
+    python -m relay_control.features --window 32 --rows 5
+"""
+import argparse
+import math
+import re
+import threading
+
+import numpy as np
+
+from relay_control import FEATURES
+
+DEFAULT_WINDOW = 32
+PHASES = [name[1:] for name in FEATURES[:3]]  # R, Y, B
+WINDOW_FEATURES = ([f"{name}_mean" for name in FEATURES] + [f"{name}_rms" for name in FEATURES]
+                   + [f"{name}_roc" for name in FEATURES] + [f"P{phase}" for phase in PHASES]
+                   + ["P_total", "I_imbalance", "V_imbalance"])
+_WINDOW_SUFFIX = re.compile(r"_w(\d+)$")
+
+
+def window_feature_names(window):
+    # Model input columns: the raw readings, then the windowed features tagged with the window size
+    return FEATURES + [f"{name}_w{window}" for name in WINDOW_FEATURES]
+
+
+def feature_window(names):
+    # Window size encoded in a model's feature names, or None for a plain IR..VB model
+    if not names or list(names[:len(FEATURES)]) != FEATURES or len(names) == len(FEATURES):
+        return None
+    match = _WINDOW_SUFFIX.search(names[len(FEATURES)])
+    if match is None or list(names) != window_feature_names(int(match.group(1))):
+        raise ValueError(f"Unrecognised model features: {list(names)}")
+    return int(match.group(1))
+
+
+def _quantities(rows):
+    # (n, 6) readings -> (n, 15) tracked per-sample quantities in float64
+    rows = np.asarray(rows, dtype=np.float64)
+    return np.hstack([rows, rows * rows, rows[:, :3] * rows[:, 3:6]])
+
+
+def _imbalance(means):
+    average = (means[:, 0] + means[:, 1] + means[:, 2]) / 3
+    spread = np.abs(means - average[:, None]).max(axis=1)
+    return np.divide(spread, np.abs(average), out=np.zeros_like(spread), where=average != 0)
+
+
+def _scalar_imbalance(means):
+    # _imbalance for one sample's three phase means
+    average = (means[0] + means[1] + means[2]) / 3
+    spread = max(abs(mean - average) for mean in means)
+    return spread / abs(average) if average != 0 else 0.0
+
+
+def _derive(rows, sums, counts, oldest):
+    # Windowed features from running sums; every argument has one row per sample
+    counts = counts[:, None]
+    means = sums[:, :6] / counts
+    rms = np.sqrt(np.maximum(sums[:, 6:12] / counts, 0.0))
+    steps = np.maximum(counts - 1, 1)
+    roc = np.where(counts > 1, (rows - oldest) / steps, 0.0)
+    power = sums[:, 12:15] / counts
+    total = power[:, 0] + power[:, 1] + power[:, 2]
+    return np.hstack([rows, means, rms, roc, power, total[:, None],
+                      _imbalance(means[:, :3])[:, None], _imbalance(means[:, 3:6])[:, None]]).astype(np.float32)
+
+
+class WindowedFeatures:
+    def __init__(self, window=DEFAULT_WINDOW):
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        self.window = window
+        self.names = window_feature_names(window)
+        self.reset()
+
+    def reset(self):
+        # Empty slots hold zeros, so leaving the window subtracts nothing until it fills
+        self.ring = np.zeros((self.window, 15), dtype=np.float64)
+        self.sums = np.zeros(15, dtype=np.float64)
+        self.position = 0  # Next slot to overwrite; the ring is oldest-first from here
+        self.seen = 0
+
+    def update(self, sample):
+        # Features for one (6,) sample, advancing the window. Plain floats avoid
+        # NumPy's per-call overhead on 1-row arrays; each value goes through the
+        # same IEEE operations as _derive, so the results are bit-identical
+        x = [float(value) for value in sample]
+        quantities = x + [value * value for value in x] + [x[0] * x[3], x[1] * x[4], x[2] * x[5]]
+        leaving = self.ring[self.position].tolist()
+        sums = [total + (new - old) for total, new, old in zip(self.sums.tolist(), quantities, leaving)]
+        self.sums[:] = sums
+        self.ring[self.position] = quantities
+        self.position = (self.position + 1) % self.window
+        self.seen += 1
+        count = float(min(self.seen, self.window))
+        oldest = self.ring[(self.position - int(count)) % self.window, :6].tolist()
+
+        means = [total / count for total in sums[:6]]
+        rms = [math.sqrt(max(total / count, 0.0)) for total in sums[6:12]]
+        steps = max(count - 1, 1.0)
+        roc = [(new - old) / steps if count > 1 else 0.0 for new, old in zip(x, oldest)]
+        power = [total / count for total in sums[12:15]]
+        return np.array(x + means + rms + roc + power
+                        + [power[0] + power[1] + power[2], _scalar_imbalance(means[:3]),
+                           _scalar_imbalance(means[3:])], dtype=np.float32)
+
+    def transform(self, rows):
+        # Features for an (n, 6) block of consecutive samples, as n calls to update() would give
+        quantities = _quantities(np.reshape(rows, (-1, len(FEATURES))))
+        n = len(quantities)
+        if n == 0:
+            return np.zeros((0, len(self.names)), dtype=np.float32)
+        # Oldest-first history (zero-padded while filling) followed by the new samples
+        extended = np.vstack([np.roll(self.ring, -self.position, axis=0), quantities])
+        leaving = extended[:n]
+        sums = np.cumsum(np.vstack([self.sums[None], quantities - leaving]), axis=0)[1:]
+        counts = np.minimum(self.seen + 1 + np.arange(n), self.window).astype(np.float64)
+        # Sample j sits at extended[window + j]; its window holds the counts[j] rows up to it
+        oldest = extended[(self.window + 1 + np.arange(n) - counts).astype(np.intp), :6]
+        features = _derive(quantities[:, :6], sums, counts, oldest)
+
+        self.ring = extended[-self.window:].copy()
+        self.sums = sums[-1].copy()
+        self.position = 0
+        self.seen += n
+        return features
+
+
+class WindowedModel:
+    # Raw IR..VB rows in, windowed features into model; consecutive calls share one window
+
+    stateful = True  # Same inputs can predict differently, so results must not be cached
+
+    def __init__(self, model, window):
+        self.model = model
+        self.features = WindowedFeatures(window)
+        self._lock = threading.Lock()
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32).reshape(-1, len(FEATURES))
+        with self._lock:
+            if len(X) == 1:
+                features = self.features.update(X[0])[None]
+            else:
+                features = self.features.transform(X)
+        return self.model.predict(features)
+
+    def score(self, X):
+        # Score X as a stream of its own, leaving the live window untouched
+        X = np.asarray(X, dtype=np.float32).reshape(-1, len(FEATURES))
+        return self.model.predict(WindowedFeatures(self.features.window).transform(X))
+
+    def reset(self):
+        with self._lock:
+            self.features.reset()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def stateless_predict(model, X):
+    # model.predict(X) without advancing a windowed model's live window
+    if getattr(model, "stateful", False):
+        return model.score(X)
+    return model.predict(X)
+
+
+def model_feature_names(model):
+    names = getattr(model, "feature_names", None)
+    if names is None:
+        names = getattr(model, "feature_names_in_", None)
+    return list(names) if names is not None else None
+
+
+def windowed_model(model):
+    # Wrap model in WindowedModel if it was trained on windowed features
+    window = feature_window(model_feature_names(model))
+    return model if window is None else WindowedModel(model, window)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print windowed features for the start of the dataset")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--rows", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from relay_control.streaming import CsvReplaySource
+    rows = CsvReplaySource(loop=False).rows[:max(args.rows, args.window)]
+    features = WindowedFeatures(args.window).transform(rows)
+    names = window_feature_names(args.window)
+    for i in range(len(rows) - args.rows, len(rows)):
+        print(f"sample {i}:")
+        for name, value in zip(names, features[i]):
+            print(f"  {name:<16} {value:12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""Many feeders, one process: per-feeder relay banks scored together each tick.
+
+A feeder is one metered supply with its own 8-relay bank. The site layout comes
+from a JSON file named by ``RELAY_FEEDERS``::
+
+    {
+      "backend": "gpiozero",
+      "rate_hz": 10,
+      "workers": 0,
+      "feeders": [
+        {"name": "Pump house", "pins": [17, 27, 22, 10, 9, 11, 0, 5],
+         "meter": "/dev/ttyUSB0", "protocol": "modbus", "address": 1},
+        {"name": "Workshop", "pins": [6, 13, 19, 26, 12, 16, 20, 21]}
+      ]
+    }
+
+Feeders without a ``meter`` replay the bundled CSV, each from its own offset.
+``{"count": 16}`` instead of a list makes that many simulated feeders.
+
+Each tick, ``FeederGroup`` reads one sample per feeder into a preallocated
+(feeders, 6) matrix and scores it with one ``predict`` call. It then proposes
+each feeder's label row to that feeder's own switching policy (RELAY_MIN_ON,
+RELAY_CONFIRM, ..., see ``relay_control.scheduler``) and actuator thread, so
+pins are written off the tick thread and only when they change. With
+``RELAY_EVENT_LOG`` set, each feeder logs to its own ``feeder-NNN``
+subdirectory. With ``"workers": N`` the scoring is split over a
+``SharedModelPool`` of N processes. They read the compiled model's arrays and
+the sample matrix from ``multiprocessing.shared_memory`` and write labels back
+the same way, so nothing is pickled per tick. The workers keep the model they
+started with, so hot reload is off while a pool is in use.
+``RELAY_PREDICTION_MODE`` applies as in the single-bank app; in rules mode no
+pool is started. ``FeederController`` puts a group behind the
+``RelayController`` interface, with one selected feeder that the GUI pages
+through::
+
+    RELAY_FEEDERS=site.json python main.py
+    python -m relay_control.feeders --count 128 --seconds 5 --workers 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+from relay_control import ARTIFACT_PATH, DATASET_PATH, FEATURES, MODEL_PATH, OUTPUTS
+from relay_control.columnar import pack_labels
+from relay_control.controller import RelayController
+from relay_control.event_log import open_event_log
+from relay_control.instrumentation import NULL_METRICS, Histogram, make_metrics
+from relay_control.relay_bank import RELAY_PINS, RelayBank, make_pins, relay_backend
+from relay_control.relay_worker import RelayWorker
+from relay_control.rules import make_predictor, prediction_mode
+from relay_control.scheduler import switch_scheduler
+from relay_control.streaming import SampleSource
+
+DEFAULT_RATE_HZ = 10.0  # Ticks per second; every feeder is sampled once per tick
+_ALIGN = 64
+
+
+class ReplaySource(SampleSource):
+    # Loops over shared rows from its own starting row, so simulated feeders differ
+
+    def __init__(self, rows, start=0):
+        self.rows = rows
+        self.position = start % len(rows)
+
+    def read(self):
+        row = self.rows[self.position]
+        self.position = (self.position + 1) % len(self.rows)
+        return row
+
+
+class Feeder:
+    # One bank behind its own switching policy and actuator thread, like RelayController's
+
+    def __init__(self, name, bank, source, metrics=NULL_METRICS, event_log=None):
+        self.name = name
+        self.bank = bank
+        self.source = source
+        self.event_log = event_log
+        self.relays = RelayWorker(bank, metrics=metrics, log=event_log)
+        self.scheduler = switch_scheduler(self.relays.apply, bank.size)
+
+    def start(self):
+        self.relays.start()
+        self.scheduler.start()
+
+    def shutdown(self):
+        # Stop the policy first so nothing is queued after the actuator drives the relays off
+        self.scheduler.stop()
+        self.relays.shutdown()
+        self.source.close()
+        if self.event_log is not None:
+            self.event_log.close()
+
+
+def synthetic_config(count, backend="simulated"):
+    return {"backend": backend, "feeders": [{"name": f"Feeder {i + 1}"} for i in range(count)]}
+
+
+def load_config(path):
+    with open(path) as handle:
+        config = json.load(handle)
+    if "count" in config:
+        config = dict(synthetic_config(config["count"], config.get("backend", "simulated")), **{
+            key: value for key, value in config.items() if key != "count"})
+    if not config.get("feeders"):
+        raise ValueError(f"{path} lists no feeders")
+    return config
+
+
+def feeder_config():
+    # Config named by RELAY_FEEDERS, or None for the classic single bank
+    path = os.environ.get("RELAY_FEEDERS")
+    return load_config(path) if path else None
+
+
+def make_feeders(config, metrics=NULL_METRICS, dataset=DATASET_PATH):
+    backend = config.get("backend", relay_backend("simulated"))
+    replay_rows = None
+    feeders = []
+    for index, spec in enumerate(config["feeders"]):
+        pins = spec.get("pins", RELAY_PINS)
+        if len(pins) != len(OUTPUTS):
+            raise ValueError(f"Feeder {spec.get('name', index + 1)} needs {len(OUTPUTS)} pins, got {len(pins)}")
+        if "meter" in spec:
+            from relay_control.meter import MeterSource
+            source = MeterSource(spec["meter"], spec.get("protocol", "stream"), spec.get("baud", 115200),
+                                 spec.get("address", 1))
+        else:
+            if replay_rows is None:
+                import pandas as pd
+                replay_rows = pd.read_csv(dataset, usecols=FEATURES)[FEATURES].to_numpy(dtype=np.float32)
+            source = ReplaySource(replay_rows, index * 7919)  # A prime stride spreads the offsets
+        bank = RelayBank(make_pins(backend, pins), metrics=metrics)
+        feeders.append(Feeder(spec.get("name", f"Feeder {index + 1}"), bank, source, metrics,
+                              open_event_log(f"feeder-{index + 1:03d}")))
+    return feeders
+
+
+def _pool_worker(model_name, layout, max_depth, feature_names, io_name, max_rows, n_outputs, connection):
+    # Scores row ranges of the shared input matrix until told to stop
+    from multiprocessing import shared_memory
+    from relay_control.compiled_model import CompiledModel
+
+    # Spawned children share the parent's resource tracker, which unlinks the blocks if the parent dies
+    blocks = [shared_memory.SharedMemory(name=name) for name in (model_name, io_name)]
+    arrays = {name: np.ndarray(shape, dtype, buffer=blocks[0].buf, offset=offset)
+              for name, dtype, shape, offset in layout}
+    model = CompiledModel(arrays["feature"], arrays["threshold"], arrays["left"], arrays["default_left"],
+                          arrays["value"], arrays["roots"], arrays["base_margin"], arrays["classes"],
+                          max_depth, feature_names)
+    inputs, outputs = _io_views(blocks[1], max_rows, n_outputs)
+    try:
+        while True:
+            task = connection.recv()
+            if task is None:
+                break
+            start, stop = task
+            outputs[start:stop] = model.predict(inputs[start:stop])
+            connection.send(stop - start)
+    finally:
+        del arrays, model, inputs, outputs
+        for block in blocks:
+            block.close()
+
+
+def _io_views(block, max_rows, n_outputs):
+    inputs = np.ndarray((max_rows, len(FEATURES)), np.float32, buffer=block.buf)
+    outputs = np.ndarray((max_rows, n_outputs), np.int64, buffer=block.buf,
+                         offset=_aligned(inputs.nbytes))
+    return inputs, outputs
+
+
+def _aligned(size):
+    return -(-size // _ALIGN) * _ALIGN
+
+
+class SharedModelPool:
+    # Process pool scoring a CompiledModel held once in shared memory
+
+    def __init__(self, model, workers=2, max_rows=1024):
+        from multiprocessing import shared_memory
+        from relay_control.model_artifact import ARRAYS
+
+        if not hasattr(model, "roots"):
+            raise ValueError("SharedModelPool needs a CompiledModel (or a model artifact)")
+        self.workers = workers
+        self.max_rows = max_rows
+        self.n_outputs = model.n_outputs
+        arrays = [(name, np.ascontiguousarray(getattr(model, name))) for name in ARRAYS]
+        layout, size = [], 0
+        for name, array in arrays:
+            layout.append((name, array.dtype.str, array.shape, size))
+            size = _aligned(size + array.nbytes)
+        self._model_block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (name, array), (_, dtype, shape, offset) in zip(arrays, layout):
+            np.ndarray(shape, dtype, buffer=self._model_block.buf, offset=offset)[...] = array
+        io_size = _aligned(max_rows * len(FEATURES) * 4) + max_rows * self.n_outputs * 8
+        self._io_block = shared_memory.SharedMemory(create=True, size=io_size)
+        # Write samples straight into inputs to skip the copy in predict()
+        self.inputs, self.outputs = _io_views(self._io_block, max_rows, self.n_outputs)
+
+        context = multiprocessing.get_context("spawn")  # No forked copies of the UI's threads
+        self._connections = []
+        self._processes = []
+        for _ in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_pool_worker, name="relay-score", daemon=True,
+                args=(self._model_block.name, layout, model.max_depth, model.feature_names,
+                      self._io_block.name, max_rows, self.n_outputs, child))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self.calls = 0
+
+    def predict(self, X=None, rows=None):
+        # Score X, or the first rows already written to self.inputs; returns (rows, n_outputs)
+        if X is not None:
+            X = np.asarray(X, dtype=np.float32).reshape(-1, len(FEATURES))
+            rows = len(X)
+            if rows > self.max_rows:
+                raise ValueError(f"{rows} rows exceed the pool's {self.max_rows}-row buffer")
+            self.inputs[:rows] = X
+        bounds = np.linspace(0, rows, min(self.workers, rows) + 1).astype(int)
+        busy = []
+        for connection, start, stop in zip(self._connections, bounds[:-1], bounds[1:]):
+            connection.send((int(start), int(stop)))
+            busy.append(connection)
+        for connection in busy:
+            connection.recv()
+        self.calls += 1
+        return self.outputs[:rows].copy()
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(2.0)
+            if process.is_alive():
+                process.terminate()
+        self.inputs = self.outputs = None
+        for block in (self._model_block, self._io_block):
+            block.close()
+            block.unlink()
+        self._connections = self._processes = []
+
+
+class FeederGroup:
+    def __init__(self, feeders, model, rate_hz=DEFAULT_RATE_HZ, pool=None, metrics=NULL_METRICS):
+        if getattr(model, "stateful", False):
+            raise ValueError("Windowed-feature models keep a single window; feeders need a per-sample model")
+        self.feeders = feeders
+        self.model = model
+        self.pool = pool
+        self.rate_hz = float(rate_hz)
+        self.metrics = metrics
+        count = len(feeders)
+        self.samples = pool.inputs[:count] if pool is not None else np.zeros((count, len(FEATURES)), np.float32)
+        self.latency = Histogram()  # Seconds per tick: read, score and commit every feeder
+        self._lock = threading.Lock()
+        self._latest = None  # (tick, samples, labels)
+        self._stop = threading.Event()
+        self._thread = None
+        self._elapsed = 0.0  # Seconds spent running, for the rates in stats()
+        self._started = None
+        self.ticks = 0
+        self.error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def tick(self):
+        # One pass over every feeder; returns the (feeders, 8) labels
+        start = self.metrics.clock()
+        for i, feeder in enumerate(self.feeders):
+            self.samples[i] = feeder.source.read()
+        self.metrics.record("feeder_read", start)
+        start = self.metrics.clock()
+        if self.model is self.pool:  # The samples are already in the pool's input block
+            labels = self.pool.predict(rows=len(self.feeders))
+        else:
+            labels = np.asarray(self.model.predict(self.samples))
+        self.metrics.record("feeder_predict", start)
+        start = self.metrics.clock()
+        samples = self.samples.copy()  # The event log keeps each row; the matrix is reused
+        for feeder, sample, mask in zip(self.feeders, samples, pack_labels(labels).tolist()):
+            feeder.scheduler.propose(mask, (sample, mask, "model"))
+        self.metrics.record("feeder_apply", start)
+        self.ticks += 1
+        with self._lock:
+            self._latest = (self.ticks, samples, labels)
+        return labels
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="relay-feeders", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = 1.0 / self.rate_hz if self.rate_hz > 0 else 0.0
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                self.tick()
+            except Exception as e:
+                self.error = e
+                return
+            self.latency.add(time.perf_counter() - started)
+            if period:
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    deadline = time.perf_counter()  # Fell behind; don't burst to catch up
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            self._elapsed += time.perf_counter() - self._started
+
+    def stats(self):
+        elapsed = self._elapsed + (time.perf_counter() - self._started if self.running else 0.0)
+        return dict(self.latency.summary(), ticks=self.ticks, feeders=len(self.feeders),
+                    samples_per_second=self.ticks * len(self.feeders) / elapsed if elapsed else 0.0)
+
+    def close(self):
+        self.stop()
+        for feeder in self.feeders:
+            feeder.shutdown()
+        if self.pool is not None:
+            self.pool.close()
+
+
+class FeederController(RelayController):
+    # RelayController over a FeederGroup; bank, relays, scheduler, set_relay, predict and
+    # poll_* act on the selected feeder
+
+    def __init__(self, config, model_path=MODEL_PATH, artifact=ARTIFACT_PATH, startup_timer=None, metrics=None):
+        self.config = config
+        super().__init__(config.get("backend", relay_backend("simulated")), model_path, artifact,
+                         startup_timer, metrics, rate_hz=config.get("rate_hz", DEFAULT_RATE_HZ))
+        self.group = None
+        self.setup_error = None
+        self._tick = 0
+
+    def _build_relays(self, event_log):
+        # Each feeder brings its own bank, actuator, policy and event log; no shared ones
+        self.feeders = make_feeders(self.config, self.metrics)
+        self.select(0)
+
+    def feeder_name(self, index=None):
+        return self.feeders[self.selected if index is None else index].name
+
+    def select(self, index):
+        self.selected = index % len(self.feeders)
+        feeder = self.feeders[self.selected]
+        self.bank, self.relays, self.scheduler, self.event_log = \
+            feeder.bank, feeder.relays, feeder.scheduler, feeder.event_log
+        self._shown = None  # Report the new feeder's relays on the next poll
+
+    def start(self):
+        for feeder in self.feeders:
+            feeder.start()
+        self.loader.start()
+
+    @property
+    def load_error(self):
+        return self.loader.error or self.setup_error
+
+    def poll_model(self):
+        done = super().poll_model()
+        if done and self.model is not None and self.group is None and self.setup_error is None:
+            try:
+                workers = self.config.get("workers", 0)
+                mode = prediction_mode()
+                pool = None
+                scorer = self.model
+                if workers and mode != "rules":  # The rules engine has no model to share
+                    pool = SharedModelPool(self.loader.model, workers, len(self.feeders))
+                    if self.reloader is not None:
+                        self.reloader.stop()  # The workers keep the arrays they were given
+                        self.reloader = None
+                    scorer = make_predictor(mode, pool)
+                self.group = FeederGroup(self.feeders, scorer, self.rate_hz, pool, self.metrics)
+            except (ValueError, OSError) as e:
+                self.setup_error = e
+        return done
+
+    def poll_relays(self):
+        # The selected bank's mask, once per change or selection; acks are bounded per feeder
+        shown = (self.selected, self.bank.mask)
+        if shown == self._shown:
+            return None
+        self._shown = shown
+        return shown[1]
+
+    @property
+    def relay_error(self):
+        return next((feeder.relays.error for feeder in self.feeders if feeder.relays.error), None)
+
+    @property
+    def streaming(self):
+        return self.group is not None and self.group.running
+
+    @property
+    def stream_error(self):
+        return self.group.error if self.group is not None else None
+
+    def start_stream(self):
+        self._tick = 0
+        self.group.start()
+
+    def stop_stream(self):
+        if self.group is not None:
+            self.group.stop()
+
+    def poll_stream(self):
+        # The selected feeder's (sample, prediction) from the newest tick not seen yet
+        latest = self.group.latest() if self.group is not None else None
+        if latest is None or latest[0] == self._tick:
+            return None
+        self._tick, samples, labels = latest
+        return samples[self.selected], labels[self.selected]
+
+    def shutdown(self):
+        if self.reloader is not None:
+            self.reloader.stop()
+        if self.group is not None:
+            self.group.close()
+        else:
+            for feeder in self.feeders:
+                feeder.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the multi-feeder loop headless")
+    parser.add_argument("--config", help="feeder JSON (default: RELAY_FEEDERS, else --count simulated feeders)")
+    parser.add_argument("--count", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0.0, help="ticks per second (0 = as fast as possible)")
+    parser.add_argument("--workers", type=int, default=None, help="shared-memory scoring processes")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config) if args.config else feeder_config() or synthetic_config(args.count)
+    config["rate_hz"] = args.rate
+    if args.workers is not None:
+        config["workers"] = args.workers
+    controller = FeederController(config)
+    controller.start()
+    while not controller.poll_model():
+        time.sleep(0.05)
+    if controller.load_error is not None:
+        raise SystemExit(controller.load_phase)
+    controller.start_stream()
+    time.sleep(args.seconds)
+    controller.stop_stream()
+    stats = controller.group.stats()
+    print(f"{stats['feeders']} feeders, {stats['ticks']} ticks: {stats['samples_per_second']:,.0f} samples/s, "
+          f"tick p50 {stats['p50'] * 1e3:.2f} ms, p99 {stats['p99'] * 1e3:.2f} ms")
+    for feeder in controller.feeders[:4]:
+        print(f"  {feeder.name}: relays {feeder.bank.mask:08b}")
+    controller.shutdown()
+
+
+if __name__ == "__main__":
+    main()
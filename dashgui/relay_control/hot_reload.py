@@ -0,0 +1,215 @@
+"""Swap in a retrained model while the app keeps running.
+
+``ModelReloader`` polls the joblib model and the artifact header, the same
+files ``CachedPredictor`` watches. Once they change and then stay unchanged for
+``settle`` seconds (an export writes several files), it loads the new model
+on its own thread with ``ModelLoader``: the artifact first, falling back to
+joblib. It then checks the model on the first ``VALIDATION_ROWS`` rows of
+the dataset. The labels must be one 0/1 row of ``OUTPUTS`` per input row,
+and scoring them also warms the model up. The controller's predictor stack
+(rules/shadow mode, prediction cache) is rebuilt around the new model and
+published to ``SwappableModel`` with a single reference assignment.
+
+The streaming loop and the UI call through that proxy. A batch already being
+scored finishes on the old model and the next one uses the new model, so no
+sample is dropped or scored twice. A windowed model starts with an empty
+window. If a model fails to load or validate, the failure is reported and
+the old model keeps running.
+
+The swap itself (``model_swap``) and the time from the file change to the
+new model being live (``model_reload``) are recorded as pipeline stages.
+The version in use is the SHA-256 prefix of the joblib file it came from::
+
+    RELAY_MODEL_RELOAD=0 python main.py            # load once at startup, as before
+    python -m relay_control.hot_reload --seconds 60
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from relay_control import ARTIFACT_PATH, DATASET_PATH, FEATURES, MODEL_PATH, OUTPUTS
+from relay_control.instrumentation import NULL_METRICS
+from relay_control.model_loader import ModelLoader, StartupTimer
+from relay_control.prediction_cache import CHECK_INTERVAL, _file_signature, model_files
+
+SETTLE_SECONDS = 1.0  # Files must be unchanged this long before a reload starts
+VALIDATION_ROWS = 32
+
+
+def model_reload():
+    # On unless RELAY_MODEL_RELOAD=0
+    return os.environ.get("RELAY_MODEL_RELOAD", "1") != "0"
+
+
+class SwappableModel:
+    # Predictor proxy whose target is replaced atomically by swap()
+
+    def __init__(self, model, version=None):
+        self.current = (model, version)  # One tuple, so model and version always change together
+
+    @property
+    def model(self):
+        return self.current[0]
+
+    @property
+    def version(self):
+        return self.current[1]
+
+    @property
+    def stateful(self):
+        return getattr(self.current[0], "stateful", False)
+
+    def predict(self, X):
+        return self.current[0].predict(X)
+
+    def swap(self, model, version=None):
+        # Returns the (model, version) it replaced
+        previous, self.current = self.current, (model, version)
+        return previous
+
+    def __getattr__(self, name):
+        return getattr(self.current[0], name)
+
+
+def validation_rows(dataset=DATASET_PATH, count=VALIDATION_ROWS):
+    import pandas as pd
+    return pd.read_csv(dataset, usecols=FEATURES, nrows=count)[FEATURES].to_numpy(dtype=np.float32)
+
+
+def validate_model(model, rows):
+    # Raise ValueError unless model gives one 0/1 label per output for every row
+    labels = np.asarray(model.predict(rows))
+    if labels.shape != (len(rows), len(OUTPUTS)):
+        raise ValueError(f"Model returns shape {labels.shape}, expected {(len(rows), len(OUTPUTS))}")
+    if not np.isin(labels, (0, 1)).all():
+        raise ValueError("Model returns labels other than 0/1")
+    if getattr(model, "stateful", False):
+        model.reset()  # Keep the validation rows out of the window
+
+
+class ModelReloader:
+    def __init__(self, slot, build=None, model_path=MODEL_PATH, artifact=ARTIFACT_PATH,
+                 interval=CHECK_INTERVAL, settle=SETTLE_SECONDS, dataset=DATASET_PATH, metrics=NULL_METRICS):
+        self.slot = slot
+        self.build = build or (lambda model: model)  # Raw model -> the predictor to publish
+        self.model_path = model_path
+        self.artifact = artifact
+        self.interval = interval
+        self.settle = settle
+        self.dataset = dataset
+        self.metrics = metrics
+        self.paths = model_files(model_path, artifact)
+        self._signatures = self._read_signatures()  # Files behind the model in use
+        self._pending = None  # (signatures, perf_counter time first seen) of a change settling
+        self._rows = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.reloads = 0
+        self.failures = 0
+        self.error = None
+        self.swap_seconds = None
+        self.reload_seconds = None
+
+    def _read_signatures(self):
+        return [_file_signature(path) for path in self.paths]
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        # Reload if the model files changed and have settled; True if a new model went live
+        signatures = self._read_signatures()
+        if signatures == self._signatures:
+            self._pending = None
+            return False
+        now = time.perf_counter()
+        if self._pending is None or self._pending[0] != signatures:
+            self._pending = (signatures, now)
+            return False
+        if now - self._pending[1] < self.settle:
+            return False
+        changed_at = self._pending[1]
+        self._signatures, self._pending = signatures, None  # A bad model is not retried until it changes again
+        return self.reload(changed_at)
+
+    def reload(self, changed_at=None):
+        changed_at = time.perf_counter() if changed_at is None else changed_at
+        try:
+            loader = ModelLoader(self.model_path, StartupTimer(), self.artifact)
+            loader.start()
+            model = loader.wait()
+            if model is None:
+                raise loader.error
+            if self._rows is None:
+                self._rows = validation_rows(self.dataset)
+            validate_model(model, self._rows)
+            predictor = self.build(model)
+        except Exception as e:
+            self.failures += 1
+            self.error = e
+            return False
+        start = self.metrics.clock()
+        self.slot.swap(predictor, loader.version)
+        self.swap_seconds = time.perf_counter() - start
+        self.metrics.record("model_swap", start)
+        self.reload_seconds = time.perf_counter() - changed_at
+        self.metrics.record("model_reload", changed_at)
+        self.reloads += 1
+        self.error = None
+        return True
+
+    def stats(self):
+        return {"version": self.slot.version, "reloads": self.reloads, "failures": self.failures,
+                "error": str(self.error) if self.error is not None else None,
+                "swap_seconds": self.swap_seconds, "reload_seconds": self.reload_seconds}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch the model files and report each hot swap")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    args = parser.parse_args(argv)
+
+    loader = ModelLoader(args.model, artifact=args.artifact)
+    loader.start()
+    if loader.wait() is None:
+        raise SystemExit(loader.phase)
+    slot = SwappableModel(loader.model, loader.version)
+    reloader = ModelReloader(slot, model_path=args.model, artifact=args.artifact)
+    print(f"Serving model {slot.version} ({loader.source}); watching {', '.join(reloader.paths)}")
+    reloader.start()
+    deadline = time.monotonic() + args.seconds
+    seen = (0, 0)
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        if (reloader.reloads, reloader.failures) == seen:
+            continue
+        seen = (reloader.reloads, reloader.failures)
+        stats = reloader.stats()
+        if stats["error"] is not None:
+            print(f"Reload rejected, still serving {stats['version']}: {stats['error']}")
+        else:
+            print(f"Swapped to {stats['version']}: swap {stats['swap_seconds'] * 1e6:.1f} us, "
+                  f"live {stats['reload_seconds'] * 1e3:.0f} ms after the change was seen")
+    reloader.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Per-stage timing for the sample -> predict -> relay pipeline.
+
+Code on the hot path takes a monotonic timestamp with ``metrics.clock()`` and
+hands it back with ``metrics.record(stage, start)`` when the stage is done (or
+wraps the stage in ``with metrics.span(stage):``). Each stage keeps its last
+``DEFAULT_WINDOW`` durations in a fixed-size ring buffer, from which
+``summary()`` reports p50/p99 alongside the all-time count, sum and max.
+
+Instrumentation is on unless ``RELAY_METRICS=0``. Switched off, ``make_metrics``
+returns ``NULL_METRICS``, whose methods do nothing and allocate nothing, so the
+instrumented code runs unchanged. Dump a headless streaming run with::
+
+    python -m relay_control.instrumentation --seconds 5 --format prometheus
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_WINDOW = 1024  # Durations kept per stage for the percentiles
+QUANTILES = [0.5, 0.99]
+
+
+class Histogram:
+    def __init__(self, size=DEFAULT_WINDOW):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.values[self.count % self.size] = seconds
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def summary(self):
+        with self._lock:
+            window = self.values[:min(self.count, self.size)].copy()
+            count, total, largest = self.count, self.total, self.max
+        percentiles = np.quantile(window, QUANTILES) if len(window) else [0.0] * len(QUANTILES)
+        return {
+            "count": count,
+            "sum": total,
+            "p50": float(percentiles[0]),
+            "p99": float(percentiles[1]),
+            "max": largest,
+        }
+
+
+class _Span:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.record(self.stage, self.start)
+
+
+class Metrics:
+    enabled = True
+    clock = staticmethod(time.perf_counter)  # Monotonic, and the finest clock available
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.window))
+        return histogram
+
+    def record(self, stage, start):
+        self.histogram(stage).add(time.perf_counter() - start)
+
+    def span(self, stage):
+        return _Span(self, stage)
+
+    def summary(self):
+        return {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def to_json(self):
+        return json.dumps({"unit": "seconds", "window": self.window, "stages": self.summary()}, indent=2)
+
+    def to_prometheus(self, prefix="relay_stage_seconds"):
+        summary = self.summary()
+        lines = [f"# HELP {prefix} Time spent in each stage of the relay pipeline",
+                 f"# TYPE {prefix} summary"]
+        for stage, values in summary.items():
+            for quantile, key in zip(QUANTILES, ["p50", "p99"]):
+                lines.append(f'{prefix}{{stage="{stage}",quantile="{quantile}"}} {values[key]:.9g}')
+            lines.append(f'{prefix}_sum{{stage="{stage}"}} {values["sum"]:.9g}')
+            lines.append(f'{prefix}_count{{stage="{stage}"}} {values["count"]}')
+        lines.append(f"# TYPE {prefix}_max gauge")
+        for stage, values in summary.items():
+            lines.append(f'{prefix}_max{{stage="{stage}"}} {values["max"]:.9g}')
+        return "\n".join(lines) + "\n"
+
+    def format_table(self):
+        # Fixed-width text for the GUI stats page
+        lines = [f"{'stage':<16}{'count':>9}{'p50 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for stage, values in self.summary().items():
+            lines.append(f"{stage:<16}{values['count']:>9}{values['p50'] * 1e6:>10.1f}"
+                         f"{values['p99'] * 1e6:>10.1f}{values['max'] * 1e6:>10.1f}")
+        return "\n".join(lines)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+
+class NullMetrics:
+    # Same interface as Metrics; every call is a no-op
+    enabled = False
+    _span = _NullSpan()
+
+    @staticmethod
+    def clock():
+        return 0.0
+
+    def record(self, stage, start):
+        pass
+
+    def span(self, stage):
+        return self._span
+
+    def summary(self):
+        return {}
+
+    def reset(self):
+        pass
+
+    def to_json(self):
+        return json.dumps({"unit": "seconds", "window": 0, "stages": {}})
+
+    def to_prometheus(self, prefix="relay_stage_seconds"):
+        return ""
+
+    def format_table(self):
+        return "Instrumentation is off (RELAY_METRICS=0)"
+
+
+NULL_METRICS = NullMetrics()
+
+
+def make_metrics(window=DEFAULT_WINDOW):
+    # Chosen at startup; RELAY_METRICS=0 switches instrumentation off
+    if os.environ.get("RELAY_METRICS", "1") == "0":
+        return NULL_METRICS
+    return Metrics(window)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each pipeline stage during a headless streaming run")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rate", type=float, default=100.0, help="samples per second (0 = unthrottled)")
+    parser.add_argument("--format", choices=["table", "json", "prometheus"], default="table")
+    args = parser.parse_args(argv)
+
+    from relay_control.model_loader import ModelLoader
+    from relay_control.relay_bank import RelayBank, make_pins
+    from relay_control.streaming import CsvReplaySource, StreamingPredictor
+
+    metrics = Metrics()
+    loader = ModelLoader()
+    loader.start()
+    model = loader.wait()
+    if model is None:
+        raise SystemExit(loader.phase)
+    bank = RelayBank(make_pins("simulated"), metrics=metrics)
+    stream = StreamingPredictor(model, CsvReplaySource(), rate_hz=args.rate,
+                                on_prediction=lambda sample, prediction: bank.apply(prediction),
+                                metrics=metrics)
+    stream.start()
+    time.sleep(args.seconds)
+    stream.stop()
+
+    if args.format == "json":
+        print(metrics.to_json())
+    elif args.format == "prometheus":
+        print(metrics.to_prometheus(), end="")
+    else:
+        print(metrics.format_table())
+
+
+if __name__ == "__main__":
+    main()
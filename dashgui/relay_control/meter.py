@@ -0,0 +1,415 @@
+"""Meter input: binary frames from a serial port or Modbus-RTU into a NumPy ring.
+
+Two frame layouts carry the six FEATURES readings, both with a CRC-16/MODBUS
+trailer (low byte first):
+
+``stream``  a meter that pushes frames on its own::
+
+    A5 5A | seq <u2 | IR IY IB VR VY VB <f4 x6 | crc <u2        (30 bytes)
+
+``modbus``  a Modbus-RTU slave polled with function 0x04 (read input
+registers) for 12 registers, replying with six big-endian float32 values::
+
+    addr | 04 | 18 | IR IY IB VR VY VB >f4 x6 | crc <u2        (29 bytes)
+
+Bytes are read straight into one preallocated buffer (``os.readv`` into a
+``memoryview``), a whole chunk of frames is checked at once through
+``np.frombuffer`` views (sync bytes plus a vectorised CRC), and the values are
+copied once into a preallocated ``SampleRing``. Nothing is allocated per
+sample; bad frames are counted and the parser resynchronises on the next sync
+bytes. ``MeterSource`` is a ``SampleSource`` for the streaming loop; the
+controller uses it when ``RELAY_METER`` names a port::
+
+    RELAY_METER=/dev/ttyUSB0 RELAY_METER_PROTOCOL=modbus RELAY_METER_BAUD=9600 python main.py
+
+``FakeMeter`` serves the bundled CSV on a pseudo-terminal so all of this can
+run without hardware::
+
+    python -m relay_control.meter fake --protocol modbus      # prints the pty path
+    python -m relay_control.meter read /dev/pts/3 --protocol modbus
+"""
+import argparse
+import os
+import select
+import struct
+import threading
+import time
+
+import numpy as np
+
+from relay_control import FEATURES
+from relay_control.streaming import SampleSource
+
+METER_PROTOCOLS = ["stream", "modbus"]
+STREAM_SYNC = b"\xa5\x5a"
+MODBUS_READ_INPUT_REGISTERS = 0x04
+MODBUS_REGISTERS = 2 * len(FEATURES)  # One float32 per two 16-bit registers
+READ_TIMEOUT = 1.0  # Seconds MeterSource.read waits for a frame before failing
+
+
+def _crc_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table[byte] = crc
+    return table
+
+
+CRC_TABLE = _crc_table()
+_CRC_LIST = CRC_TABLE.tolist()
+
+
+def crc16(data):
+    # CRC-16/MODBUS of a bytes-like object
+    crc = 0xFFFF
+    for byte in data:
+        crc = (crc >> 8) ^ _CRC_LIST[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def crc16_rows(frames):
+    # CRC-16/MODBUS of every row of an (n, length) uint8 array, one NumPy pass per byte column
+    crc = np.full(len(frames), 0xFFFF, dtype=np.uint16)
+    for column in frames.T:
+        crc = (crc >> 8) ^ CRC_TABLE[(crc ^ column) & 0xFF]
+    return crc
+
+
+class FrameFormat:
+    # Byte layout of one frame: leading sync bytes, a (len(FEATURES),) float32
+    # "values" field and a trailing little-endian "crc" over everything before it
+
+    def __init__(self, name, sync, dtype):
+        self.name = name
+        self.sync = bytes(sync)
+        self.dtype = np.dtype(dtype)
+        self.size = self.dtype.itemsize
+        self.sync_array = np.frombuffer(self.sync, dtype=np.uint8)
+
+
+STREAM_FRAME = FrameFormat("stream", STREAM_SYNC, [
+    ("sync", "V2"), ("seq", "<u2"), ("values", "<f4", (len(FEATURES),)), ("crc", "<u2")])
+
+
+def modbus_frame(address=1):
+    # Reply to a read of MODBUS_REGISTERS input registers from one slave address
+    return FrameFormat("modbus", bytes([address, MODBUS_READ_INPUT_REGISTERS, 4 * len(FEATURES)]), [
+        ("header", "V3"), ("values", ">f4", (len(FEATURES),)), ("crc", "<u2")])
+
+
+def modbus_request(address=1, register=0):
+    # Read-input-registers request for the six readings starting at register
+    request = struct.pack(">BBHH", address, MODBUS_READ_INPUT_REGISTERS, register, MODBUS_REGISTERS)
+    return request + struct.pack("<H", crc16(request))
+
+
+def frame_format(protocol, address=1):
+    if protocol == "stream":
+        return STREAM_FRAME
+    if protocol == "modbus":
+        return modbus_frame(address)
+    raise ValueError(f"Unknown meter protocol: {protocol} (expected one of {METER_PROTOCOLS})")
+
+
+class SampleRing:
+    # Fixed-size ring of the newest readings; written by one thread at a time
+
+    def __init__(self, capacity=4096, width=len(FEATURES)):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, width), dtype=np.float32)
+        self.written = 0  # Rows ever written; row i lives at data[i % capacity]
+
+    def extend(self, rows):
+        count = len(rows)
+        if count > self.capacity:
+            rows = rows[-self.capacity:]
+        start = (self.written + count - len(rows)) % self.capacity
+        first = min(len(rows), self.capacity - start)
+        self.data[start:start + first] = rows[:first]
+        self.data[:len(rows) - first] = rows[first:]
+        self.written += count
+
+    def newest(self):
+        # View of the newest row (overwritten as the ring wraps), or None
+        return self.data[(self.written - 1) % self.capacity] if self.written else None
+
+    def since(self, cursor):
+        # (rows written after cursor, new cursor); rows older than capacity are lost
+        cursor = max(cursor, self.written - self.capacity)
+        indices = np.arange(cursor, self.written) % self.capacity
+        return self.data[indices], self.written
+
+
+class FrameParser:
+    def __init__(self, fmt=STREAM_FRAME, ring=None, buffer_size=65536):
+        if buffer_size < 2 * fmt.size:
+            raise ValueError(f"buffer_size must hold at least two {fmt.name} frames")
+        self.format = fmt
+        self.ring = ring if ring is not None else SampleRing()
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.end = 0  # Bytes of buffer holding unparsed input
+
+        self.frames = 0
+        self.bad_frames = 0  # Sync bytes found but the CRC did not match
+        self.skipped_bytes = 0  # Noise discarded while looking for sync bytes
+
+    def stats(self):
+        return {"frames": self.frames, "bad_frames": self.bad_frames, "skipped_bytes": self.skipped_bytes,
+                "buffered": self.end}
+
+    def read_from(self, fd):
+        # Read whatever fd has into the free tail of the buffer; returns the bytes read
+        try:
+            count = os.readv(fd, [self.view[self.end:]])
+        except BlockingIOError:
+            return 0
+        self.end += count
+        return count
+
+    def feed(self, data):
+        # Copy bytes in (tests, files); anything past the free space is parsed in rounds
+        data = memoryview(data)
+        while len(data):
+            count = min(len(data), len(self.buffer) - self.end)
+            self.view[self.end:self.end + count] = data[:count]
+            self.end += count
+            data = data[count:]
+            if len(data):
+                self.parse()
+
+    def parse(self):
+        # Move every complete, valid frame in the buffer into the ring; returns how many
+        fmt = self.format
+        parsed = 0
+        position = 0
+        while True:
+            found = self.buffer.find(fmt.sync, position, self.end)
+            if found < 0:
+                # Keep a trailing partial sync sequence for the next read
+                found = max(position, self.end - len(fmt.sync) + 1)
+                self.skipped_bytes += found - position
+                position = found
+                break
+            self.skipped_bytes += found - position
+            position = found
+            count = (self.end - position) // fmt.size
+            if count == 0:
+                break
+            raw = np.frombuffer(self.buffer, np.uint8, count * fmt.size, position).reshape(count, fmt.size)
+            frames = np.frombuffer(self.buffer, fmt.dtype, count, position)
+            synced = (raw[:, :len(fmt.sync)] == fmt.sync_array).all(axis=1)
+            valid = synced & (crc16_rows(raw[:, :-2]) == frames["crc"])
+            run = count if valid.all() else int(valid.argmin())
+            if run:
+                self.ring.extend(frames["values"][:run])
+                position += run * fmt.size
+                parsed += run
+            if run < count and synced[run]:
+                # Damaged frame, or sync bytes inside noise: resynchronise past its first byte
+                self.bad_frames += 1
+                position += 1
+        remaining = self.end - position
+        if position and remaining:
+            self.view[:remaining] = self.view[position:self.end]
+        self.end = remaining
+        self.frames += parsed
+        return parsed
+
+
+def open_serial(path, baudrate=115200):
+    # Raw 8N1 file descriptor for a serial device or pty, non-blocking
+    import termios
+    import tty
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        tty.setraw(fd)
+        attrs = termios.tcgetattr(fd)
+        speed = getattr(termios, f"B{baudrate}", None)
+        if speed is None:
+            raise ValueError(f"Unsupported baud rate: {baudrate}")
+        attrs[4] = attrs[5] = speed
+        attrs[2] |= termios.CLOCAL | termios.CREAD
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+    except Exception:
+        os.close(fd)
+        raise
+    return fd
+
+
+class MeterSource(SampleSource):
+    # Newest meter reading per read(); with request set (Modbus), polls the meter first
+
+    def __init__(self, path, protocol="stream", baudrate=115200, address=1, register=0,
+                 timeout=READ_TIMEOUT, ring=None):
+        self.path = path
+        self.protocol = protocol
+        self.parser = FrameParser(frame_format(protocol, address), ring)
+        self.ring = self.parser.ring
+        self.request = modbus_request(address, register) if protocol == "modbus" else None
+        self.timeout = timeout
+        self.fd = open_serial(path, baudrate)
+        self._seen = 0
+
+    def read(self):
+        # Copy of the newest reading not returned yet; raises TimeoutError if the meter goes quiet
+        if self.request is not None:
+            os.write(self.fd, self.request)
+        deadline = time.monotonic() + self.timeout
+        while self.ring.written == self._seen:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"No valid {self.protocol} frame from {self.path} in {self.timeout}s")
+            if select.select([self.fd], [], [], remaining)[0]:
+                self.parser.read_from(self.fd)
+                self.parser.parse()
+        self._seen = self.ring.written
+        return self.ring.newest().copy()  # The ring row is reused once it wraps
+
+    def stats(self):
+        return dict(self.parser.stats(), samples=self.ring.written)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def meter_port():
+    # RELAY_METER=/dev/ttyUSB0 streams samples from a meter instead of the CSV replay
+    return os.environ.get("RELAY_METER") or None
+
+
+def meter_source_factory(default):
+    # Source factory for RelayController: a MeterSource configured from the environment, else default
+    path = meter_port()
+    if path is None:
+        return default
+    protocol = os.environ.get("RELAY_METER_PROTOCOL", "stream")
+    baudrate = int(os.environ.get("RELAY_METER_BAUD", "115200"))
+    address = int(os.environ.get("RELAY_METER_ADDRESS", "1"))
+    frame_format(protocol, address)  # Fail at startup on a bad protocol, not on Start
+    return lambda: MeterSource(path, protocol, baudrate, address)
+
+
+class FakeMeter:
+    # Serves rows as meter frames on a pseudo-terminal; connect a MeterSource to .port
+
+    def __init__(self, rows=None, protocol="stream", rate_hz=1000.0, address=1, noise_every=0):
+        if rows is None:
+            from relay_control.streaming import CsvReplaySource
+            rows = CsvReplaySource().rows
+        self.rows = np.asarray(rows, dtype=np.float32)
+        self.protocol = protocol
+        self.format = frame_format(protocol, address)
+        self.address = address
+        self.rate_hz = float(rate_hz)
+        self.noise_every = noise_every  # Write a burst of garbage every n frames to exercise resync
+        self.master, self.slave = os.openpty()
+        import tty
+        tty.setraw(self.slave)  # No echo or newline translation on the meter's side
+        self.port = os.ttyname(self.slave)
+        self.sent = 0
+        self._frame = bytearray(self.format.size)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def frame(self, index):
+        # Encode row index into the reusable frame buffer
+        values = self.rows[index % len(self.rows)]
+        if self.protocol == "stream":
+            struct.pack_into("<2sH6f", self._frame, 0, STREAM_SYNC, index & 0xFFFF, *values)
+        else:
+            struct.pack_into(">3s6f", self._frame, 0, self.format.sync, *values)
+        struct.pack_into("<H", self._frame, self.format.size - 2, crc16(memoryview(self._frame)[:-2]))
+        return self._frame
+
+    def _send(self):
+        if self.noise_every and self.sent % self.noise_every == self.noise_every - 1:
+            os.write(self.master, b"\x00\xa5\x13\x37" + bytes(self._frame[:7]))
+        os.write(self.master, self.frame(self.sent))
+        self.sent += 1
+
+    def start(self):
+        self._stop.clear()
+        target = self._serve_stream if self.protocol == "stream" else self._serve_modbus
+        self._thread = threading.Thread(target=target, name="fake-meter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _serve_stream(self):
+        period = 1.0 / self.rate_hz if self.rate_hz > 0 else 0.0
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            self._send()
+            if period:
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+
+    def _serve_modbus(self):
+        request = modbus_request(self.address)[:2]
+        pending = b""
+        while not self._stop.is_set():
+            if not select.select([self.master], [], [], 0.05)[0]:
+                continue
+            pending += os.read(self.master, 256)
+            while len(pending) >= 8:
+                if pending[:2] == request and crc16(pending[:8]) == 0:
+                    self._send()
+                    pending = pending[8:]
+                else:
+                    pending = pending[1:]
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read a meter, or serve a fake one on a pty")
+    parser.add_argument("command", choices=["read", "fake"])
+    parser.add_argument("port", nargs="?", help="read: serial device or pty path")
+    parser.add_argument("--protocol", choices=METER_PROTOCOLS, default="stream")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--address", type=int, default=1, help="Modbus slave address")
+    parser.add_argument("--rate", type=float, default=100.0, help="fake: frames per second (stream protocol)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "fake":
+        meter = FakeMeter(protocol=args.protocol, rate_hz=args.rate, address=args.address).start()
+        print(f"Fake {args.protocol} meter on {meter.port}", flush=True)
+        try:
+            time.sleep(args.seconds)
+        except KeyboardInterrupt:
+            pass
+        meter.close()
+        print(f"sent {meter.sent} frames")
+        return
+
+    if args.port is None:
+        parser.error("read needs a port")
+    source = MeterSource(args.port, args.protocol, args.baud, args.address)
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < args.seconds:
+            sample = source.read()
+            print(" ".join(f"{name}={value:.2f}" for name, value in zip(FEATURES, sample)))
+    finally:
+        source.close()
+    print(", ".join(f"{key}={value}" for key, value in source.stats().items()))
+
+
+if __name__ == "__main__":
+    main()
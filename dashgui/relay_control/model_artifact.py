@@ -0,0 +1,129 @@
+"""Fast-start on-disk format for the compiled relay model.
+
+An artifact is a directory holding one ``.npy`` file per ``CompiledModel`` node
+array plus a small ``header.json``. Loading it memory-maps the arrays and needs
+only NumPy: sklearn and xgboost are never imported. The header records the
+SHA-256 of the joblib file it was exported from, so a stale artifact is caught
+when the source model is retrained::
+
+    python -m relay_control.model_artifact export
+    python -m relay_control.model_artifact verify
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from relay_control import ARTIFACT_PATH, MODEL_PATH
+from relay_control.compiled_model import CompiledModel
+
+FORMAT_VERSION = 1
+HEADER_NAME = "header.json"
+ARRAYS = ["feature", "threshold", "left", "default_left", "value", "roots", "base_margin", "classes"]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_artifact(source=MODEL_PATH, destination=ARTIFACT_PATH, model=None):
+    # Compile the joblib model (unless already given) and write it as an artifact
+    if model is None:
+        model = CompiledModel.from_joblib(source)
+    os.makedirs(destination, exist_ok=True)
+
+    arrays = {}
+    for name in ARRAYS:
+        array = np.ascontiguousarray(getattr(model, name))
+        if array.dtype == np.intp:
+            array = array.astype(np.int64)  # Fixed width so 32-bit Pis read the same file
+        np.save(os.path.join(destination, f"{name}.npy"), array, allow_pickle=False)
+        arrays[name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "source": os.path.basename(source),
+        "source_sha256": file_sha256(source),
+        "source_size": os.path.getsize(source),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "n_outputs": model.n_outputs,
+        "n_rounds": model.n_rounds,
+        "max_depth": model.max_depth,
+        "feature_names": model.feature_names,
+        "arrays": arrays,
+    }
+    # Write the header last so a half-written export is never picked up as valid
+    header_path = os.path.join(destination, HEADER_NAME)
+    with open(header_path + ".tmp", "w") as handle:
+        json.dump(header, handle, indent=2)
+    os.replace(header_path + ".tmp", header_path)
+    return header
+
+
+def read_header(path=ARTIFACT_PATH):
+    with open(os.path.join(path, HEADER_NAME)) as handle:
+        header = json.load(handle)
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version: {header.get('format_version')}")
+    return header
+
+
+def check_source(header, source=MODEL_PATH):
+    # Raise if the joblib model has changed since the artifact was exported
+    if not os.path.exists(source):
+        return  # Deployed without the joblib file; nothing to compare against
+    if os.path.getsize(source) != header["source_size"] or file_sha256(source) != header["source_sha256"]:
+        raise ValueError(f"Model artifact is stale: {source} changed since it was exported")
+
+
+def load_artifact(path=ARTIFACT_PATH, source=MODEL_PATH, mmap=True):
+    # Memory-map a CompiledModel from disk; pass source=None to skip the hash check
+    header = read_header(path)
+    if source is not None:
+        check_source(header, source)
+    arrays = {}
+    for name in ARRAYS:
+        array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None,
+                        allow_pickle=False)
+        expected = header["arrays"][name]
+        if array.dtype.str != expected["dtype"] or list(array.shape) != expected["shape"]:
+            raise ValueError(f"Model artifact array {name} does not match its header")
+        arrays[name] = array
+    return CompiledModel(arrays["feature"], arrays["threshold"], arrays["left"],
+                         arrays["default_left"], arrays["value"], arrays["roots"],
+                         arrays["base_margin"], arrays["classes"], header["max_depth"],
+                         header["feature_names"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or verify the fast-start model artifact")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--source", default=MODEL_PATH, help="trained joblib model")
+    parser.add_argument("--artifact", default=ARTIFACT_PATH, help="artifact directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        header = export_artifact(args.source, args.artifact)
+        print(f"Exported {header['n_outputs']} outputs x {header['n_rounds']} trees "
+              f"to {args.artifact} (source sha256 {header['source_sha256'][:12]})")
+        return
+
+    artifact = load_artifact(args.artifact, args.source)
+    compiled = CompiledModel.from_joblib(args.source)
+    from relay_control import DATASET_PATH, FEATURES
+    import pandas as pd
+    rows = pd.read_csv(DATASET_PATH, usecols=FEATURES)[FEATURES].to_numpy()
+    if not np.array_equal(artifact.predict(rows), compiled.predict(rows)):
+        raise SystemExit("Artifact predictions differ from the joblib model")
+    print(f"Artifact matches {args.source} ({len(rows)} rows checked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Background model loading with per-phase startup timing.
+
+Importing xgboost/sklearn and unpickling ``multi_output_model.joblib`` takes
+seconds on a Pi, so the GUIs show their window first and let ``ModelLoader``
+do the work on a thread. When an up-to-date NumPy artifact exists (see
+``relay_control.model_artifact``) it is memory-mapped instead and neither
+library is imported at all. The UI polls ``progress``/``phase``/``done`` from a
+timer, the same way it polls the streaming loop. ``version`` identifies the
+loaded model by the SHA-256 prefix of the joblib file it came from.
+"""
+import os
+import threading
+import time
+
+from relay_control import ARTIFACT_PATH, MODEL_PATH
+from relay_control.features import windowed_model
+
+
+class StartupTimer:
+    # Records named milestones relative to a common start time
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []  # (name, seconds since start)
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            self.phases.append((name, time.perf_counter() - self.start))
+
+    def report(self):
+        lines = ["Startup timing:"]
+        previous = 0.0
+        with self._lock:
+            for name, elapsed in self.phases:
+                lines.append(f"  {name:<28} +{(elapsed - previous) * 1e3:8.1f} ms  (at {elapsed * 1e3:8.1f} ms)")
+                previous = elapsed
+        return "\n".join(lines)
+
+
+class ModelLoader:
+    # (phase label, progress percentage once the phase is finished)
+    ARTIFACT_PHASE = ("Mapping model artifact", 90)
+    JOBLIB_PHASES = [
+        ("Importing model libraries", 45),
+        ("Unpickling model", 80),
+        ("Compiling trees", 95),
+    ]
+    WARM_UP_PHASE = ("Warming up", 100)
+
+    def __init__(self, path=MODEL_PATH, timer=None, artifact=ARTIFACT_PATH):
+        self.path = path
+        self.artifact = artifact
+        self.timer = timer if timer is not None else StartupTimer()
+        self.model = None
+        self.source = None  # "artifact" or "joblib" once loaded
+        self.version = None
+        self.error = None
+        self.progress = 0
+        self.phase = "Waiting to load model"
+        self._thread = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.model
+
+    def _run(self):
+        try:
+            model = None
+            if self.artifact and os.path.exists(os.path.join(self.artifact, "header.json")):
+                try:
+                    model = self._load_artifact()
+                except ValueError as e:
+                    # Stale or damaged artifact: fall back to the joblib model
+                    self.timer.mark(f"Artifact rejected ({e})")
+            if model is None:
+                model = self._load_joblib()
+            # Models trained on windowed features still take raw IR..VB rows from here on
+            model = windowed_model(model)
+
+            self._begin(self.WARM_UP_PHASE)
+            model.predict([[0.0] * 6])
+            if getattr(model, "stateful", False):
+                model.reset()  # Keep the warm-up sample out of the window
+            self._finish()
+
+            self.model = model
+            self.phase = "Model ready"
+        except Exception as e:
+            self.error = e
+            self.phase = f"Model failed to load: {e}"
+        finally:
+            self._done.set()
+
+    def _load_artifact(self):
+        self._begin(self.ARTIFACT_PHASE)
+        from relay_control.model_artifact import load_artifact, read_header
+        model = load_artifact(self.artifact, self.path)
+        self._finish()
+        self.source = "artifact"
+        self.version = read_header(self.artifact)["source_sha256"][:12]
+        return model
+
+    def _load_joblib(self):
+        steps = iter(self.JOBLIB_PHASES)
+        self._begin(next(steps))
+        import joblib
+        import sklearn.multioutput  # noqa: F401  (heavy imports the unpickler needs)
+        import xgboost  # noqa: F401
+        self._finish()
+
+        self._begin(next(steps))
+        estimator = joblib.load(self.path)
+        self._finish()
+
+        self._begin(next(steps))
+        from relay_control.compiled_model import CompiledModel
+        model = CompiledModel.from_estimator(estimator)
+        self._finish()
+        self.source = "joblib"
+        from relay_control.model_artifact import file_sha256
+        self.version = file_sha256(self.path)[:12]
+        return model
+
+    def _begin(self, step):
+        self.phase, self._target = step
+
+    def _finish(self):
+        self.progress = self._target
+        self.timer.mark(self.phase)
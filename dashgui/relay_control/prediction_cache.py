@@ -0,0 +1,169 @@
+"""Bounded LRU cache in front of ``model.predict`` keyed on quantised inputs.
+
+In steady-state operation consecutive samples differ only by sensor noise.
+``CachedPredictor`` snaps each sample to a grid (0.01 A / 0.1 V by default) and
+scores the grid point once; later samples in the same cell are served from the
+cache. Because the grid point is scored rather than whichever raw sample came
+first, a cached answer does not depend on arrival order.
+
+It is not the model's answer for the raw sample, though: a sample near a split
+threshold can land on the other side once snapped. On the bundled CSV, 200 of
+20000 replayed samples (1%) get different labels than the model gives them,
+and 73 of 20000 (0.4%) on the noisy steady-state replay. The cache is therefore
+off by default; ``RELAY_PREDICTION_CACHE=1`` puts it in front of the GUIs and
+the daemon where that drift is acceptable.
+
+Rows with a NaN, infinite or absurdly large value are never cached: they go
+straight to the model, which routes missing values itself. The cache is shared
+by the stream, the UI and daemon requests, so lookups and updates hold a lock;
+the model call does not. The cache empties itself when any watched model file
+changes on disk. Measure it with::
+
+    python -m benchmarks.bench_prediction_cache
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from relay_control import ARTIFACT_PATH, MODEL_PATH
+
+DEFAULT_CURRENT_RESOLUTION = 0.01  # A
+DEFAULT_VOLTAGE_RESOLUTION = 0.1  # V
+# The hit rate is bounded by how many cells sensor noise spreads one operating
+# point over (about 20 on the steady replay, for a 0.56 hit rate), not by size:
+# 16384 or 65536 entries give the same hits there. 4096 cells hold the last ~200
+# operating points, and evictions only drop points that are not coming back.
+DEFAULT_MAX_ENTRIES = 4096
+CHECK_INTERVAL = 1.0  # Seconds between model file checks
+CACHEABLE_LIMIT = 1e9  # Larger magnitudes (and NaN, inf) skip the cache; their cells would overflow int64
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class CachedPredictor:
+    def __init__(self, model, current_resolution=DEFAULT_CURRENT_RESOLUTION,
+                 voltage_resolution=DEFAULT_VOLTAGE_RESOLUTION, max_entries=DEFAULT_MAX_ENTRIES,
+                 watch_paths=()):
+        self.model = model
+        self.resolution = np.array([current_resolution] * 3 + [voltage_resolution] * 3)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped on every invalidation; results from an older model are not stored
+        self.watch_paths = list(watch_paths)
+        self._signatures = [_file_signature(path) for path in self.watch_paths]
+        self._next_check = time.monotonic() + CHECK_INTERVAL
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.uncached = 0  # Rows with non-finite values, passed straight to the model
+
+    def set_model(self, model):
+        # Swap the underlying model; anything cached came from the old one
+        self.model = model
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self.entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def _check_model_files(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + CHECK_INTERVAL
+        signatures = [_file_signature(path) for path in self.watch_paths]
+        if signatures != self._signatures:
+            self._signatures = signatures
+            self.invalidate()
+
+    def predict(self, X):
+        if self.watch_paths:
+            self._check_model_files()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if not np.abs(X).max(initial=0.0) < CACHEABLE_LIMIT:  # Also true with any NaN
+            cacheable = (np.abs(X) < CACHEABLE_LIMIT).all(axis=1)
+            # NaN/inf would all snap to one cell; let the model handle those rows
+            direct = np.asarray(self.model.predict(X[~cacheable]))
+            results = np.empty((len(X),) + direct.shape[1:], dtype=direct.dtype)
+            results[~cacheable] = direct
+            if cacheable.any():
+                results[cacheable] = self.predict(X[cacheable])
+            with self._lock:
+                self.uncached += len(direct)
+            return results
+        cells = np.rint(X / self.resolution).astype(np.int64)
+        keys = [cell.tobytes() for cell in cells]
+
+        results = [None] * len(keys)
+        missing = {}  # key -> rows waiting for it
+        with self._lock:
+            generation = self._generation
+            for row, key in enumerate(keys):
+                labels = self.entries.get(key)
+                if labels is not None:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    results[row] = labels
+                else:
+                    missing.setdefault(key, []).append(row)
+
+        if missing:
+            # Score each missing grid point once, all in a single model call
+            first_rows = [rows[0] for rows in missing.values()]
+            predictions = self.model.predict(cells[first_rows] * self.resolution)
+            with self._lock:
+                store = generation == self._generation
+                for (key, rows), labels in zip(missing.items(), predictions):
+                    self.misses += 1
+                    self.hits += len(rows) - 1
+                    for row in rows:
+                        results[row] = labels
+                    if store:
+                        self.entries[key] = labels
+                        self.entries.move_to_end(key)
+                        if len(self.entries) > self.max_entries:
+                            self.entries.popitem(last=False)
+                            self.evictions += 1
+        return np.array(results)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "uncached": self.uncached,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def model_files(model_path=MODEL_PATH, artifact=ARTIFACT_PATH):
+    # Files whose change means the loaded model is stale; the artifact rewrites its header on export
+    from relay_control.model_artifact import HEADER_NAME
+    return [model_path, os.path.join(artifact, HEADER_NAME)]
+
+
+def cache_predictions(model, model_path=MODEL_PATH, artifact=ARTIFACT_PATH):
+    # Wrap a predictor for the GUIs when RELAY_PREDICTION_CACHE=1, unless its
+    # predictions depend on earlier inputs (windowed features)
+    if os.environ.get("RELAY_PREDICTION_CACHE", "0") != "1" or getattr(model, "stateful", False):
+        return model
+    return CachedPredictor(model, watch_paths=model_files(model_path, artifact))
@@ -0,0 +1,156 @@
+"""State-tracking wrapper around the 8 relay output pins.
+
+``RelayBank`` remembers the last committed 8-bit mask (bit i = relay i+1) and
+only writes the pins whose state actually changes, counting the writes it
+avoided. Pins are anything with ``on()``/``off()`` methods, built by
+``make_pins`` for one of the ``RELAY_BACKENDS``: gpiozero ``LED`` objects on the
+Pi, ``MockPin`` for a simulated bank, or ``LoggingPin`` to print every write.
+"""
+import numbers
+import os
+import threading
+
+from relay_control.instrumentation import NULL_METRICS
+
+# BCM pin numbers of relays 1-8 on the Pi HAT
+RELAY_PINS = [17, 27, 22, 10, 9, 11, 0, 5]
+RELAY_BACKENDS = ["gpiozero", "simulated", "logging"]
+
+
+class MockPin:
+    # Stand-in for gpiozero.LED that records what would have been written
+
+    def __init__(self, pin=None):
+        self.pin = pin
+        self.is_lit = False
+        self.writes = 0
+
+    def on(self):
+        self.is_lit = True
+        self.writes += 1
+
+    def off(self):
+        self.is_lit = False
+        self.writes += 1
+
+    def close(self):
+        pass
+
+
+class LoggingPin(MockPin):
+    # Simulated pin that prints each write, for running the GUI without hardware
+
+    def __init__(self, pin=None, relay=None):
+        super().__init__(pin)
+        self.relay = relay
+
+    def on(self):
+        super().on()
+        print(f"Relay {self.relay} turned ON")
+
+    def off(self):
+        super().off()
+        print(f"Relay {self.relay} turned OFF")
+
+
+def make_pins(backend="gpiozero", pin_numbers=RELAY_PINS):
+    if backend in ("simulated", "mock"):
+        return [MockPin(pin) for pin in pin_numbers]
+    if backend == "logging":
+        return [LoggingPin(pin, relay) for relay, pin in enumerate(pin_numbers, 1)]
+    if backend == "gpiozero":
+        from gpiozero import LED  # Only importable on a Pi or with a gpiozero mock factory
+        return [LED(pin) for pin in pin_numbers]
+    raise ValueError(f"Unknown pin backend: {backend} (expected one of {RELAY_BACKENDS})")
+
+
+def relay_backend(default="simulated"):
+    # Chosen at startup with RELAY_BACKEND=gpiozero|simulated|logging
+    return os.environ.get("RELAY_BACKEND", default)
+
+
+def mask_from_states(states):
+    # Accepts an int mask, a single 0/1 value for every relay, or a sequence of 0/1
+    if isinstance(states, numbers.Integral):  # Also NumPy integers, e.g. from pack_labels
+        return int(states)
+    mask = 0
+    for i, state in enumerate(states):
+        if state:
+            mask |= 1 << i
+    return mask
+
+
+def states_from_mask(mask, count=8):
+    return [(mask >> i) & 1 for i in range(count)]
+
+
+class RelayBank:
+    def __init__(self, pins, metrics=NULL_METRICS):
+        self.pins = list(pins)
+        self.metrics = metrics
+        self.size = len(self.pins)
+        self.full_mask = (1 << self.size) - 1
+        self.mask = 0  # gpiozero LEDs start off
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.writes = 0
+        self.writes_avoided = 0
+
+    def state(self, index):
+        return bool((self.mask >> index) & 1)
+
+    def states(self):
+        return states_from_mask(self.mask, self.size)
+
+    def apply(self, states):
+        # Commit a full bank state; returns the mask of relays that changed
+        new_mask = mask_from_states(states) & self.full_mask
+        with self._lock:
+            changed = new_mask ^ self.mask
+            start = self.metrics.clock()
+            for i in range(self.size):
+                if (changed >> i) & 1:
+                    if (new_mask >> i) & 1:
+                        self.pins[i].on()
+                    else:
+                        self.pins[i].off()
+            if changed:
+                self.metrics.record("pin_write", start)
+            self.mask = new_mask
+            self.commits += 1
+            written = bin(changed).count("1")
+            self.writes += written
+            self.writes_avoided += self.size - written
+        return changed
+
+    def set_relay(self, index, state):
+        # Change a single relay; returns True if the pin was written
+        bit = 1 << index
+        with self._lock:
+            new_mask = (self.mask | bit) if state else (self.mask & ~bit)
+            if new_mask == self.mask:
+                self.writes_avoided += 1
+                return False
+            if state:
+                self.pins[index].on()
+            else:
+                self.pins[index].off()
+            self.mask = new_mask
+            self.writes += 1
+        return True
+
+    def all_off(self):
+        # Drive every pin off regardless of the tracked state (used on shutdown)
+        with self._lock:
+            for pin in self.pins:
+                pin.off()
+            self.writes += self.size
+            self.mask = 0
+
+    def stats(self):
+        return {
+            "mask": self.mask,
+            "commits": self.commits,
+            "writes": self.writes,
+            "writes_avoided": self.writes_avoided,
+        }
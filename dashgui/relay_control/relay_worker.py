@@ -0,0 +1,155 @@
+"""Relay actuation on a dedicated thread, off the Qt UI thread.
+
+Callers queue commands with ``set_relay``/``apply`` and return immediately. The
+queue holds at most one pending command per relay: a newer command for a relay
+replaces the one still waiting, since only the latest wanted state matters.
+The worker commits everything pending in one ``RelayBank.apply`` call (so only
+changed pins are written) and posts an acknowledgement ``(sequence, mask,
+changed)``, where ``sequence`` is the newest command included. The UI collects
+acknowledgements with ``take_acks()`` from a timer, the same way it polls the
+streaming loop.
+
+``shutdown()`` drops anything still queued, waits for the worker to finish its
+current write and then drives every relay off from the calling thread, so no
+command can land after the all-off. Events of the dropped commands are still
+logged, against the all-off mask that was actually applied, and the log is
+flushed before it returns.
+
+With an ``EventLog`` attached, commands queued with an ``event`` (inputs,
+predicted mask, source) are logged from the worker thread together with the
+mask their commit applied, so file writes never happen on the caller's thread.
+"""
+import collections
+import threading
+import time
+
+from relay_control.instrumentation import NULL_METRICS, Histogram
+from relay_control.relay_bank import mask_from_states
+
+
+class RelayWorker:
+    def __init__(self, bank, metrics=NULL_METRICS, max_acks=256, log=None):
+        self.bank = bank
+        self.metrics = metrics
+        self.log = log
+        self.latency = Histogram()  # Seconds from queueing a command to its pin write
+        self._pending = {}  # relay index -> (state, sequence, queued at)
+        self._acks = collections.deque(maxlen=max_acks)
+        self._events = []  # (time, inputs, predicted, source) of queued commands, for the log
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._stopping = False
+        self._thread = None
+
+        self.submitted = 0
+        self.superseded = 0
+        self.commits = 0
+        self.error = None
+        self.log_error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="relay-actuator", daemon=True)
+        self._thread.start()
+
+    def set_relay(self, index, state, event=None):
+        # Queue one relay; returns the command's sequence number
+        return self._submit({index: bool(state)}, event)
+
+    def apply(self, states, event=None):
+        # Queue a full bank state (same forms as RelayBank.apply)
+        mask = mask_from_states(states)
+        return self._submit({i: bool((mask >> i) & 1) for i in range(self.bank.size)}, event)
+
+    def _submit(self, states, event=None):
+        queued_at = time.perf_counter()
+        with self._condition:
+            if self._stopping:
+                return None
+            self._sequence += 1
+            if event is not None and self.log is not None:
+                self._events.append((time.time(),) + tuple(event))
+            for index, state in states.items():
+                if index in self._pending:
+                    self.superseded += 1
+                self._pending[index] = (state, self._sequence, queued_at)
+            self.submitted += len(states)
+            self._condition.notify()
+            return self._sequence
+
+    def take_acks(self):
+        # Drain the acknowledgements posted since the last call, oldest first
+        acks = []
+        while self._acks:
+            acks.append(self._acks.popleft())
+        return acks
+
+    def _run(self):
+        # While idle, wake up now and then to push buffered log records to disk
+        idle_timeout = self.log.flush_interval if self.log is not None else None
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    if not self._condition.wait(idle_timeout):
+                        break
+                if self._stopping:
+                    return
+                pending, self._pending = self._pending, {}
+                events, self._events = self._events, []
+            if not pending:
+                self._write_log((), 0)
+                continue
+
+            mask = self.bank.mask
+            for index, (state, _, _) in pending.items():
+                mask = (mask | (1 << index)) if state else (mask & ~(1 << index))
+            try:
+                changed = self.bank.apply(mask)
+            except Exception as e:
+                self.error = e
+                return
+            self.commits += 1
+            for _, _, queued_at in pending.values():
+                self.latency.add(time.perf_counter() - queued_at)
+                self.metrics.record("relay_command", queued_at)
+            sequence = max(sequence for _, sequence, _ in pending.values())
+            self._acks.append((sequence, mask, changed))
+            self._write_log(events, mask)
+
+    def _write_log(self, events, mask, flush=False):
+        # A failing log (disk full, say) is reported but never stops the relays
+        if self.log is None:
+            return
+        try:
+            for timestamp, inputs, predicted, source in events:
+                self.log.append(timestamp, inputs, predicted, mask, source)
+            if flush or not events:
+                self.log.flush()
+        except Exception as e:
+            self.log_error = e
+            self.log = None
+
+    def shutdown(self, timeout=2.0):
+        # Discard queued commands, stop the worker, then force every relay off
+        with self._condition:
+            self._stopping = True
+            self._pending = {}
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.bank.all_off()
+        with self._condition:
+            events, self._events = self._events, []
+        self._write_log(events, self.bank.mask, flush=True)
+
+    def stats(self):
+        with self._condition:
+            pending = len(self._pending)
+        return dict(self.latency.summary(), submitted=self.submitted, superseded=self.superseded,
+                    commits=self.commits, pending=pending)
@@ -0,0 +1,212 @@
+"""Threshold-rule fast path for the relay outputs.
+
+The L1-L8 labels are plain threshold rules over the current, voltage and power
+of a sample. ``MODEL_RULES`` spells out the rules behind
+``high_quality_synthetic_data.csv`` (and so the shipped model) as data;
+``POWER_RULES`` are the stricter power-aware rules ``dataset_gen.py`` labels new
+data with.
+``RulesEngine`` compiles that table into a few NumPy arrays and evaluates all
+8 outputs in one vectorized pass. It has the same ``predict`` interface as the
+model, so it can stand in for it anywhere. ``ShadowPredictor`` runs a primary
+and a shadow predictor side by side and records how often they disagree and
+what each one costs::
+
+    python -m relay_control.rules            # replay the bundled CSV in shadow mode
+"""
+import argparse
+import operator
+import os
+import time
+
+import numpy as np
+
+from relay_control.features import stateless_predict
+
+# Quantities derived from IR/IY/IB/VR/VY/VB: three-phase mean current and voltage
+# and mean per-phase power (identical to the single-phase values for balanced phases)
+QUANTITIES = ["current", "voltage", "power"]
+OPERATORS = [">", "<=", "<"]
+_PY_OPERATORS = {">": operator.gt, "<=": operator.le, "<": operator.lt}
+
+# One entry per relay: (combinator, [(quantity, operator, threshold), ...])
+MODEL_RULES = [
+    ("and", [("current", ">", 5), ("voltage", ">", 225)]),
+    ("and", [("current", "<=", 5), ("voltage", "<=", 225)]),
+    ("or", [("current", ">", 5), ("voltage", ">", 225)]),
+    ("and", [("current", "<=", 5), ("voltage", ">", 225)]),
+    ("and", [("current", ">", 5), ("voltage", "<=", 225)]),
+    ("or", [("current", "<=", 5), ("voltage", "<=", 225)]),
+    ("and", [("current", ">", 5), ("voltage", ">", 225)]),
+    ("and", [("current", "<=", 5), ("voltage", "<=", 225)]),
+]
+
+POWER_RULES = [
+    ("and", [("current", ">", 5), ("voltage", ">", 226), ("power", ">", 1200)]),
+    ("and", [("current", "<=", 5), ("voltage", "<=", 224), ("power", "<=", 1100)]),
+    ("or", [("current", ">", 5), ("voltage", ">", 225), ("power", ">", 1150)]),
+    ("and", [("current", "<=", 5), ("voltage", ">", 225), ("power", "<", 1000)]),
+    ("and", [("current", ">", 5), ("voltage", "<=", 225), ("power", ">", 1250)]),
+    ("or", [("current", "<=", 5), ("voltage", "<=", 225), ("power", "<", 1050)]),
+    ("and", [("current", ">", 6), ("voltage", ">", 227), ("power", ">", 1300)]),
+    ("and", [("current", "<=", 4), ("voltage", "<=", 223), ("power", "<", 950)]),
+]
+
+PREDICTION_MODES = ["model", "rules", "shadow"]
+
+
+def quantities(inputs):
+    # (n, 6) IR..VB -> (n, 3) current, voltage, power in float64
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if inputs.ndim == 1:
+        inputs = inputs.reshape(1, -1)
+    currents, voltages = inputs[:, :3], inputs[:, 3:6]
+    return np.column_stack([currents.mean(axis=1), voltages.mean(axis=1),
+                            (currents * voltages).mean(axis=1)])
+
+
+class RulesEngine:
+    def __init__(self, rules=MODEL_RULES):
+        self.rules = rules
+        quantity, operator, threshold, starts, is_or = [], [], [], [], []
+        for combinator, conditions in rules:
+            starts.append(len(quantity))
+            is_or.append(combinator == "or")
+            for name, op, value in conditions:
+                quantity.append(QUANTITIES.index(name))
+                operator.append(OPERATORS.index(op))
+                threshold.append(value)
+        # One column per condition; reduceat folds each relay's run of columns
+        self.quantity = np.array(quantity, dtype=np.intp)
+        self.threshold = np.array(threshold, dtype=np.float64)
+        self.greater = np.array(operator) == OPERATORS.index(">")
+        self.less_equal = np.array(operator) == OPERATORS.index("<=")
+        self.starts = np.array(starts, dtype=np.intp)
+        self.is_or = np.array(is_or)
+        self.n_outputs = len(rules)
+        # Plain-Python form for single samples, where NumPy call overhead dominates
+        self._row_rules = [(combinator == "or",
+                            [(QUANTITIES.index(name), _PY_OPERATORS[op], value)
+                             for name, op, value in conditions])
+                           for combinator, conditions in rules]
+
+    def evaluate_quantities(self, q):
+        values = q[:, self.quantity]
+        conditions = np.where(self.greater, values > self.threshold,
+                              np.where(self.less_equal, values <= self.threshold,
+                                       values < self.threshold))
+        any_true = np.logical_or.reduceat(conditions, self.starts, axis=1)
+        all_true = np.logical_and.reduceat(conditions, self.starts, axis=1)
+        return np.where(self.is_or, any_true, all_true).astype(np.int64)
+
+    def predict(self, X):
+        # Same shape and dtype as the model's predict: (n, 8) int64 labels
+        X = np.asarray(X, dtype=np.float64)
+        if X.size == 6:
+            return np.array([self._predict_row(X.ravel().tolist())], dtype=np.int64)
+        return self.evaluate_quantities(quantities(X))
+
+    def _predict_row(self, row):
+        ir, iy, ib, vr, vy, vb = row
+        q = ((ir + iy + ib) / 3, (vr + vy + vb) / 3, (ir * vr + iy * vy + ib * vb) / 3)
+        labels = []
+        for is_or, conditions in self._row_rules:
+            results = [op(q[index], value) for index, op, value in conditions]
+            labels.append(int(any(results) if is_or else all(results)))
+        return labels
+
+
+class ShadowPredictor:
+    # Returns the primary's predictions; the shadow runs alongside for comparison
+
+    def __init__(self, primary, shadow, primary_name="rules", shadow_name="model"):
+        self.primary = primary
+        self.shadow = shadow
+        self.names = (primary_name, shadow_name)
+        self.stateful = getattr(primary, "stateful", False) or getattr(shadow, "stateful", False)
+        self.reset()
+
+    def reset(self):
+        self.rows = 0
+        self.calls = 0
+        self.disagreeing_rows = 0
+        self.disagreements = None  # per output
+        self.seconds = [0.0, 0.0]
+
+    def predict(self, X):
+        start = time.perf_counter()
+        primary = self.primary.predict(X)
+        middle = time.perf_counter()
+        shadow = self.shadow.predict(X)
+        self.seconds[0] += middle - start
+        self.seconds[1] += time.perf_counter() - middle
+
+        differ = primary != shadow
+        if self.disagreements is None:
+            self.disagreements = np.zeros(differ.shape[1], dtype=np.int64)
+        self.disagreements += differ.sum(axis=0)
+        self.disagreeing_rows += int(differ.any(axis=1).sum())
+        self.rows += len(primary)
+        self.calls += 1
+        return primary
+
+    def score(self, X):
+        # Primary's predictions without touching a windowed model's state or the comparison
+        return stateless_predict(self.primary, X)
+
+    def stats(self):
+        rows = max(self.rows, 1)
+        calls = max(self.calls, 1)
+        return {
+            "rows": self.rows,
+            "disagreement_rate": self.disagreeing_rows / rows,
+            "per_output_disagreement": [int(count) for count in (self.disagreements if self.disagreements is not None else [])],
+            f"{self.names[0]}_us_per_call": self.seconds[0] / calls * 1e6,
+            f"{self.names[1]}_us_per_call": self.seconds[1] / calls * 1e6,
+        }
+
+
+def make_predictor(mode, model):
+    # "model": the ML model only; "rules": threshold rules only; "shadow": rules
+    # drive the relays while the model runs alongside as a cross-check
+    if mode == "model":
+        return model
+    if mode == "rules":
+        return RulesEngine()
+    if mode == "shadow":
+        return ShadowPredictor(RulesEngine(), model)
+    raise ValueError(f"Unknown prediction mode: {mode} (expected one of {PREDICTION_MODES})")
+
+
+def prediction_mode():
+    # Chosen at startup with RELAY_PREDICTION_MODE=model|rules|shadow
+    return os.environ.get("RELAY_PREDICTION_MODE", "model")
+
+
+def main(argv=None):
+    from relay_control import DATASET_PATH
+    parser = argparse.ArgumentParser(description="Replay a dataset with rules and model in shadow mode")
+    parser.add_argument("dataset", nargs="?", default=DATASET_PATH)
+    parser.add_argument("--rows", type=int, default=2000, help="rows scored one at a time")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="rows scored as one batch")
+    args = parser.parse_args(argv)
+
+    from relay_control.batch import iter_inputs
+    from relay_control.model_loader import ModelLoader
+    loader = ModelLoader()
+    loader.start()
+    model = loader.wait()
+    if model is None:
+        raise SystemExit(loader.phase)
+    inputs = np.vstack(list(iter_inputs(args.dataset)))
+
+    shadow = ShadowPredictor(RulesEngine(), model)
+    for row in inputs[:args.rows]:
+        shadow.predict(row)
+    print("single row:", shadow.stats())
+    shadow.reset()
+    shadow.predict(inputs[:args.batch_rows])
+    print("one batch:", shadow.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Switching policy between model predictions and the relays.
+
+A model scoring inputs near a decision boundary (the 5 A current threshold in
+``dataset_gen.py``, say) can flip a relay on every prediction. That wears the
+contacts and floods the GPIO path. ``SwitchScheduler`` takes each predicted
+bank state and decides which relays actually switch:
+
+* confirmation: a relay only changes once ``confirm`` of its last ``window``
+  predictions ask for the new state (hysteresis in time)
+* dwell: a relay stays on for at least ``min_on`` seconds and off for at
+  least ``min_off`` seconds after it switches
+* budget: at most ``budget`` switches per second across the bank (a token
+  bucket that can save up ``max(budget, 1)`` switches)
+
+A confirmed change that is held back by dwell or budget goes on a timer heap
+at the earliest time it may happen. The scheduler's thread sleeps until the
+first deadline instead of polling. When a timer fires, the change happens
+only if the latest predictions still ask for it; otherwise it is dropped.
+
+Every proposal commits the scheduled bank state, so the event log shows the
+model's mask next to the mask that was applied. Manual commands bypass the
+policy and restart the relay's dwell. The defaults let every prediction
+through. Setting the environment turns the policy on::
+
+    RELAY_MIN_ON=2 RELAY_MIN_OFF=2 RELAY_CONFIRM=3/5 RELAY_SWITCH_BUDGET=4 python main.py
+    python -m relay_control.scheduler --min-on 2 --confirm 3/5 --budget 4 --rate 100
+
+``clock`` is injectable and ``advance(now)`` fires due timers without the
+thread, which lets a simulation drive the policy on virtual time.
+"""
+import argparse
+import collections
+import heapq
+import os
+import threading
+import time
+
+from relay_control.relay_bank import mask_from_states
+
+SUPPRESSION_REASONS = ["confirm", "dwell", "budget"]
+TOKEN_EPSILON = 1e-9  # A refill wait this short would round away on a large clock and never arrive
+
+
+def parse_confirm(text):
+    # "N/M" (or "N" for N of N) -> (N, M)
+    confirm, _, window = str(text).partition("/")
+    return int(confirm), int(window or confirm)
+
+
+class SwitchScheduler:
+    def __init__(self, commit, size=8, min_on=0.0, min_off=0.0, confirm=1, window=1, budget=0.0,
+                 clock=time.monotonic):
+        if not 1 <= confirm <= window:
+            raise ValueError(f"Confirmation needs 1 <= N <= M, got {confirm}/{window}")
+        if min_on < 0 or min_off < 0 or budget < 0:
+            raise ValueError("Dwell times and the switching budget cannot be negative")
+        self.commit = commit  # commit(mask, event) -> sequence; called with the lock held to keep order
+        self.size = size
+        self.min_on = min_on
+        self.min_off = min_off
+        self.confirm = confirm
+        self.window = window
+        self.budget = budget
+        self.clock = clock
+        self.mask = 0  # Scheduled bank state, last handed to commit
+        self._votes = [collections.deque(maxlen=window) for _ in range(size)]
+        self._switched_at = [float("-inf")] * size
+        self._timers = []  # Heap of (due, relay)
+        self._due = [None] * size  # Due time of each relay's live timer; older heap entries are stale
+        self._capacity = max(budget, 1.0)
+        self._tokens = self._capacity
+        self._refilled = None
+        self._event = None  # Newest proposal's log event, reused by timer-driven switches
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+        self.proposals = 0
+        self.switches = 0
+        self.deferred = 0
+        self.dropped = 0
+        self.suppressed = dict.fromkeys(SUPPRESSION_REASONS, 0)
+
+    @property
+    def passthrough(self):
+        return self.confirm == 1 and self.window == 1 and not (self.min_on or self.min_off or self.budget)
+
+    def propose(self, states, event=None, now=None):
+        # Offer a predicted bank state; returns commit()'s result for the scheduled state
+        wanted = mask_from_states(states)
+        with self._condition:
+            now = self.clock() if now is None else now
+            self.proposals += 1
+            self._event = event
+            mask = self._fire(now)
+            for i in range(self.size):
+                self._votes[i].append((wanted >> i) & 1)
+                if ((wanted ^ mask) >> i) & 1:
+                    mask = self._consider(i, mask, now, True)
+            self.mask = mask
+            return self.commit(mask, event)
+
+    def override(self, mask, event=None, now=None):
+        # Manual command: apply mask now and restart the dwell of every relay it changes
+        with self._condition:
+            now = self.clock() if now is None else now
+            changed = mask ^ self.mask
+            for i in range(self.size):
+                if (changed >> i) & 1:
+                    self._switched(i, now)
+            self.mask = mask
+            return self.commit(mask, event)
+
+    def set_relay(self, index, state, event=None, now=None):
+        # Manual command for one relay
+        with self._condition:
+            bit = 1 << index
+            return self.override((self.mask | bit) if state else (self.mask & ~bit), event, now)
+
+    def advance(self, now=None):
+        # Fire every timer due by now; returns the scheduled mask
+        with self._condition:
+            now = self.clock() if now is None else now
+            mask = self._fire(now)
+            if mask != self.mask:
+                self.mask = mask
+                self.commit(mask, self._event)
+            return mask
+
+    def next_deadline(self):
+        with self._condition:
+            return self._timers[0][0] if self._timers else None
+
+    def _confirmed(self, i, mask):
+        # Enough of the relay's recent votes ask for the other state
+        current = (mask >> i) & 1
+        return sum(vote != current for vote in self._votes[i]) >= self.confirm
+
+    def _consider(self, i, mask, now, proposed):
+        if not self._confirmed(i, mask):
+            self.suppressed["confirm"] += proposed
+            return mask
+        if self._due[i] is not None:
+            self.suppressed["dwell" if self._dwell_until(i, mask) > now else "budget"] += proposed
+            return mask  # Already waiting on its timer
+        due = self._dwell_until(i, mask)
+        if due > now:
+            self.suppressed["dwell"] += proposed
+            self._schedule(i, due)
+            return mask
+        wait = self._take_token(now)
+        if wait:
+            self.suppressed["budget"] += proposed
+            self._schedule(i, now + wait)
+            return mask
+        self._switched(i, now)
+        self.switches += 1
+        return mask ^ (1 << i)
+
+    def _dwell_until(self, i, mask):
+        return self._switched_at[i] + (self.min_on if (mask >> i) & 1 else self.min_off)
+
+    def _take_token(self, now):
+        # 0 if a switch may happen now (and spend a token), else seconds until one may
+        if not self.budget:
+            return 0.0
+        if self._refilled is not None:
+            self._tokens = min(self._capacity, self._tokens + (now - self._refilled) * self.budget)
+        self._refilled = now
+        if self._tokens >= 1.0 - TOKEN_EPSILON:
+            self._tokens = max(self._tokens - 1.0, 0.0)
+            return 0.0
+        return (1.0 - self._tokens) / self.budget
+
+    def _switched(self, i, now):
+        self._switched_at[i] = now
+        self._votes[i].clear()  # The next change needs fresh confirmation
+        self._due[i] = None
+
+    def _schedule(self, i, due):
+        self._due[i] = due
+        heapq.heappush(self._timers, (due, i))
+        self.deferred += 1
+        self._condition.notify()  # The thread may need to wake up earlier
+
+    def _fire(self, now):
+        mask = self.mask
+        while self._timers and self._timers[0][0] <= now:
+            due, i = heapq.heappop(self._timers)
+            if self._due[i] != due:
+                continue  # Superseded by a switch or a later timer
+            self._due[i] = None
+            if self._confirmed(i, mask):
+                mask = self._consider(i, mask, now, False)
+            else:
+                self.dropped += 1  # The predictions changed their mind while it waited
+        return mask
+
+    def start(self):
+        if self.passthrough or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="relay-scheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        with self._condition:
+            while not self._stopping:
+                timeout = self._timers[0][0] - self.clock() if self._timers else None
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                self.advance()
+
+    def stop(self, timeout=2.0):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        with self._condition:
+            return {"proposals": self.proposals, "switches": self.switches, "deferred": self.deferred,
+                    "dropped": self.dropped, "pending": sum(due is not None for due in self._due),
+                    "suppressed": dict(self.suppressed)}
+
+
+def format_stats(stats):
+    suppressed = ", ".join(f"{reason} {count}" for reason, count in stats["suppressed"].items())
+    return (f"Switching: {stats['switches']} switches from {stats['proposals']} predictions; "
+            f"suppressed {suppressed}; deferred {stats['deferred']}, dropped {stats['dropped']}")
+
+
+def switch_scheduler(commit, size=8, clock=time.monotonic):
+    # Policy from RELAY_MIN_ON/RELAY_MIN_OFF (seconds), RELAY_CONFIRM (N/M) and
+    # RELAY_SWITCH_BUDGET (switches per second); unset means no limit
+    confirm, window = parse_confirm(os.environ.get("RELAY_CONFIRM", "1"))
+    return SwitchScheduler(commit, size, float(os.environ.get("RELAY_MIN_ON", 0)),
+                           float(os.environ.get("RELAY_MIN_OFF", 0)), confirm, window,
+                           float(os.environ.get("RELAY_SWITCH_BUDGET", 0)), clock)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the dataset through the model and a switching policy")
+    parser.add_argument("--min-on", type=float, default=0.0)
+    parser.add_argument("--min-off", type=float, default=0.0)
+    parser.add_argument("--confirm", default="1", help="N/M: N of the last M predictions must agree")
+    parser.add_argument("--budget", type=float, default=0.0, help="switches per second for the bank (0 = any)")
+    parser.add_argument("--rate", type=float, default=100.0, help="predictions per (simulated) second")
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from relay_control.columnar import pack_labels
+    from relay_control.model_loader import ModelLoader
+    from relay_control.streaming import CsvReplaySource
+
+    loader = ModelLoader()
+    loader.start()
+    if loader.wait() is None:
+        raise SystemExit(loader.phase)
+    rows = CsvReplaySource().rows
+    rows = rows[np.arange(args.samples) % len(rows)]
+    wanted = pack_labels(loader.model.predict(rows)).tolist()
+
+    # Run on simulated time: one prediction every 1/rate seconds, timers fired in between
+    now = [0.0]
+    scheduler = SwitchScheduler(lambda mask, event: mask, 8, args.min_on, args.min_off,
+                                *parse_confirm(args.confirm), args.budget, clock=lambda: now[0])
+    raw = applied = 0
+    previous_wanted = previous_mask = 0
+    for i, mask in enumerate(wanted):
+        now[0] = i / args.rate
+        scheduled = scheduler.propose(mask)
+        raw += bin(mask ^ previous_wanted).count("1")
+        applied += bin(scheduled ^ previous_mask).count("1")
+        previous_wanted, previous_mask = mask, scheduled
+    stats = scheduler.stats()
+    seconds = len(wanted) / args.rate
+    print(f"{len(wanted)} predictions over {seconds:.0f} simulated s")
+    print(f"relay transitions predicted: {raw} ({raw / seconds:.1f}/s)")
+    print(f"relay transitions applied:   {applied} ({applied / seconds:.1f}/s)")
+    print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Faster-than-real-time simulation of the predict -> schedule -> relay pipeline.
+
+A ``VirtualClock`` stands in for ``time.monotonic`` and the Qt timers. Time
+only moves when the simulation moves it, straight to the next sample or the
+next timer. The samples come from one of two places:
+
+* generated: ``dataset_gen.generate_chunk`` with the load and voltage levels
+  following a daily curve (``day_levels``), so relays cross their thresholds
+  the way they would over a real day, with the profile's noise and events
+  on top
+* recorded: a dataset (CSV, ``.cols`` directory or Parquet) replayed at
+  ``rate_hz``, or an event log directory replayed at its recorded times
+
+Inputs are scored a chunk at a time with the runtime model, or the rules
+(``mode``). Each sample then goes through the same ``SwitchScheduler`` the
+app uses, which runs on the virtual clock. Its dwell and budget timers are
+armed on the clock's timer heap. The result drives a ``RelayBank`` on
+simulated pins. Every applied bank state is kept as a timeline. From it come
+per-relay switch counts, time on, hourly snapshots and, for generated or
+labelled data, how often the model agreed with the rule labels::
+
+    python -m relay_control.simulation --days 1 --rate 10 --confirm 3/5 --min-on 5 --timeline day.csv
+    python -m relay_control.simulation --input /var/log/relay --mode rules --json replay.json
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+from relay_control import OUTPUTS
+from relay_control.columnar import pack_labels, unpack_labels
+from relay_control.relay_bank import RelayBank, make_pins
+from relay_control.scheduler import SwitchScheduler, format_stats, parse_confirm
+
+DAY_SECONDS = 86400.0
+DEFAULT_CHUNK = 65536  # Samples scored per predict call
+SNAPSHOT_SECONDS = 3600.0
+
+
+class VirtualClock:
+    # Simulated monotonic time plus one-shot and repeating timers (what QTimer does in the app)
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self._timers = []  # Heap of (due, order, interval or None, callback)
+        self._order = itertools.count()  # Keeps equal-time timers in the order they were set
+
+    def __call__(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        heapq.heappush(self._timers, (when, next(self._order), None, callback))
+
+    def call_every(self, interval, callback, first=None):
+        due = self.now + interval if first is None else first
+        heapq.heappush(self._timers, (due, next(self._order), interval, callback))
+
+    def next_due(self):
+        return self._timers[0][0] if self._timers else float("inf")
+
+    def run_until(self, when):
+        # Fire every timer due by when, in time order, then move the clock to when
+        timers = self._timers
+        while timers and timers[0][0] <= when:
+            due, _, interval, callback = heapq.heappop(timers)
+            self.now = due
+            if interval is not None:
+                heapq.heappush(timers, (due + interval, next(self._order), interval, callback))
+            callback()
+        self.now = when
+
+
+def day_levels(times, current_range=(0.0, 10.0), voltage_range=(220.0, 230.0)):
+    # Mean load current and supply voltage at times (seconds from midnight): quiet
+    # nights, a morning and a larger evening peak, and the voltage sagging under load
+    hour = np.asarray(times, dtype=np.float64) % DAY_SECONDS / 3600.0
+    shape = 0.3 + 0.3 * np.exp(-((hour - 8.0) / 2.0) ** 2) + 0.45 * np.exp(-((hour - 19.0) / 2.5) ** 2)
+    low, high = current_range
+    load = low + (high - low) * np.minimum(shape, 1.0)
+    low, high = voltage_range
+    voltage = high - (high - low) * 0.8 * np.minimum(shape, 1.0)
+    return load, voltage
+
+
+def generated_stream(seconds, rate_hz, profile="balanced", seed=42, chunk=DEFAULT_CHUNK):
+    # Yield (times, inputs, labels) chunks of a generated day (or several) at rate_hz
+    from relay_control.dataset_gen import PROFILES, chunk_rng, generate_chunk
+    params = PROFILES[profile]
+    total = int(seconds * rate_hz)
+    for index, start in enumerate(range(0, total, chunk)):
+        times = np.arange(start, min(start + chunk, total)) / rate_hz
+        load, voltage = day_levels(times, params["current_range"], params["voltage_range"])
+        inputs, labels = generate_chunk(chunk_rng(seed, index), len(times), params, load, voltage)
+        yield times, inputs.astype(np.float32), labels
+
+
+def recorded_stream(path, rate_hz, chunk=DEFAULT_CHUNK):
+    # Yield (times, inputs, labels or None) chunks from a dataset or an event log directory
+    from relay_control.event_log import SEGMENT_PATTERN, EventLogReader
+    import glob
+    if os.path.isdir(path) and glob.glob(os.path.join(path, SEGMENT_PATTERN)):
+        records = EventLogReader(path).query()
+        records = records[np.isfinite(records["inputs"]).all(axis=1)]
+        times = records["time"] - records["time"][0] if len(records) else records["time"]
+        for start in range(0, len(records), chunk):
+            yield times[start:start + chunk], records["inputs"][start:start + chunk], None
+        return
+    from relay_control.columnar import iter_dataset
+    start = 0
+    for inputs, labels in iter_dataset(path, chunk):
+        times = np.arange(start, start + len(inputs)) / rate_hz
+        start += len(inputs)
+        yield times, np.asarray(inputs, dtype=np.float32), labels
+
+
+class Simulation:
+    def __init__(self, predictor, scheduler_options=None, snapshot=SNAPSHOT_SECONDS):
+        self.predictor = predictor
+        self.clock = VirtualClock()
+        self.bank = RelayBank(make_pins("simulated"))
+        options = dict(scheduler_options or {})
+        self.scheduler = SwitchScheduler(self._commit, self.bank.size, clock=self.clock, **options)
+        self.snapshot = snapshot
+        self.times = [0.0]  # Applied bank state timeline: state masks[i] from times[i] on
+        self.masks = [0]
+        self.snapshots = []  # (virtual time, applied switches so far)
+        self.samples = 0
+        self.predicted_transitions = np.zeros(len(OUTPUTS), dtype=np.int64)
+        self.agreement = np.zeros(len(OUTPUTS), dtype=np.int64)
+        self.labelled = 0
+        self.end = 0.0
+        self.wall_seconds = 0.0
+        self._armed = None  # Deadline the clock will wake the scheduler at
+        self._switches = 0
+
+    def _commit(self, mask, event):
+        if mask != self.bank.mask:
+            changed = self.bank.apply(mask)
+            self._switches += bin(changed).count("1")
+            self.times.append(self.clock.now)
+            self.masks.append(mask)
+        return mask
+
+    def _wake(self):
+        self._armed = None
+        self.scheduler.advance(self.clock.now)
+        self._arm()
+
+    def _arm(self):
+        deadline = self.scheduler.next_deadline()
+        if deadline is not None and deadline != self._armed:
+            self._armed = deadline
+            self.clock.call_at(deadline, self._wake)
+
+    def _snapshot(self):
+        self.snapshots.append((self.clock.now, self._switches))
+
+    def run(self, stream):
+        started = time.perf_counter()
+        clock, scheduler, arm = self.clock, self.scheduler, self._arm
+        propose, deferred = scheduler.propose, scheduler.deferred
+        clock.call_every(self.snapshot, self._snapshot)
+        previous = 0
+        for times, inputs, labels in stream:
+            wanted = pack_labels(self.predictor.predict(inputs))
+            flips = wanted ^ np.concatenate([[previous], wanted[:-1]]).astype(wanted.dtype)
+            self.predicted_transitions += unpack_labels(flips).sum(axis=0, dtype=np.int64)
+            previous = int(wanted[-1])
+            if labels is not None:
+                self.agreement += (unpack_labels(wanted) == np.asarray(labels)).sum(axis=0)
+                self.labelled += len(labels)
+            for now, mask in zip(times.tolist(), wanted.tolist()):
+                if clock.next_due() <= now:
+                    clock.run_until(now)
+                else:
+                    clock.now = now
+                propose(mask, None, now)
+                if scheduler.deferred != deferred:  # A new timer went on the scheduler's heap
+                    deferred = scheduler.deferred
+                    arm()
+            self.samples += len(times)
+            self.end = float(times[-1]) if len(times) else self.end
+        clock.run_until(self.end)
+        self.wall_seconds = time.perf_counter() - started
+        return self.summary()
+
+    def timeline(self):
+        # (time, relay, state) for every relay transition, in time order
+        times, masks = np.asarray(self.times), np.asarray(self.masks, dtype=np.int64)
+        changed = masks[1:] ^ masks[:-1]
+        rows = []
+        for step, relay in zip(*np.nonzero((changed[:, None] >> np.arange(len(OUTPUTS))) & 1)):
+            rows.append((float(times[step + 1]), int(relay), int((masks[step + 1] >> relay) & 1)))
+        return rows
+
+    def write_timeline(self, path):
+        with open(path, "w") as handle:
+            handle.write("time,relay,state\n")
+            for when, relay, state in self.timeline():
+                handle.write(f"{when:.3f},{OUTPUTS[relay]},{state}\n")
+
+    def summary(self):
+        times = np.asarray(self.times + [self.end])
+        masks = np.asarray(self.masks, dtype=np.int64)
+        durations = np.diff(times)
+        bits = (masks[:, None] >> np.arange(len(OUTPUTS))) & 1
+        changed = np.abs(np.diff(bits, axis=0)).sum(axis=0) if len(masks) > 1 else np.zeros(len(OUTPUTS))
+        span = max(self.end, 1e-9)
+        relays = {}
+        for i, name in enumerate(OUTPUTS):
+            relays[name] = {"predicted_transitions": int(self.predicted_transitions[i]),
+                            "switches": int(changed[i]),
+                            "on_fraction": float((bits[:, i] * durations).sum() / span)}
+            if self.labelled:
+                relays[name]["label_agreement"] = float(self.agreement[i] / self.labelled)
+        hourly, previous = [], (0.0, 0)
+        for when, switches in self.snapshots + [(self.end, self._switches)]:
+            if when > previous[0]:
+                hourly.append({"until": when, "switches": switches - previous[1]})
+                previous = (when, switches)
+        return {
+            "samples": self.samples,
+            "simulated_seconds": self.end,
+            "wall_seconds": self.wall_seconds,
+            "samples_per_minute": self.samples / self.wall_seconds * 60 if self.wall_seconds else 0.0,
+            "speedup": self.end / self.wall_seconds if self.wall_seconds else 0.0,
+            "switches": self._switches,
+            "scheduler": self.scheduler.stats(),
+            "relays": relays,
+            "snapshots": hourly,
+        }
+
+
+def make_runtime_predictor(mode="model", workers=0, chunk=DEFAULT_CHUNK):
+    # The predictor the app would use (no prediction cache: simulated inputs rarely repeat)
+    from relay_control.model_loader import ModelLoader
+    from relay_control.rules import RulesEngine, make_predictor
+    if mode == "rules":
+        return RulesEngine(), None
+    loader = ModelLoader()
+    loader.start()
+    if loader.wait() is None:
+        raise SystemExit(loader.phase)
+    if workers:
+        from relay_control.feeders import SharedModelPool
+        pool = SharedModelPool(loader.model, workers, chunk)
+        return pool, pool
+    return make_predictor(mode, loader.model), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the relay pipeline faster than real time")
+    parser.add_argument("--input", help="dataset or event log directory to replay (default: a generated day)")
+    parser.add_argument("--days", type=float, default=1.0, help="generated: simulated days")
+    parser.add_argument("--rate", type=float, default=10.0, help="samples per simulated second")
+    parser.add_argument("--profile", default="balanced", help="generated: dataset_gen profile")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=["model", "rules", "shadow"],
+                        default=os.environ.get("RELAY_PREDICTION_MODE", "model"))
+    parser.add_argument("--workers", type=int, default=0, help="shared-memory scoring processes (model mode)")
+    parser.add_argument("--min-on", type=float, default=float(os.environ.get("RELAY_MIN_ON", 0)))
+    parser.add_argument("--min-off", type=float, default=float(os.environ.get("RELAY_MIN_OFF", 0)))
+    parser.add_argument("--confirm", default=os.environ.get("RELAY_CONFIRM", "1"), help="N/M")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("RELAY_SWITCH_BUDGET", 0)),
+                        help="switches per second for the bank (0 = any)")
+    parser.add_argument("--timeline", help="write relay transitions (time,relay,state) to this CSV")
+    parser.add_argument("--json", help="write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    confirm, window = parse_confirm(args.confirm)
+    options = {"min_on": args.min_on, "min_off": args.min_off, "confirm": confirm, "window": window,
+               "budget": args.budget}
+    predictor, pool = make_runtime_predictor(args.mode, args.workers)
+    if args.input:
+        stream = recorded_stream(args.input, args.rate)
+    else:
+        stream = generated_stream(args.days * DAY_SECONDS, args.rate, args.profile, args.seed)
+    simulation = Simulation(predictor, options)
+    try:
+        summary = simulation.run(stream)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    print(f"{summary['samples']:,} samples, {summary['simulated_seconds'] / 3600:.1f} simulated hours "
+          f"in {summary['wall_seconds']:.1f} s: {summary['samples_per_minute']:,.0f} samples/min, "
+          f"{summary['speedup']:,.0f}x real time")
+    print(format_stats(summary["scheduler"]))
+    print(f"{'relay':<6} {'predicted':>10} {'switched':>9} {'on':>7}" + ("  agreement" if simulation.labelled else ""))
+    for name, relay in summary["relays"].items():
+        line = (f"{name:<6} {relay['predicted_transitions']:>10,} {relay['switches']:>9,} "
+                f"{relay['on_fraction']:>6.1%}")
+        if "label_agreement" in relay:
+            line += f"  {relay['label_agreement']:>9.2%}"
+        print(line)
+    if args.timeline:
+        simulation.write_timeline(args.timeline)
+        print(f"Wrote {args.timeline}")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(summary, handle, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
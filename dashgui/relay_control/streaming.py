@@ -0,0 +1,219 @@
+"""Continuous sample -> predict -> relay loop that runs off the Qt UI thread.
+
+An acquisition thread polls a ``SampleSource`` at a fixed rate and pushes
+samples into a bounded queue (dropping the oldest sample when the consumer
+falls behind). An inference thread drains the queue in micro-batches, scores
+them in one ``model.predict`` call and publishes only the newest result. The UI
+polls ``latest()`` from a timer, so however fast the stream runs it sees at most
+one update per refresh.
+
+Run headless against the bundled CSV with::
+
+    python -m relay_control.streaming --rate 200 --seconds 5
+"""
+import argparse
+import queue
+import threading
+import time
+
+import numpy as np
+
+from relay_control import DATASET_PATH, FEATURES
+from relay_control.instrumentation import NULL_METRICS
+
+
+class SampleSource:
+    # Base class for anything that yields IR/IY/IB/VR/VY/VB readings
+
+    def read(self):
+        # Return the next sample as 6 floats, or None once the source is exhausted
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CsvReplaySource(SampleSource):
+    # Simulated meter that replays rows of a dataset CSV, looping by default
+
+    def __init__(self, path=DATASET_PATH, loop=True):
+        import pandas as pd
+        self.rows = pd.read_csv(path, usecols=FEATURES)[FEATURES].to_numpy(dtype=np.float32)
+        self.loop = loop
+        self.position = 0
+
+    def read(self):
+        if self.position >= len(self.rows):
+            if not self.loop:
+                return None
+            self.position = 0
+        row = self.rows[self.position]
+        self.position += 1
+        return row
+
+
+class StreamingPredictor:
+    def __init__(self, model, source, rate_hz=100.0, queue_size=256, max_batch=64,
+                 on_prediction=None, metrics=NULL_METRICS):
+        self.model = model
+        self.source = source
+        self.rate_hz = float(rate_hz)
+        self.max_batch = max_batch
+        # Optional callback run on the inference thread with the newest result of
+        # each batch, e.g. to drive relay hardware without touching the UI thread
+        self.on_prediction = on_prediction
+        self.samples = queue.Queue(maxsize=queue_size)
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._latest = None
+        self._sequence = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.samples_read = 0
+        self.samples_dropped = 0
+        self.samples_predicted = 0
+        self.batches = 0
+        self.error = None
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._acquire, name="relay-acquire", daemon=True),
+            threading.Thread(target=self._infer, name="relay-infer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def latest(self):
+        # (sequence, sample, prediction) of the newest scored sample, or None
+        with self._lock:
+            return self._latest
+
+    def stats(self):
+        return {
+            "read": self.samples_read,
+            "dropped": self.samples_dropped,
+            "predicted": self.samples_predicted,
+            "batches": self.batches,
+            "queued": self.samples.qsize(),
+        }
+
+    def _acquire(self):
+        period = 1.0 / self.rate_hz if self.rate_hz > 0 else 0.0
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            start = self.metrics.clock()
+            try:
+                sample = self.source.read()
+            except Exception as e:
+                self.error = e
+                break
+            self.metrics.record("acquire", start)
+            if sample is None:
+                break
+            self.samples_read += 1
+            try:
+                self.samples.put_nowait(sample)
+            except queue.Full:
+                # Keep the stream fresh: discard the oldest queued sample
+                try:
+                    self.samples.get_nowait()
+                    self.samples_dropped += 1
+                except queue.Empty:
+                    pass
+                self.samples.put_nowait(sample)
+
+            if period:
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    # Fell behind; resynchronise instead of bursting to catch up
+                    deadline = time.perf_counter()
+        # Tell the inference thread no more samples are coming; the source (a
+        # serial port, say) is released here, by the only thread that reads it
+        self._stop.set()
+        self.source.close()
+
+    def _infer(self):
+        while True:
+            try:
+                batch = [self.samples.get(timeout=0.05)]
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.samples.get_nowait())
+                except queue.Empty:
+                    break
+
+            start = self.metrics.clock()
+            try:
+                predictions = self.model.predict(np.asarray(batch, dtype=np.float32))
+            except Exception as e:
+                self.error = e
+                self._stop.set()
+                return
+            self.metrics.record("stream_predict", start)
+            sample, prediction = batch[-1], predictions[-1]
+            self.samples_predicted += len(batch)
+            self.batches += 1
+            with self._lock:
+                self._sequence += 1
+                self._latest = (self._sequence, sample, prediction)
+            if self.on_prediction is not None:
+                start = self.metrics.clock()
+                try:
+                    self.on_prediction(sample, prediction)
+                except Exception as e:
+                    self.error = e
+                    self._stop.set()
+                    return
+                self.metrics.record("on_prediction", start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the streaming loop headless on a CSV replay")
+    parser.add_argument("--csv", default=DATASET_PATH)
+    parser.add_argument("--rate", type=float, default=100.0, help="samples per second (0 = unthrottled)")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    from relay_control import MODEL_PATH
+    from relay_control.compiled_model import CompiledModel
+
+    stream = StreamingPredictor(CompiledModel.from_joblib(MODEL_PATH), CsvReplaySource(args.csv),
+                                rate_hz=args.rate)
+    stream.start()
+    start = time.perf_counter()
+    time.sleep(args.seconds)
+    stream.stop()
+    elapsed = time.perf_counter() - start
+
+    stats = stream.stats()
+    print(f"rate: {stats['predicted'] / elapsed:.1f} predictions/s over {elapsed:.2f}s")
+    print(", ".join(f"{key}={value}" for key, value in stats.items()))
+    latest = stream.latest()
+    if latest is not None:
+        print(f"last sample {latest[1]} -> {latest[2]}")
+
+
+if __name__ == "__main__":
+    main()
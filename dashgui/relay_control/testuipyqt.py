@@ -1,27 +1,68 @@
-import joblib
-import numpy as np
+import os
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton,
     QVBoxLayout, QGridLayout, QMessageBox
 )
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QFont, QPalette, QBrush, QLinearGradient, QColor, QIcon
+from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QFont, QPalette, QBrush, QLinearGradient, QColor
 
-# Load your model
-model = joblib.load('multi_output_model.joblib')
+# Make the relay_control package importable when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from relay_control.controller import RelayController
+from relay_control.relay_bank import relay_backend
+from relay_control.view_model import FRAME_MS, RelayViewModel
+from ui.assets import assets
+
+LOAD_POLL_MS = 50  # How often to check background model load progress
+
+# Every state-dependent look, parsed once; updates only flip the dynamic properties
+STYLESHEET = """
+    QLabel[state="on"] { color: green; }
+    QLabel[state="off"] { color: black; }
+    QPushButton[relay="on"] { background-color: #32CD32; color: black; }
+    QPushButton[relay="off"] { background-color: #C0C0C0; color: black; border: none; }
+    QPushButton[running="true"] { background-color: #FF1744; color: black; }
+    QPushButton[running="false"] { background-color: #00BFFF; color: black; }
+"""
+
+
+def set_state(widget, name, value):
+    # Switch a dynamic property matched by STYLESHEET and re-polish just this widget
+    if widget.property(name) != value:
+        widget.setProperty(name, value)
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
 
 class RelayControlApp(QWidget):
     def __init__(self):
         super().__init__()
         self.is_running = False  # Track the running state
         self.relay_states = [0] * 8  # Track the state of each relay
+        # Model runtime, relay bank and streaming loop shared with main.py/mainpi.py
+        self.controller = RelayController(relay_backend("simulated"))
+        # Updates land in the view model; the frame timer repaints what changed at most 30 times a second
+        self.view_model = RelayViewModel()
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setInterval(FRAME_MS)
+        self.frame_timer.timeout.connect(self.render_frame)
         self.initUI()
+        self.frame_timer.start()
+
+        # Load your model in the background, compiled into flat arrays for fast scoring
+        self.model = None
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(LOAD_POLL_MS)
+        self.load_timer.timeout.connect(self.check_model_load)
+        self.controller.start()
+        self.load_timer.start()
+        self.check_model_load()
 
     def initUI(self):
         # Window properties
         self.setWindowTitle("Relay Model Tester")
         self.setGeometry(100, 100, 800, 480)
+        self.setStyleSheet(STYLESHEET)
         
         # Fonts
         title_font = QFont('Arial', 22, QFont.Bold)
@@ -69,8 +110,8 @@ class RelayControlApp(QWidget):
         self.start_button = QPushButton("Start")
         self.start_button.setFixedHeight(40)
         self.start_button.setFont(button_font)
-        self.start_button.setStyleSheet("background-color: #00BFFF; color: black;")  # Sky blue
-        self.start_button.setIcon(QIcon("https://upload.wikimedia.org/wikipedia/commons/thumb/c/c5/Play_icon.svg/1024px-Play_icon.svg.png"))  # Play icon
+        set_state(self.start_button, "running", "false")  # Sky blue
+        self.start_button.setIcon(assets().icon("play"))  # Play icon
         self.start_button.setIconSize(QSize(24, 24))  # Set icon size
         self.start_button.clicked.connect(self.toggle_start)
 
@@ -79,10 +120,14 @@ class RelayControlApp(QWidget):
         self.predict_button.setFixedHeight(40)
         self.predict_button.setFont(button_font)
         self.predict_button.setStyleSheet("background-color: #00BFFF; color: black;")  # Sky blue
-        self.predict_button.setIcon(QIcon("https://upload.wikimedia.org/wikipedia/commons/thumb/5/57/Calculator_icon.svg/1024px-Calculator_icon.svg.png"))  # Calculator icon
+        self.predict_button.setIcon(assets().icon("calculator"))  # Calculator icon
         self.predict_button.setIconSize(QSize(24, 24))  # Set icon size
         self.predict_button.clicked.connect(self.predict)
 
+        # Start and Predict stay disabled until the model has loaded
+        self.start_button.setEnabled(False)
+        self.predict_button.setEnabled(False)
+
         # Relay Output Labels and Buttons
         self.relay_buttons = []
         self.output_labels = []
@@ -90,14 +135,14 @@ class RelayControlApp(QWidget):
             output_label = QLabel(f"L{i+1}: Off")
             output_label.setFont(label_font)
             output_label.setAlignment(Qt.AlignCenter)
-            output_label.setStyleSheet("color: black;")  # Black text color
+            set_state(output_label, "state", "off")  # Black text color
 
             # Button to turn on/off the relay
             relay_button = QPushButton("Turn On")
             relay_button.setFixedHeight(40)
             relay_button.setFont(button_font)
-            relay_button.setStyleSheet("background-color: #C0C0C0; color: black; border: none;")  # Default button color
-            relay_button.setIcon(QIcon("https://upload.wikimedia.org/wikipedia/commons/thumb/1/1e/Power_icon.svg/1024px-Power_icon.svg.png"))  # Power icon
+            set_state(relay_button, "relay", "off")  # Default button color
+            relay_button.setIcon(assets().icon("power"))  # Power icon
             relay_button.setIconSize(QSize(24, 24))  # Set icon size
             relay_button.clicked.connect(lambda checked, index=i: self.toggle_relay(index))
             
@@ -126,60 +171,104 @@ class RelayControlApp(QWidget):
         grid_layout.setColumnStretch(2, 1)
         grid_layout.setColumnStretch(3, 1)
 
+    def check_model_load(self):
+        if not self.controller.poll_model():
+            self.error_label.setText(f"{self.controller.load_phase}... {self.controller.load_progress}%")
+            return
+        self.load_timer.stop()
+        if self.controller.load_error is not None:
+            self.error_label.setText(self.controller.load_phase)
+            return
+        self.model = self.controller.model
+        self.error_label.setText("")
+        self.start_button.setEnabled(True)
+        self.predict_button.setEnabled(True)
+        self.controller.timer.mark("Predict enabled")
+        print(self.controller.timer.report())
+
     def toggle_start(self):
         if not self.is_running:
             self.is_running = True
+            self.error_label.setText("")
             self.start_button.setText("Stop")
-            self.start_button.setStyleSheet("background-color: #FF1744; color: black;")  # Red
-            self.start_button.setIcon(QIcon("https://upload.wikimedia.org/wikipedia/commons/thumb/c/cb/Stop_icon.svg/1024px-Stop_icon.svg.png"))  # Stop icon
+            set_state(self.start_button, "running", "true")  # Red
+            self.start_button.setIcon(assets().icon("stop"))  # Stop icon
             self.start_button.setIconSize(QSize(24, 24))  # Set icon size
             # Enable the relay buttons after starting
             for button in self.relay_buttons:
                 button.setEnabled(True)
+            # Sample the simulated meter and predict on worker threads
+            self.controller.start_stream()
         else:
-            self.is_running = False
-            self.start_button.setText("Start")
-            self.start_button.setStyleSheet("background-color: #00BFFF; color: black;")  # Sky blue
-            self.start_button.setIcon(QIcon("https://upload.wikimedia.org/wikipedia/commons/thumb/c/c5/Play_icon.svg/1024px-Play_icon.svg.png"))  # Play icon
-            self.start_button.setIconSize(QSize(24, 24))  # Set icon size
-            for label in self.output_labels:
-                label.setText("Off")
-                label.setStyleSheet("color: black;")  # Reset to black when stopped
-            for button in self.relay_buttons:
-                button.setEnabled(False)  # Disable buttons when stopped
+            self.stop_process()
+
+    def stop_process(self):
+        self.is_running = False
+        self.controller.stop_stream()
+        self.start_button.setText("Start")
+        set_state(self.start_button, "running", "false")  # Sky blue
+        self.start_button.setIcon(assets().icon("play"))  # Play icon
+        self.start_button.setIconSize(QSize(24, 24))  # Set icon size
+        self.view_model.set_outputs([0] * len(self.output_labels))  # Reset to Off when stopped
+        for button in self.relay_buttons:
+            button.setEnabled(False)  # Disable buttons when stopped
+
+    def render_frame(self):
+        # Once per frame: pick up the newest streamed prediction, then repaint only what changed
+        if self.is_running:
+            if self.controller.stream_error is not None:
+                self.stop_process()
+                self.error_label.setText(f"Error during streaming: {self.controller.stream_error}")
+            else:
+                latest = self.controller.poll_stream()
+                if latest is not None:
+                    sample, predictions = latest
+                    self.view_model.set_inputs(sample)
+                    self.view_model.set_outputs(predictions)
+                elif not self.controller.streaming:
+                    self.stop_process()  # The source ran out
+        changes = self.view_model.take_changes()
+        if changes is not None:
+            self.apply_changes(changes)
+
+    def apply_changes(self, changes):
+        if changes["inputs"] is not None:
+            for field, value in zip(self.input_fields.values(), changes["inputs"]):
+                field.setText(f"{value:.2f}")
+        for i, value in changes["outputs"]:
+            self.output_labels[i].setText(f"L{i+1}: {'On' if value == 1 else 'Off'}")
+            set_state(self.output_labels[i], "state", "on" if value == 1 else "off")  # Green if on
+        for i, value in changes["relays"]:
+            self.relay_buttons[i].setText("Turn Off" if value else "Turn On")
+            set_state(self.relay_buttons[i], "relay", "on" if value else "off")  # Green while on
+
+    def show_predictions(self, predictions):
+        self.view_model.set_outputs(predictions)
 
     def predict(self):
         try:
             # Retrieve and validate input values
-            inputs = [float(self.input_fields[field].text()) for field in self.input_fields]
-            input_data = np.array([inputs])
-            
+            inputs = {field: self.input_fields[field].text() for field in self.input_fields}
+
             # Model prediction
-            predictions = model.predict(input_data)[0]  # Adjust to access the first element
-            for i, prediction in enumerate(predictions):
-                self.output_labels[i].setText(f"L{i+1}: {'On' if prediction == 1 else 'Off'}")
-                self.output_labels[i].setStyleSheet("color: green;" if prediction == 1 else "color: black;")  # Change color to green if on
+            predictions = self.controller.predict(inputs)
+            self.show_predictions(predictions)
 
         except ValueError:
             # If there's an input error, you can still toggle the relays
-            for i in range(8):
-                self.output_labels[i].setText(f"L{i+1}: {'On' if self.relay_states[i] == 1 else 'Off'}")
-                self.output_labels[i].setStyleSheet("color: black;")  # Keep output text black
+            self.show_predictions(self.relay_states)
 
     def toggle_relay(self, index):
         # Toggle the relay state when the button is clicked
-        if self.relay_states[index] == 0:  # If the relay is currently off
-            self.relay_states[index] = 1  # Update the relay state to on
-            self.output_labels[index].setText(f"L{index + 1}: On")
-            self.output_labels[index].setStyleSheet("color: green;")  # Change color to green
-            self.relay_buttons[index].setText("Turn Off")  # Change button text to "Turn Off"
-            self.relay_buttons[index].setStyleSheet("background-color: #32CD32; color: black;")  # Change button color to green
-        else:  # If the relay is currently on
-            self.relay_states[index] = 0  # Update the relay state to off
-            self.output_labels[index].setText(f"L{index + 1}: Off")
-            self.output_labels[index].setStyleSheet("color: black;")  # Change color back to black
-            self.relay_buttons[index].setText("Turn On")  # Change button text back to "Turn On"
-            self.relay_buttons[index].setStyleSheet("background-color: #C0C0C0; color: black;")  # Change button color back to default
+        self.relay_states[index] = 1 - self.relay_states[index]
+        self.view_model.set_relay(index, self.relay_states[index])
+        self.view_model.set_output(index, self.relay_states[index])
+        self.controller.set_relay(index, self.relay_states[index])
+
+    def closeEvent(self, event):
+        self.frame_timer.stop()
+        self.controller.shutdown()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,253 @@
+"""Train the 8 per-relay classifiers that make up ``multi_output_model.joblib``.
+
+Each (relay output, hyperparameter set) pair is an independent job run in a
+process pool. A job streams the dataset chunk by chunk through an
+``xgboost.DataIter`` into a ``QuantileDMatrix``, so only the quantised matrix is
+held in memory, never the raw rows. The last ``--holdout`` fraction of rows is
+kept back for scoring. With a sweep, the best setting per relay is kept.
+
+The result is saved in the same shape as the shipped model (a
+``MultiOutputClassifier`` over ``XGBClassifier``), together with a JSON timing
+and accuracy report::
+
+    python -m relay_control.train data.cols -o multi_output_model.joblib --workers 4 \\
+        --sweep max_depth=3,6 --sweep learning_rate=0.1,0.3
+
+With ``--window N`` the rows are treated as one consecutive stream and the
+model is trained on ``relay_control.features`` computed over the last N rows,
+by the same code the runtime uses to feed it.
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from relay_control import ARTIFACT_PATH, FEATURES, MODEL_PATH, OUTPUTS
+from relay_control.columnar import DEFAULT_CHUNK_SIZE, dataset_rows, iter_dataset
+from relay_control.features import WindowedFeatures, window_feature_names
+
+# The shipped boosters' saved config: binary:logistic with logloss, the hist updater
+# ("auto" there resolves to it), max_depth 6, eta 0.3, 256 bins and 100 trees
+DEFAULT_PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": "logloss",
+    "tree_method": "hist",
+    "max_depth": 6,
+    "learning_rate": 0.3,
+    "n_estimators": 100,
+}
+
+
+def feature_names(window=None):
+    return window_feature_names(window) if window else FEATURES
+
+
+def iter_rows(path, start, stop, chunksize=DEFAULT_CHUNK_SIZE, window=None):
+    # (inputs, labels) chunks restricted to global rows [start, stop); with a
+    # window, inputs are the windowed features over every row before them
+    features = WindowedFeatures(window) if window else None
+    offset = 0
+    for inputs, labels in iter_dataset(path, chunksize):
+        if features is not None:
+            inputs = features.transform(inputs)
+        end = offset + len(inputs)
+        if end > start and offset < stop:
+            lo, hi = max(start - offset, 0), min(stop, end) - offset
+            yield inputs[lo:hi], labels[lo:hi]
+        offset = end
+        if offset >= stop:
+            return
+
+
+def _data_iter(path, start, stop, output, chunksize, window):
+    import xgboost as xgb
+
+    class ChunkIter(xgb.DataIter):
+        # Feeds one relay's labels chunk by chunk; XGBoost may restart it several times
+        def __init__(self):
+            self._chunks = None
+            super().__init__()
+
+        def next(self, input_data):
+            if self._chunks is None:
+                self._chunks = iter_rows(path, start, stop, chunksize, window)
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            inputs, labels = chunk
+            input_data(data=np.ascontiguousarray(inputs, dtype=np.float32),
+                       label=labels[:, output].astype(np.float32), feature_names=feature_names(window))
+            return True
+
+        def reset(self):
+            self._chunks = None
+
+    return ChunkIter()
+
+
+def train_one(job):
+    # Worker entry point: train one relay output with one parameter set
+    import xgboost as xgb
+
+    path, output, params, rows, holdout, chunksize, nthread, window = job
+    split = rows - int(rows * holdout)
+    params = dict(params)
+    rounds = params.pop("n_estimators")
+    params["nthread"] = nthread
+
+    start = time.perf_counter()
+    train = xgb.QuantileDMatrix(_data_iter(path, 0, split, output, chunksize, window),
+                                max_bin=params.get("max_bin", 256))
+    load_seconds = time.perf_counter() - start
+    booster = xgb.train(params, train, num_boost_round=rounds)
+    train_seconds = time.perf_counter() - start - load_seconds
+
+    correct = evaluated = 0
+    for inputs, labels in iter_rows(path, split, rows, chunksize, window):
+        predicted = booster.inplace_predict(inputs) > 0.5
+        correct += int((predicted == labels[:, output].astype(bool)).sum())
+        evaluated += len(inputs)
+    return {
+        "output": OUTPUTS[output],
+        "params": dict(params, n_estimators=rounds),
+        "load_seconds": load_seconds,
+        "train_seconds": train_seconds,
+        "holdout_rows": evaluated,
+        "accuracy": correct / evaluated if evaluated else None,
+        "booster": bytes(booster.save_raw("ubj")),
+    }
+
+
+def parse_sweep(values):
+    # ["max_depth=3,6", "learning_rate=0.1"] -> list of parameter dicts (grid)
+    axes = {}
+    for value in values or []:
+        name, _, choices = value.partition("=")
+        axes[name] = [json.loads(choice) for choice in choices.split(",")]
+    grid = [dict(DEFAULT_PARAMS)]
+    for name, choices in axes.items():
+        grid = [dict(params, **{name: choice}) for params in grid for choice in choices]
+    return grid
+
+
+def estimator_params(params):
+    # Training params as XGBClassifier arguments; nthread was only for the training job
+    return {key: value for key, value in params.items() if key != "nthread"}
+
+
+def build_model(boosters, params, window=None):
+    # Wrap trained boosters in the MultiOutputClassifier shape of the shipped model;
+    # params[i] is what output i was trained with
+    from sklearn.multioutput import MultiOutputClassifier
+    from xgboost import XGBClassifier
+
+    params = [estimator_params(p) for p in params]
+    estimators = []
+    for raw, chosen in zip(boosters, params):
+        estimator = XGBClassifier(**chosen)
+        estimator.load_model(bytearray(raw))
+        estimators.append(estimator)
+    # The template estimator gets only the settings every output shares
+    shared = {key: value for key, value in params[0].items() if all(p.get(key) == value for p in params)}
+    model = MultiOutputClassifier(XGBClassifier(**shared))
+    model.estimators_ = estimators
+    names = feature_names(window)
+    model.n_features_in_ = len(names)
+    model.feature_names_in_ = np.array(names, dtype=object)
+    return model
+
+
+def _rank(result):
+    return -1.0 if result["accuracy"] is None else result["accuracy"]
+
+
+def format_accuracy(accuracy):
+    return "n/a" if accuracy is None else f"{accuracy:.4f}"
+
+
+def train(path, output=MODEL_PATH, grid=None, workers=None, holdout=0.2,
+          chunksize=DEFAULT_CHUNK_SIZE, report_path=None, window=None):
+    if not 0 < holdout < 1:
+        raise ValueError(f"holdout must be a fraction between 0 and 1, got {holdout}")
+    grid = grid or [dict(DEFAULT_PARAMS)]
+    workers = workers or os.cpu_count() or 1
+    rows = dataset_rows(path)
+    # Share the cores between concurrent jobs rather than oversubscribing them
+    nthread = max(1, (os.cpu_count() or 1) // workers)
+    jobs = [(path, index, params, rows, holdout, chunksize, nthread, window)
+            for index, params in itertools.product(range(len(OUTPUTS)), grid)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(train_one, jobs))
+    wall_seconds = time.perf_counter() - start
+
+    # Keep the best parameter set for each output (first one on ties); a run with
+    # no holdout rows to score (accuracy None) ranks below any scored one
+    best = {}
+    for result in results:
+        current = best.get(result["output"])
+        if current is None or _rank(result) > _rank(current):
+            best[result["output"]] = result
+    chosen = [best[name] for name in OUTPUTS]
+
+    import joblib
+    model = build_model([r["booster"] for r in chosen], [r["params"] for r in chosen], window)
+    joblib.dump(model, output)
+
+    report = {
+        "dataset": path,
+        "rows": rows,
+        "holdout": holdout,
+        "window": window,
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": sum(r["load_seconds"] + r["train_seconds"] for r in results),
+        "outputs": [{key: value for key, value in r.items() if key != "booster"} for r in chosen],
+        "sweep": [{key: value for key, value in r.items() if key != "booster"} for r in results]
+        if len(grid) > 1 else [],
+    }
+    with open(report_path or os.path.splitext(output)[0] + ".report.json", "w") as handle:
+        json.dump(report, handle, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the multi-output relay model")
+    parser.add_argument("dataset", help="CSV, columnar directory or .parquet with IR..VB and L1..L8")
+    parser.add_argument("-o", "--output", default="multi_output_model.joblib")
+    parser.add_argument("--workers", type=int, default=None, help="training processes (default: all cores)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction of rows kept back for scoring")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--sweep", action="append", metavar="PARAM=V1,V2",
+                        help="hyperparameter values to try; repeat for a grid")
+    parser.add_argument("--report", help="JSON report path (default: next to the model)")
+    parser.add_argument("--window", type=int, default=None, metavar="N",
+                        help="train on windowed features over the last N rows (relay_control.features)")
+    parser.add_argument("--export-artifact", nargs="?", const=ARTIFACT_PATH, metavar="DIR",
+                        help="also write the fast-start NumPy artifact")
+    args = parser.parse_args(argv)
+    if not 0 < args.holdout < 1:
+        parser.error("--holdout must be a fraction between 0 and 1")
+
+    report = train(args.dataset, args.output, parse_sweep(args.sweep), args.workers,
+                   args.holdout, args.chunk_size, args.report, args.window)
+
+    print(f"Trained {len(OUTPUTS)} outputs on {report['rows']} rows in {report['wall_seconds']:.1f}s "
+          f"wall ({report['cpu_seconds']:.1f}s summed over {report['workers']} workers)")
+    for result in report["outputs"]:
+        print(f"  {result['output']}: accuracy {format_accuracy(result['accuracy'])}, "
+              f"load {result['load_seconds']:.2f}s, train {result['train_seconds']:.2f}s, "
+              f"max_depth={result['params']['max_depth']} learning_rate={result['params']['learning_rate']}")
+    if args.export_artifact:
+        from relay_control.model_artifact import export_artifact
+        export_artifact(args.output, args.export_artifact)
+        print(f"Exported artifact to {args.export_artifact}")
+
+
+if __name__ == "__main__":
+    main()
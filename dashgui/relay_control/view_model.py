@@ -0,0 +1,65 @@
+"""Frame-capped view model for the relay windows.
+
+Predictions, relay toggles and streamed samples only update plain Python state
+here, however often they arrive. A Qt timer running at ``FRAME_RATE_HZ`` calls
+``take_changes()`` once per frame and touches only the widgets whose displayed
+value actually differs from the last frame. Widget looks are chosen by
+switching a dynamic property (``state="on"``/``"off"``) matched by one
+stylesheet set up front, instead of building a new stylesheet string per
+update. Qt is not imported, so this can be timed and driven headless.
+"""
+FRAME_RATE_HZ = 30
+FRAME_MS = 1000 // FRAME_RATE_HZ
+
+
+class RelayViewModel:
+    def __init__(self, count=8, input_count=6):
+        self.count = count
+        self.outputs = [0] * count  # L1-L8 as shown on the output labels
+        self.relays = [0] * count  # Manual relay button states
+        self.inputs = None  # Newest streamed sample to show in the input fields
+        self._shown_outputs = [None] * count
+        self._shown_relays = [None] * count
+        self._dirty = True
+        self.updates = 0
+        self.frames = 0
+
+    def set_outputs(self, values):
+        self.outputs = [int(value) for value in values][:self.count]
+        self._dirty = True
+        self.updates += 1
+
+    def set_output(self, index, value):
+        self.outputs[index] = int(value)
+        self._dirty = True
+        self.updates += 1
+
+    def set_relay(self, index, value):
+        self.relays[index] = int(value)
+        self._dirty = True
+        self.updates += 1
+
+    def set_inputs(self, values):
+        self.inputs = [float(value) for value in values]
+        self._dirty = True
+        self.updates += 1
+
+    def take_changes(self):
+        # {"outputs": [(i, value)], "relays": [(i, value)], "inputs": values or None}
+        # relative to the previous frame, or None if nothing needs repainting
+        if not self._dirty:
+            return None
+        self._dirty = False
+        outputs = [(i, value) for i, (value, shown) in enumerate(zip(self.outputs, self._shown_outputs))
+                   if value != shown]
+        relays = [(i, value) for i, (value, shown) in enumerate(zip(self.relays, self._shown_relays))
+                  if value != shown]
+        inputs, self.inputs = self.inputs, None
+        for i, value in outputs:
+            self._shown_outputs[i] = value
+        for i, value in relays:
+            self._shown_relays[i] = value
+        if not outputs and not relays and inputs is None:
+            return None
+        self.frames += 1
+        return {"outputs": outputs, "relays": relays, "inputs": inputs}
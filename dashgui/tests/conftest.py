@@ -0,0 +1,13 @@
+"""Run the tests from dashgui/ the way the app runs: headless, with mock relay pins.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("GPIOZERO_PIN_FACTORY", "mock")
+for key in ["RELAY_DAEMON_SOCKET", "RELAY_FEEDERS", "RELAY_EVENT_LOG", "RELAY_METER",
+            "RELAY_MIN_ON", "RELAY_MIN_OFF", "RELAY_CONFIRM", "RELAY_SWITCH_BUDGET", "RELAY_PREDICTION_CACHE"]:
+    os.environ.pop(key, None)
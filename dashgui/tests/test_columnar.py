@@ -0,0 +1,24 @@
+import numpy as np
+
+from relay_control.columnar import count_csv_rows, pack_labels, unpack_labels
+from relay_control.relay_bank import mask_from_states, states_from_mask
+
+
+def test_count_csv_rows(tmp_path):
+    cases = {"empty.csv": b"", "header.csv": b"a,b\n", "no_newline.csv": b"a,b\n1,2\n3,4",
+             "rows.csv": b"a,b\n1,2\n3,4\n"}
+    counts = {}
+    for name, data in cases.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        counts[name] = count_csv_rows(str(path))
+    assert counts == {"empty.csv": 0, "header.csv": 0, "no_newline.csv": 2, "rows.csv": 2}
+
+
+def test_pack_labels_round_trip_and_masks():
+    labels = np.random.default_rng(0).integers(0, 2, (50, 8))
+    masks = pack_labels(labels)
+    np.testing.assert_array_equal(unpack_labels(masks), labels)
+    # A packed NumPy mask is accepted where an int mask is
+    assert mask_from_states(masks[3]) == mask_from_states(labels[3].tolist())
+    assert states_from_mask(mask_from_states(masks[3])) == labels[3].tolist()
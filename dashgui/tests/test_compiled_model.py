@@ -0,0 +1,58 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from relay_control import ARTIFACT_PATH, DATASET_PATH, FEATURES, MODEL_PATH
+from relay_control.compiled_model import CompiledModel
+from relay_control.model_artifact import load_artifact
+
+
+@pytest.fixture(scope="module")
+def stock():
+    joblib = pytest.importorskip("joblib")
+    pytest.importorskip("xgboost")
+    warnings.simplefilter("ignore")
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return pd.read_csv(DATASET_PATH, usecols=FEATURES)[FEATURES].to_numpy()
+
+
+def non_finite_rows(rows):
+    # Every feature in turn set to NaN, +inf, -inf and a float64 that overflows float32
+    base = rows[:4]
+    out = []
+    for value in (np.nan, np.inf, -np.inf, 1e39, -1e39):
+        for column in range(base.shape[1]):
+            block = base.copy()
+            block[:, column] = value
+            out.append(block)
+        out.append(np.full_like(base[:1], value))
+    return np.concatenate(out)
+
+
+def test_compiled_matches_stock(stock, rows):
+    compiled = CompiledModel.from_estimator(stock)
+    np.testing.assert_array_equal(compiled.predict(rows), stock.predict(rows))
+
+
+def test_non_finite_inputs_match_stock(stock, rows):
+    X = non_finite_rows(rows)
+    expected = stock.predict(X)
+    np.testing.assert_array_equal(CompiledModel.from_estimator(stock).predict(X), expected)
+    np.testing.assert_array_equal(load_artifact(ARTIFACT_PATH).predict(X), expected)
+
+
+def test_old_artifact_leaves_are_patched(stock, rows):
+    # Artifacts exported with an inf leaf threshold still load safely
+    compiled = CompiledModel.from_estimator(stock)
+    is_leaf = compiled.left == np.arange(len(compiled.left))
+    threshold = np.where(is_leaf, np.float32(np.inf), compiled.threshold)
+    old = CompiledModel(compiled.feature, threshold, compiled.left, compiled.default_left, compiled.value,
+                        compiled.roots, compiled.base_margin, compiled.classes, compiled.max_depth)
+    X = non_finite_rows(rows)
+    np.testing.assert_array_equal(old.predict(X), stock.predict(X))
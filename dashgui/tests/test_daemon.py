@@ -0,0 +1,100 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from relay_control.client import RelayClient
+from relay_control.controller import RelayController
+from relay_control.daemon import RelayService, clear_stale_socket
+
+INPUTS = [6.0, 6.0, 6.0, 230.0, 230.0, 230.0]
+
+
+def run_service(service, loops):
+    # asyncio.run, as main() does, so client handlers are cancelled on the way out
+    async def serve():
+        loops.append(asyncio.get_running_loop())
+        try:
+            await service.serve()
+        except asyncio.CancelledError:
+            pass
+    asyncio.run(serve())
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.setenv("RELAY_MODEL_RELOAD", "0")
+    path = str(tmp_path / "relay.sock")
+    service = RelayService(RelayController(), path)
+    loops = []
+    thread = threading.Thread(target=run_service, args=(service, loops), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5.0
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield service
+    loops[0].call_soon_threadsafe(service.close)
+    thread.join(5.0)
+    assert not os.path.exists(path)
+
+
+def loaded_client(path, timeout=30.0):
+    client = RelayClient(path)
+    deadline = time.monotonic() + timeout
+    while not client.request("status")["loaded"]:
+        assert time.monotonic() < deadline, "model did not load"
+        time.sleep(0.05)
+    return client
+
+
+def test_status_and_set_inputs(daemon):
+    client = loaded_client(daemon.path)
+    status = client.request("status")
+    assert status["phase"] == "Model ready" and status["error"] is None and status["clients"] == 1
+    reply = client.request("set_inputs", inputs=INPUTS)
+    assert len(reply["prediction"]) == 8
+    last = client.request("get_prediction")
+    assert (last["inputs"], last["prediction"], last["source"]) == (INPUTS, reply["prediction"], "inputs")
+    assert client.request("predict", rows=[INPUTS])["predictions"] == [reply["prediction"]]
+    expected = sum(bit << i for i, bit in enumerate(reply["prediction"]))
+    deadline = time.monotonic() + 2.0
+    while client.request("get_mask")["mask"] != expected:  # Committed by the actuator thread
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_bad_requests_get_error_replies(daemon):
+    client = loaded_client(daemon.path)
+    client.sock.sendall(b"not json\n")
+    reply = client._read_message()
+    assert reply["ok"] is False and "id" not in reply
+    for op, fields in [("no_such_op", {}), ("predict", {"rows": [INPUTS * 2]}), ("predict", {"rows": [[1.0] * 5]}),
+                       ("set_relay", {"index": 8, "state": True}), ("set_mask", {"mask": 256})]:
+        with pytest.raises(ValueError):
+            client.request(op, **fields)
+    assert client.request("status")["ok"]  # The connection survives every bad request
+
+
+def test_second_instance_is_refused(daemon):
+    with pytest.raises(ValueError, match="already serving"):
+        clear_stale_socket(daemon.path)
+    second = RelayService(RelayController(), daemon.path)
+    with pytest.raises(ValueError):
+        asyncio.run(second.serve())
+    assert RelayClient(daemon.path).request("status")["ok"]  # The first daemon still owns the socket
+
+
+def test_stale_socket_is_removed(tmp_path):
+    path = str(tmp_path / "stale.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.close()  # Left behind, as by a daemon that was killed
+    clear_stale_socket(path)
+    assert not os.path.exists(path)
+    regular = tmp_path / "not-a-socket"
+    regular.write_text("")
+    with pytest.raises(ValueError, match="not a socket"):
+        clear_stale_socket(str(regular))
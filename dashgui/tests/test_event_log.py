@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from relay_control import FEATURES, OUTPUTS
+from relay_control.event_log import EVENT_DTYPE, HEADER, EventLog, EventLogReader, segment_paths
+
+
+def write_events(directory, count, **options):
+    log = EventLog(str(directory), **options)
+    inputs = np.arange(count * len(FEATURES), dtype=np.float32).reshape(count, len(FEATURES))
+    for i in range(count):
+        log.append(1000.0 + i, inputs[i] if i % 4 else None, i & 0xFF, (i * 3) & 0xFF,
+                   "model" if i % 4 else "manual")
+    log.close()
+    return log, inputs
+
+
+def test_round_trip(tmp_path):
+    log, inputs = write_events(tmp_path, 100, buffer_records=16)
+    assert log.stats()["records"] == 100
+    records = EventLogReader(str(tmp_path)).query()
+    assert len(records) == 100
+    np.testing.assert_array_equal(records["time"], 1000.0 + np.arange(100))
+    np.testing.assert_array_equal(records["predicted"], np.arange(100) & 0xFF)
+    np.testing.assert_array_equal(records["applied"], (np.arange(100) * 3) & 0xFF)
+    np.testing.assert_array_equal(records["source"], [1 if i % 4 == 0 else 0 for i in range(100)])
+    manual = np.arange(100) % 4 == 0
+    assert np.isnan(records["inputs"][manual]).all()
+    np.testing.assert_array_equal(records["inputs"][~manual], inputs[~manual])
+
+
+def test_query_time_range_across_segments(tmp_path):
+    write_events(tmp_path, 200, buffer_records=8, max_bytes=HEADER.size + 16 * EVENT_DTYPE.itemsize)
+    reader = EventLogReader(str(tmp_path))
+    assert len(reader.segments) > 1
+    assert len(reader) == 200
+    records = reader.query(1050.0, 1150.0)
+    np.testing.assert_array_equal(records["time"], 1050.0 + np.arange(100))
+    assert len(reader.query(5000.0)) == 0
+
+
+def test_new_log_starts_a_new_segment(tmp_path):
+    write_events(tmp_path, 10)
+    write_events(tmp_path, 10)
+    assert len(segment_paths(str(tmp_path))) == 2
+    assert len(EventLogReader(str(tmp_path))) == 20
+
+
+def test_torn_trailing_record_is_ignored(tmp_path):
+    write_events(tmp_path, 10)
+    path = segment_paths(str(tmp_path))[-1]
+    with open(path, "ab") as handle:
+        handle.write(b"\x01\x02\x03")
+    assert len(EventLogReader(str(tmp_path))) == 10
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    with open(os.path.join(tmp_path, "events-000001.bin"), "wb") as handle:
+        handle.write(b"not an event log segment at all")
+    with pytest.raises(ValueError):
+        EventLogReader(str(tmp_path))
+
+
+def test_export_csv_skips_records_without_inputs(tmp_path):
+    write_events(tmp_path, 20)
+    out = tmp_path / "retrain.csv"
+    rows = EventLogReader(str(tmp_path)).export_csv(str(out), labels="predicted")
+    frame = pd.read_csv(out)
+    assert rows == len(frame) == 15
+    assert list(frame.columns) == FEATURES + OUTPUTS
+    first = frame.iloc[0]
+    assert [first[name] for name in OUTPUTS] == [(1 >> i) & 1 for i in range(len(OUTPUTS))]
+
+
+def test_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        EventLog(str(tmp_path), fsync="sometimes")
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from relay_control import DATASET_PATH, FEATURES
+from relay_control.features import WINDOW_FEATURES, WindowedFeatures, WindowedModel, feature_window, \
+    window_feature_names
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return pd.read_csv(DATASET_PATH, usecols=FEATURES, nrows=300)[FEATURES].to_numpy(dtype=np.float32)
+
+
+def one_at_a_time(stage, rows):
+    return np.array([stage.update(row) for row in rows])
+
+
+@pytest.mark.parametrize("window", [1, 2, 32, 500])
+def test_update_matches_transform(rows, window):
+    # 500 never fills on 300 rows, so the whole run is warm-up
+    expected = WindowedFeatures(window).transform(rows)
+    assert expected.shape == (len(rows), len(FEATURES) + len(WINDOW_FEATURES))
+    assert np.array_equal(one_at_a_time(WindowedFeatures(window), rows), expected)
+
+
+def test_mixed_chunks_match_one_batch(rows):
+    expected = WindowedFeatures(32).transform(rows)
+    stage = WindowedFeatures(32)
+    parts, start = [], 0
+    for size in [1, 5, 0, 31, 1, 1, 64, 3, 100]:
+        block = rows[start:start + size]
+        parts.append(stage.update(block[0])[None] if size == 1 else stage.transform(block))
+        start += size
+    parts.append(one_at_a_time(stage, rows[start:]))
+    assert np.array_equal(np.vstack(parts), expected)
+
+
+def test_reset_starts_a_fresh_window(rows):
+    stage = WindowedFeatures(16)
+    stage.transform(rows[:100])
+    stage.reset()
+    assert np.array_equal(one_at_a_time(stage, rows[100:150]), WindowedFeatures(16).transform(rows[100:150]))
+    stage.reset()
+    assert np.array_equal(stage.transform(rows[:40]), WindowedFeatures(16).transform(rows[:40]))
+
+
+def test_first_sample_has_no_rate_of_change(rows):
+    features = WindowedFeatures(8).update(rows[0])
+    names = window_feature_names(8)
+    roc = [names.index(f"{name}_roc_w8") for name in FEATURES]
+    assert not features[roc].any()
+    means = [names.index(f"{name}_mean_w8") for name in FEATURES]
+    assert np.array_equal(features[means], rows[0])
+
+
+class Features:
+    # Model stand-in that returns the features it was given
+    def predict(self, X):
+        return X
+
+
+def test_score_leaves_the_live_window_alone(rows):
+    model = WindowedModel(Features(), 8)
+    model.predict(rows[:20])
+    scored = model.score(rows[20:40])
+    assert np.array_equal(scored, WindowedFeatures(8).transform(rows[20:40]))
+    assert np.array_equal(model.predict(rows[20:40]), WindowedFeatures(8).transform(rows[:40])[20:])
+
+
+def test_feature_window_reads_the_names():
+    assert feature_window(FEATURES) is None
+    assert feature_window(window_feature_names(32)) == 32
+    with pytest.raises(ValueError):
+        feature_window(FEATURES + ["IR_mean_w32"])
@@ -0,0 +1,57 @@
+import os
+import time
+
+import numpy as np
+
+from relay_control.event_log import EventLogReader
+from relay_control.feeders import FeederGroup, make_feeders, synthetic_config
+
+
+class AllOn:
+    # Per-sample model stand-in that switches every relay on
+    def predict(self, X):
+        return np.ones((len(X), 8), dtype=np.int64)
+
+
+def wait_for_ack(relays, sequence, timeout=2.0):
+    # Shutdown drops queued commands, so let the actuator catch up first
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(ack[0] >= sequence for ack in relays.take_acks()):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def run_ticks(feeders, ticks):
+    # Each tick queues one command per feeder; returns whether every actuator committed them all
+    for feeder in feeders:
+        feeder.start()
+    group = FeederGroup(feeders, AllOn(), rate_hz=0)
+    try:
+        for _ in range(ticks):
+            group.tick()
+        return [wait_for_ack(feeder.relays, ticks) for feeder in feeders]
+    finally:
+        group.close()
+
+
+def test_ticks_pass_each_feeders_switching_policy(monkeypatch):
+    monkeypatch.setenv("RELAY_CONFIRM", "3/3")
+    feeders = make_feeders(synthetic_config(3))
+    assert all(run_ticks(feeders, 2))
+    assert all(feeder.scheduler.mask == 0 for feeder in feeders)  # Two votes of three
+    feeders = make_feeders(synthetic_config(3))
+    assert all(run_ticks(feeders, 3))
+    assert all(feeder.scheduler.mask == 0xFF for feeder in feeders)
+
+
+def test_each_feeder_logs_to_its_own_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv("RELAY_EVENT_LOG", str(tmp_path))
+    feeders = make_feeders(synthetic_config(2))
+    assert all(run_ticks(feeders, 4))
+    assert sorted(os.listdir(tmp_path)) == ["feeder-001", "feeder-002"]
+    for name in ["feeder-001", "feeder-002"]:
+        records = EventLogReader(str(tmp_path / name)).query()
+        assert len(records) == 4
+        np.testing.assert_array_equal(records["predicted"], 0xFF)
@@ -0,0 +1,70 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from relay_control import ARTIFACT_PATH, MODEL_PATH
+from relay_control.hot_reload import ModelReloader, SwappableModel, validate_model, validation_rows
+from relay_control.model_loader import ModelLoader
+from relay_control.prediction_cache import model_files
+
+
+@pytest.fixture
+def model_copy(tmp_path):
+    # The shipped model and artifact, somewhere the test can overwrite them
+    model_path = str(tmp_path / "model.joblib")
+    artifact = str(tmp_path / "model.artifact")
+    shutil.copy(MODEL_PATH, model_path)
+    shutil.copytree(ARTIFACT_PATH, artifact)
+    loader = ModelLoader(model_path, artifact=artifact)
+    loader.start()
+    assert loader.wait() is not None, loader.phase
+    return model_path, artifact, SwappableModel(loader.model, loader.version)
+
+
+def corrupt(paths):
+    for path in paths:
+        with open(path, "wb") as handle:
+            handle.write(b"not a model")
+
+
+def test_failed_load_keeps_the_old_model(model_copy):
+    model_path, artifact, slot = model_copy
+    old, version = slot.current
+    reloader = ModelReloader(slot, model_path=model_path, artifact=artifact, settle=0.0)
+    corrupt(model_files(model_path, artifact))
+    assert not reloader.check()  # First sighting of the change: wait for it to settle
+    assert not reloader.check()
+    assert reloader.failures == 1 and reloader.error is not None
+    assert slot.current == (old, version)
+    rows = validation_rows()
+    validate_model(slot, rows)  # Still serving
+    assert not reloader.check()  # A bad model is not retried until the files change again
+    assert reloader.failures == 1
+
+
+def test_good_model_is_swapped_in(model_copy, tmp_path):
+    model_path, artifact, slot = model_copy
+    old = slot.model
+    built = []
+    reloader = ModelReloader(slot, lambda model: built.append(model) or model, model_path, artifact, settle=0.0)
+    corrupt(model_files(model_path, artifact))
+    reloader.check(), reloader.check()
+    shutil.copy(MODEL_PATH, model_path)
+    shutil.rmtree(artifact)
+    shutil.copytree(ARTIFACT_PATH, artifact)
+    reloader.check()
+    assert reloader.check()
+    assert slot.model is built[0] and slot.model is not old
+    assert reloader.reloads == 1 and reloader.error is None
+    rows = validation_rows()
+    np.testing.assert_array_equal(slot.predict(rows), old.predict(rows))
+
+
+def test_validation_rejects_bad_labels():
+    class Wrong:
+        def predict(self, X):
+            return np.full((len(X), 8), 2)
+
+    with pytest.raises(ValueError):
+        validate_model(Wrong(), validation_rows())
@@ -0,0 +1,111 @@
+import struct
+
+import numpy as np
+import pytest
+
+from relay_control.meter import (FakeMeter, FrameParser, MeterSource, STREAM_FRAME, crc16, crc16_rows,
+                                 frame_format, modbus_request)
+
+ROWS = np.array([[1.5, 2.5, 3.5, 230.0, 229.5, 231.0],
+                 [6.0, 6.1, 6.2, 220.0, 221.0, 222.0],
+                 [0.0, 0.5, 9.9, 235.0, 236.0, 237.0]], dtype=np.float32)
+
+
+def encode(meter, indices):
+    return b"".join(bytes(meter.frame(i)) for i in indices)
+
+
+@pytest.fixture
+def stream_meter():
+    meter = FakeMeter(ROWS, protocol="stream")
+    yield meter
+    meter.close()
+
+
+def test_crc16_matches_modbus_reference():
+    # Read 2 input registers from slave 1 at 0: the checksum from the Modbus spec examples
+    assert struct.pack("<H", crc16(bytes.fromhex("010400000002"))) == bytes.fromhex("71cb")
+    frames = np.frombuffer(bytes(range(40)), dtype=np.uint8).reshape(4, 10)
+    assert crc16_rows(frames).tolist() == [crc16(bytes(row)) for row in frames]
+
+
+def test_modbus_request_carries_a_valid_crc():
+    assert crc16(modbus_request(7, 0x10)) == 0
+
+
+def test_parse_whole_frames(stream_meter):
+    parser = FrameParser(STREAM_FRAME)
+    parser.feed(encode(stream_meter, range(3)))
+    assert parser.parse() == 3
+    np.testing.assert_array_equal(parser.ring.since(0)[0], ROWS)
+    assert parser.stats()["bad_frames"] == 0
+
+
+def test_partial_frame_waits_for_the_rest(stream_meter):
+    data = encode(stream_meter, range(2))
+    parser = FrameParser(STREAM_FRAME)
+    parser.feed(data[:45])
+    assert parser.parse() == 1
+    assert parser.end == 15
+    parser.feed(data[45:])
+    assert parser.parse() == 1
+    np.testing.assert_array_equal(parser.ring.since(0)[0], ROWS[:2])
+
+
+def test_resync_after_noise_and_corrupt_frames(stream_meter):
+    good = encode(stream_meter, range(3))
+    corrupt = bytearray(stream_meter.frame(1))
+    corrupt[10] ^= 0xFF
+    data = b"\x00\x13\xa5" + good[:30] + bytes(corrupt) + b"\xa5\x5a\x01" + good[30:]
+    parser = FrameParser(STREAM_FRAME)
+    parser.feed(data)
+    assert parser.parse() == 3
+    np.testing.assert_array_equal(parser.ring.since(0)[0], ROWS)
+    stats = parser.stats()
+    assert stats["bad_frames"] >= 1
+    assert stats["skipped_bytes"] > 0
+    assert stats["buffered"] == 0
+
+
+def test_feed_larger_than_buffer_parses_in_rounds(stream_meter):
+    parser = FrameParser(STREAM_FRAME, buffer_size=2 * STREAM_FRAME.size)
+    parser.feed(encode(stream_meter, range(10)))
+    parser.parse()
+    assert parser.frames == 10
+    np.testing.assert_array_equal(parser.ring.newest(), ROWS[9 % 3])
+
+
+def test_modbus_frames():
+    meter = FakeMeter(ROWS, protocol="modbus", address=3)
+    try:
+        parser = FrameParser(frame_format("modbus", 3))
+        parser.feed(b"\x03\x04" + encode(meter, range(3)))
+        assert parser.parse() == 3
+        np.testing.assert_array_equal(parser.ring.since(0)[0], ROWS)
+    finally:
+        meter.close()
+
+
+@pytest.mark.parametrize("protocol", ["stream", "modbus"])
+def test_meter_source_over_pty(protocol):
+    meter = FakeMeter(ROWS, protocol=protocol, rate_hz=2000.0, noise_every=5).start()
+    source = MeterSource(meter.port, protocol, timeout=2.0)
+    try:
+        samples = [source.read() for _ in range(20)]
+    finally:
+        source.close()
+        meter.close()
+    rows = {tuple(row) for row in ROWS.tolist()}
+    assert all(tuple(sample.tolist()) in rows for sample in samples)
+    assert source.stats()["frames"] >= 20
+
+
+def test_meter_source_times_out_on_a_quiet_port():
+    meter = FakeMeter(ROWS, protocol="stream")  # Never started
+    source = MeterSource(meter.port, "stream", timeout=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            source.read()
+    finally:
+        source.close()
+        meter.close()
@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+
+from relay_control.prediction_cache import CachedPredictor, cache_predictions
+
+
+class CountingModel:
+    # Label row derived from the inputs, counting the rows it was asked to score
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self.rows += len(X)
+        labels = np.zeros((len(X), 8), dtype=np.int64)
+        labels[:, 0] = X[:, 0] > 5
+        labels[:, 1] = np.isnan(X).any(axis=1)
+        labels[:, 2] = np.isinf(X).any(axis=1)
+        return labels
+
+
+def row(current, voltage=230.0):
+    return [current] * 3 + [voltage] * 3
+
+
+def test_nearby_samples_share_a_grid_cell():
+    model = CountingModel()
+    cache = CachedPredictor(model)
+    cache.predict(row(6.001))
+    cache.predict(row(6.003))
+    assert model.rows == 1
+    assert cache.stats()["hits"] == 1
+    cache.predict(row(6.02))
+    assert model.rows == 2
+
+
+def test_one_model_call_per_distinct_cell_in_a_batch():
+    model = CountingModel()
+    cache = CachedPredictor(model)
+    predictions = cache.predict([row(1.0), row(7.0), row(1.001), row(7.0)])
+    assert model.rows == 2
+    assert predictions[:, 0].tolist() == [0, 1, 0, 1]
+
+
+def test_least_recently_used_entry_is_evicted():
+    model = CountingModel()
+    cache = CachedPredictor(model, max_entries=2)
+    cache.predict(row(1.0))
+    cache.predict(row(2.0))
+    cache.predict(row(1.0))  # Now 2.0 is the oldest
+    cache.predict(row(3.0))
+    assert cache.stats()["evictions"] == 1
+    assert len(cache.entries) == 2
+    scored = model.rows
+    cache.predict(row(1.0))
+    assert model.rows == scored  # Still cached
+    cache.predict(row(2.0))
+    assert model.rows == scored + 1  # Was evicted
+
+
+def test_invalidate_and_set_model():
+    model = CountingModel()
+    cache = CachedPredictor(model)
+    cache.predict(row(1.0))
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+    replacement = CountingModel()
+    cache.predict(row(1.0))
+    cache.set_model(replacement)
+    cache.predict(row(1.0))
+    assert replacement.rows == 1
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_non_finite_rows_bypass_the_cache():
+    model = CountingModel()
+    cache = CachedPredictor(model)
+    X = [row(np.nan), row(np.inf), row(1e39), row(1.0)]
+    predictions = cache.predict(X)
+    np.testing.assert_array_equal(predictions, model.predict(X))
+    assert cache.stats()["uncached"] == 3
+    assert len(cache.entries) == 1
+    assert predictions[0, 1] == 1 and predictions[1, 2] == 1
+
+
+def test_concurrent_callers_keep_the_lru_consistent():
+    model = CountingModel()
+    cache = CachedPredictor(model, max_entries=8)
+    errors = []
+
+    def run(seed):
+        rng = np.random.default_rng(seed)
+        try:
+            for _ in range(300):
+                currents = rng.integers(0, 40, 4) / 4.0
+                predictions = cache.predict([row(current) for current in currents])
+                assert predictions[:, 0].tolist() == (currents > 5).astype(int).tolist()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache.entries) <= 8
+
+
+def test_cache_is_opt_in(monkeypatch, tmp_path):
+    model = CountingModel()
+    paths = (str(tmp_path / "model.joblib"), str(tmp_path / "artifact"))
+    assert cache_predictions(model, *paths) is model
+    monkeypatch.setenv("RELAY_PREDICTION_CACHE", "1")
+    assert isinstance(cache_predictions(model, *paths), CachedPredictor)
@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+from relay_control.event_log import EventLog, EventLogReader
+from relay_control.relay_bank import RelayBank, make_pins
+from relay_control.relay_worker import RelayWorker
+
+
+def make_worker(**options):
+    return RelayWorker(RelayBank(make_pins("simulated")), **options)
+
+
+def wait_for_acks(worker, count, timeout=2.0):
+    acks = []
+    deadline = time.monotonic() + timeout
+    while len(acks) < count and time.monotonic() < deadline:
+        acks += worker.take_acks()
+        time.sleep(0.005)
+    return acks
+
+
+def test_newer_command_supersedes_a_pending_one():
+    worker = make_worker()  # Not started yet, so commands stay queued
+    worker.set_relay(0, True)
+    worker.set_relay(0, False)
+    worker.set_relay(1, True)
+    assert worker.superseded == 1
+    worker.start()
+    try:
+        acks = wait_for_acks(worker, 1)
+    finally:
+        worker.shutdown()
+    assert acks[0][:2] == (3, 0b10)  # One commit, carrying the newest command for each relay
+    assert worker.commits == 1
+
+
+def test_shutdown_drops_queued_commands_and_switches_everything_off():
+    worker = make_worker()
+    worker.start()
+    worker.apply(0xFF)
+    wait_for_acks(worker, 1)
+    assert worker.bank.mask == 0xFF
+    worker.shutdown()
+    assert worker.bank.mask == 0
+    assert all(not pin.is_lit for pin in worker.bank.pins)
+    assert worker.apply(0x0F) is None  # Refused after shutdown
+    assert worker.bank.mask == 0
+
+
+def test_shutdown_logs_the_events_it_dropped(tmp_path):
+    log = EventLog(str(tmp_path), buffer_records=1024)
+    worker = make_worker(log=log)
+    inputs = np.arange(6, dtype=np.float32)
+    worker.apply(0b101, (inputs, 0b101, "model"))  # Queued but never committed: no worker thread
+    worker.shutdown()
+    records = EventLogReader(str(tmp_path)).query()  # On disk before the owner closes the log
+    log.close()
+    assert len(records) == 1
+    assert (records["predicted"][0], records["applied"][0]) == (0b101, 0)
+    np.testing.assert_array_equal(records["inputs"][0], inputs)
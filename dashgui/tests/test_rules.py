@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from relay_control import DATASET_PATH, FEATURES, OUTPUTS
+from relay_control.rules import POWER_RULES, RulesEngine, ShadowPredictor, make_predictor
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    frame = pd.read_csv(DATASET_PATH, nrows=2000)
+    return frame[FEATURES].to_numpy(), frame[OUTPUTS].to_numpy()
+
+
+def test_model_rules_reproduce_the_dataset_labels(dataset):
+    inputs, labels = dataset
+    np.testing.assert_array_equal(RulesEngine().predict(inputs), labels)
+
+
+@pytest.mark.parametrize("rules", [None, POWER_RULES])
+def test_single_rows_match_the_batch_path(dataset, rules):
+    engine = RulesEngine() if rules is None else RulesEngine(rules)
+    inputs = dataset[0][:200]
+    batch = engine.predict(inputs)
+    assert batch.dtype == np.int64 and batch.shape == (200, 8)
+    np.testing.assert_array_equal(np.vstack([engine.predict(row) for row in inputs]), batch)
+
+
+def test_threshold_edges():
+    engine = RulesEngine()
+    at_threshold = engine.predict([5.0, 5.0, 5.0, 225.0, 225.0, 225.0])[0]
+    assert at_threshold.tolist() == [0, 1, 0, 0, 0, 1, 0, 1]  # "> 5" and "> 225" are both false
+
+
+class Inverted:
+    # Disagrees with the rules on every output of every row
+    def predict(self, X):
+        return 1 - RulesEngine().predict(X)
+
+
+def test_shadow_returns_the_primary_and_counts_disagreements(dataset):
+    inputs = dataset[0][:50]
+    shadow = ShadowPredictor(RulesEngine(), Inverted())
+    np.testing.assert_array_equal(shadow.predict(inputs), RulesEngine().predict(inputs))
+    stats = shadow.stats()
+    assert stats["rows"] == 50 and stats["disagreement_rate"] == 1.0
+    assert stats["per_output_disagreement"] == [50] * 8
+    shadow.score(inputs)  # Scoring only: not part of the comparison
+    assert shadow.stats()["rows"] == 50
+
+
+def test_make_predictor_modes():
+    model = Inverted()
+    assert make_predictor("model", model) is model
+    assert isinstance(make_predictor("rules", model), RulesEngine)
+    assert isinstance(make_predictor("shadow", model), ShadowPredictor)
+    with pytest.raises(ValueError):
+        make_predictor("fastest", model)
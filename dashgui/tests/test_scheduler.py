@@ -0,0 +1,136 @@
+import pytest
+
+from relay_control.scheduler import SwitchScheduler, parse_confirm, switch_scheduler
+from relay_control.simulation import VirtualClock
+
+
+class Recorder:
+    # commit() stand-in that keeps every (time, mask) handed to it
+    def __init__(self, clock):
+        self.clock = clock
+        self.commits = []
+
+    def __call__(self, mask, event):
+        self.commits.append((self.clock(), mask))
+        return len(self.commits)
+
+
+def make(clock=None, **options):
+    clock = clock or VirtualClock()
+    recorder = Recorder(clock)
+    return SwitchScheduler(recorder, 8, clock=clock, **options), clock, recorder
+
+
+def test_parse_confirm():
+    assert parse_confirm("3/5") == (3, 5)
+    assert parse_confirm("2") == (2, 2)
+
+
+def test_invalid_policies_are_rejected():
+    with pytest.raises(ValueError):
+        make(confirm=4, window=3)
+    with pytest.raises(ValueError):
+        make(min_on=-1)
+
+
+def test_passthrough_commits_every_prediction():
+    scheduler, clock, recorder = make()
+    assert scheduler.passthrough
+    for mask in (0b1, 0b10, 0b11):
+        scheduler.propose(mask)
+    assert [mask for _, mask in recorder.commits] == [0b1, 0b10, 0b11]
+    assert scheduler.switches == 4
+
+
+def test_confirmation_needs_n_of_last_m():
+    scheduler, clock, _ = make(confirm=3, window=5)
+    for step, wanted in enumerate([1, 0, 1, 0]):
+        clock.now = step
+        assert scheduler.propose(wanted) and scheduler.mask == 0
+    clock.now = 4
+    scheduler.propose(1)  # Third vote for on among the last five
+    assert scheduler.mask == 1
+    assert scheduler.suppressed["confirm"] == 2
+
+
+def test_dwell_defers_and_fires_on_time():
+    scheduler, clock, recorder = make(min_on=10.0)
+    scheduler.propose(1)
+    clock.now = 2.0
+    scheduler.propose(0)  # Confirmed, but relay 1 must stay on until t=10
+    assert scheduler.mask == 1
+    assert scheduler.next_deadline() == 10.0
+    assert scheduler.suppressed["dwell"] == 1
+    clock.run_until(9.999)
+    assert scheduler.advance() == 1
+    clock.run_until(10.0)
+    assert scheduler.advance() == 0
+    assert recorder.commits[-1] == (10.0, 0)
+    assert scheduler.deferred == 1
+
+
+def test_deferred_change_is_dropped_when_predictions_change_back():
+    scheduler, _, _ = make(min_on=5.0)
+    scheduler.propose(1, now=0.0)
+    scheduler.propose(0, now=1.0)  # Deferred to t=5
+    scheduler.propose(1, now=2.0)  # The model changed its mind
+    assert scheduler.advance(5.0) == 1
+    assert scheduler.dropped == 1
+
+
+def test_budget_spreads_switches_over_time():
+    scheduler, _, recorder = make(budget=1.0)
+    scheduler.propose(0b111, now=0.0)  # One token: one switch now, the rest on timers
+    assert scheduler.mask == 0b001
+    assert scheduler.suppressed["budget"] == 2
+    assert scheduler.next_deadline() == 1.0
+    assert scheduler.advance(1.0) == 0b011
+    assert scheduler.advance(2.0) == 0b111
+    assert [mask for _, mask in recorder.commits] == [0b001, 0b011, 0b111]
+
+
+def test_budget_timer_does_not_spin_on_a_large_clock():
+    # Refill waits below float resolution at t~1 day used to re-arm at the same instant forever
+    scheduler, _, _ = make(budget=1.0)
+    scheduler._tokens = 1.0 - 1e-13
+    scheduler._refilled = 86400.0
+    scheduler.propose(1, now=86400.0)
+    assert scheduler.mask == 1
+
+
+def test_override_bypasses_policy_and_restarts_dwell():
+    scheduler, clock, _ = make(confirm=3, window=3, min_on=10.0)
+    scheduler.override(0b101, "manual", now=0.0)
+    assert scheduler.mask == 0b101
+    for step in range(3):
+        scheduler.propose(0, now=1.0 + step)
+    assert scheduler.mask == 0b101  # Confirmed off, but the manual switch-on restarted the dwell
+    assert scheduler.advance(10.0) == 0
+    scheduler.set_relay(7, True, now=11.0)
+    assert scheduler.mask == 0b10000000
+
+
+def test_thread_fires_deadlines_on_the_real_clock():
+    import time
+    commits = []
+    scheduler = SwitchScheduler(lambda mask, event: commits.append(mask), 8, min_on=0.05)
+    scheduler.start()
+    try:
+        scheduler.propose(1)
+        scheduler.propose(0)
+        deadline = time.monotonic() + 2.0
+        while scheduler.mask != 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    assert commits[-1] == 0
+
+
+def test_switch_scheduler_reads_the_environment(monkeypatch):
+    monkeypatch.setenv("RELAY_MIN_ON", "2")
+    monkeypatch.setenv("RELAY_CONFIRM", "3/5")
+    monkeypatch.setenv("RELAY_SWITCH_BUDGET", "4")
+    scheduler = switch_scheduler(lambda mask, event: mask)
+    assert (scheduler.min_on, scheduler.min_off, scheduler.confirm, scheduler.window, scheduler.budget) == \
+        (2.0, 0.0, 3, 5, 4.0)
+    assert not scheduler.passthrough
@@ -0,0 +1,45 @@
+import numpy as np
+
+from relay_control.rules import RulesEngine
+from relay_control.simulation import Simulation, VirtualClock, generated_stream
+
+
+def test_virtual_clock_fires_timers_in_order():
+    clock = VirtualClock()
+    fired = []
+    clock.call_at(2.0, lambda: fired.append(("once", clock.now)))
+    clock.call_every(1.0, lambda: fired.append(("tick", clock.now)))
+    clock.run_until(2.5)
+    assert fired == [("tick", 1.0), ("once", 2.0), ("tick", 2.0)]
+    assert clock() == 2.5
+
+
+def steady_stream(masks, rate_hz=1.0):
+    # One chunk of samples whose rules labels are the given masks, one sample per second
+    on, off = [6.0] * 3 + [230.0] * 3, [1.0] * 3 + [220.0] * 3
+    rows = np.array([on if mask else off for mask in masks], dtype=np.float32)
+    yield np.arange(len(rows)) / rate_hz, rows, None
+
+
+def test_dwell_limits_switching():
+    # Flip every second for a minute; a 10 s minimum on/off time allows a switch every 10 s
+    pattern = [i % 2 for i in range(60)]
+    free = Simulation(RulesEngine()).run(steady_stream(pattern))
+    held = Simulation(RulesEngine(), {"min_on": 10.0, "min_off": 10.0}).run(steady_stream(pattern))
+    assert held["switches"] < free["switches"]
+    assert held["scheduler"]["suppressed"]["dwell"] > 0
+    for relay in held["relays"].values():
+        assert relay["switches"] <= 7  # At most one switch per 10 s dwell over 60 s, plus the first
+
+
+def test_generated_day_agrees_with_its_labels():
+    simulation = Simulation(RulesEngine())
+    summary = simulation.run(generated_stream(2 * 3600, 1.0, chunk=1000))
+    assert summary["samples"] == 7200
+    assert summary["simulated_seconds"] == 7199.0
+    assert [snapshot["until"] for snapshot in summary["snapshots"]] == [3600.0, 7199.0]
+    assert sum(snapshot["switches"] for snapshot in summary["snapshots"]) == summary["switches"]
+    assert len(simulation.timeline()) == summary["switches"]
+    for relay in summary["relays"].values():
+        assert relay["label_agreement"] > 0.9
+        assert 0.0 <= relay["on_fraction"] <= 1.0
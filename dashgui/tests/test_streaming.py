@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+
+from relay_control.streaming import SampleSource, StreamingPredictor
+
+
+class Counting(SampleSource):
+    # Endless source of distinct 6-float samples
+    def __init__(self):
+        self.count = 0
+        self.closed = False
+
+    def read(self):
+        self.count += 1
+        return np.full(6, self.count, dtype=np.float32)
+
+    def close(self):
+        self.closed = True
+
+
+class Echo:
+    # Model stand-in that labels each row with its first value
+    def predict(self, X):
+        return X[:, :1].astype(np.int64)
+
+
+def wait_until_stopped(stream, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while stream.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not stream.running
+
+
+def test_stream_publishes_the_newest_prediction():
+    stream = StreamingPredictor(Echo(), Counting(), rate_hz=0)
+    stream.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while stream.latest() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stream.stop()
+    _, sample, prediction = stream.latest()
+    assert prediction[0] == sample[0]
+    assert stream.error is None
+
+
+def test_failing_callback_stops_the_stream_and_is_reported():
+    def on_prediction(sample, prediction):
+        raise RuntimeError("relay path failed")
+
+    source = Counting()
+    stream = StreamingPredictor(Echo(), source, rate_hz=0, on_prediction=on_prediction)
+    stream.start()
+    assert wait_until_stopped(stream)
+    assert isinstance(stream.error, RuntimeError)
+    assert source.closed  # Acquisition stopped too, rather than filling the queue
+
+
+def test_failing_model_stops_the_stream_and_is_reported():
+    class Broken:
+        def predict(self, X):
+            raise ValueError("bad model")
+
+    stream = StreamingPredictor(Broken(), Counting(), rate_hz=0)
+    stream.start()
+    assert wait_until_stopped(stream)
+    assert isinstance(stream.error, ValueError)
@@ -0,0 +1,163 @@
+"""Image assets for the relay windows: pre-scaled, loaded once, painted once.
+
+The shipped backgrounds are 1800x1200 PNGs that take ~100 ms each to decode on
+a desktop (far more on a Pi). The build step scales them to each target display
+with a centre crop and stores them as JPEGs next to PNG renders of the bundled
+SVG icons::
+
+    python -m ui.assets --size 800x480 --size 1920x1080
+
+``AssetManager`` hands out pixmaps through ``QPixmapCache``, so each asset is
+decoded at most once per process: the pre-scaled file when one matches the
+requested size, otherwise the original scaled once at runtime.
+``BackgroundWidget`` paints the background on a single widget (the central
+widget) instead of a window stylesheet that every child widget would inherit
+and redraw. Works with whichever of PySide6/PyQt5 the window already imported.
+"""
+import argparse
+import os
+import sys
+
+if "PyQt5" in sys.modules:
+    from PyQt5.QtCore import QSize, Qt
+    from PyQt5.QtGui import QIcon, QImage, QImageReader, QPainter, QPixmap, QPixmapCache
+    from PyQt5.QtWidgets import QWidget
+else:
+    from PySide6.QtCore import QSize, Qt
+    from PySide6.QtGui import QIcon, QImage, QImageReader, QPainter, QPixmap, QPixmapCache
+    from PySide6.QtWidgets import QWidget
+
+RESOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources")
+SCALED_DIR = os.path.join(RESOURCE_DIR, "scaled")
+BACKGROUNDS = {"main": "bcg/main.png", "2": "bcg/2.png", "3": "bcg/3.png"}
+ICONS = ["play", "stop", "calculator", "power"]
+DISPLAY_SIZES = [(800, 480), (1920, 1080)]  # Pi 7" touchscreen, desktop monitor
+ICON_SIZE = 48  # Rendered at 2x the 24 px the buttons show, for high-DPI screens
+CACHE_LIMIT_KB = 48 * 1024  # Room for an original plus a few full-screen backgrounds
+
+
+def cover(image, width, height):
+    # Scale to fill width x height and crop the overflow evenly from both sides
+    scaled = image.scaled(width, height, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    return scaled.copy((scaled.width() - width) // 2, (scaled.height() - height) // 2, width, height)
+
+
+def scaled_background_path(name, width, height):
+    return os.path.join(SCALED_DIR, f"{width}x{height}", f"{name}.jpg")
+
+
+def icon_paths(name):
+    # Pre-rendered PNG first; the SVG needs Qt's svg image plugin
+    return [os.path.join(SCALED_DIR, "icons", f"{name}.png"), os.path.join(RESOURCE_DIR, "icons", f"{name}.svg")]
+
+
+def _find(key):
+    # PySide6 returns a null pixmap on a miss, PyQt5 returns None
+    pixmap = QPixmapCache.find(key)
+    return None if pixmap is None or pixmap.isNull() else pixmap
+
+
+class AssetManager:
+    def __init__(self):
+        if QPixmapCache.cacheLimit() < CACHE_LIMIT_KB:
+            QPixmapCache.setCacheLimit(CACHE_LIMIT_KB)
+        self.loads = 0  # Files decoded, for measuring
+
+    def _cached(self, key, load):
+        pixmap = _find(key)
+        if pixmap is None:
+            pixmap = load()
+            self.loads += 1
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def source(self, name):
+        return self._cached(f"source:{name}", lambda: QPixmap(os.path.join(RESOURCE_DIR, BACKGROUNDS[name])))
+
+    def background(self, name, width, height):
+        def load():
+            path = scaled_background_path(name, width, height)
+            if os.path.exists(path):
+                return QPixmap(path)
+            return QPixmap.fromImage(cover(self.source(name).toImage(), width, height))
+        return self._cached(f"background:{name}:{width}x{height}", load)
+
+    def icon(self, name):
+        def load():
+            for path in icon_paths(name):
+                if os.path.exists(path):
+                    pixmap = QPixmap(path)
+                    if not pixmap.isNull():
+                        return pixmap
+            raise ValueError(f"No usable icon file for {name!r}")
+        return QIcon(self._cached(f"icon:{name}", load))
+
+
+_assets = None
+
+
+def assets():
+    # Process-wide manager; create it after the QApplication
+    global _assets
+    if _assets is None:
+        _assets = AssetManager()
+    return _assets
+
+
+class BackgroundWidget(QWidget):
+    # Paints one cached, display-sized background under its children
+
+    def __init__(self, name="main", parent=None):
+        super().__init__(parent)
+        self.name = name
+        self._pixmap = None
+
+    def resizeEvent(self, event):
+        self._pixmap = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._pixmap is None:
+            self._pixmap = assets().background(self.name, self.width(), self.height())
+        painter = QPainter(self)
+        painter.drawPixmap(event.rect(), self._pixmap, event.rect())
+        painter.end()
+
+
+def build(sizes, names=None):
+    # Write the pre-scaled backgrounds and PNG icons; returns the files written
+    written = []
+    for name in names or BACKGROUNDS:
+        image = QImage(os.path.join(RESOURCE_DIR, BACKGROUNDS[name]))
+        for width, height in sizes:
+            path = scaled_background_path(name, width, height)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cover(image, width, height).convertToFormat(QImage.Format_RGB32).save(path, "JPG", 90)
+            written.append(path)
+    for name in ICONS:
+        reader = QImageReader(icon_paths(name)[1])
+        reader.setScaledSize(QSize(ICON_SIZE, ICON_SIZE))
+        path = icon_paths(name)[0]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        reader.read().save(path, "PNG")
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-scale backgrounds and render icons for the target displays")
+    parser.add_argument("--size", action="append", metavar="WxH",
+                        help="display resolution; repeat for several (default: %s)"
+                        % ", ".join(f"{w}x{h}" for w, h in DISPLAY_SIZES))
+    parser.add_argument("--background", action="append", choices=sorted(BACKGROUNDS))
+    args = parser.parse_args(argv)
+
+    from PySide6.QtGui import QGuiApplication
+    app = QGuiApplication.instance() or QGuiApplication([])  # noqa: F841  (image plugins need it)
+    sizes = [tuple(int(v) for v in size.lower().split("x")) for size in args.size] if args.size else DISPLAY_SIZES
+    for path in build(sizes, args.background):
+        print(f"{os.path.relpath(path, RESOURCE_DIR)}: {os.path.getsize(path) // 1024} KB")
+
+
+if __name__ == "__main__":
+    main()
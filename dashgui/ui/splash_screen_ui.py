@@ -20,3 +20,11 @@ class Ui_SplashScreen(object):
         self.progressBar.setValue(0)
         
         # Arrange widgets in layout (e.g., QVBoxLayout, QHBoxLayout)
+        frame_layout = QVBoxLayout(self.frame)
+        frame_layout.addWidget(self.label_title)
+        frame_layout.addWidget(self.label_description)
+        frame_layout.addWidget(self.progressBar)
+
+        central_layout = QVBoxLayout(self.centralwidget)
+        central_layout.addWidget(self.frame)
+        SplashScreen.setCentralWidget(self.centralwidget)